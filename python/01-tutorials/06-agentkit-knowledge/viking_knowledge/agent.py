@@ -25,6 +25,7 @@ from veadk.knowledgebase.knowledgebase import KnowledgeBase
 from veadk.memory.short_term_memory import ShortTermMemory
 from prompts.prompt import ROOT_AGENT_INSTRUCTION_CN, ROOT_AGENT_INSTRUCTION_EN
 from veadk.configs.database_configs import NormalTOSConfig
+from knowledge_sync import KnowledgeSync
 
 provider = os.getenv("CLOUD_PROVIDER")
 if provider and provider.lower() == "byteplus":
@@ -74,10 +75,14 @@ if knowledge_collection_name != "":
 else:
     raise ValueError("DATABASE_VIKING_COLLECTION environment variable is not set")
 
-kb.add_from_files(
+# incrementally ingest the files in the background, unchanged files are skipped
+knowledge_sync = KnowledgeSync(
+    kb,
     files=["/tmp/product_info.txt", "/tmp/service_policy.txt"],
     tos_bucket_name=os.environ.get("DATABASE_TOS_BUCKET"),
+    index=knowledge_collection_name,
 )
+knowledge_sync.start()
 
 ROOT_AGENT_INSTRUCTION = ROOT_AGENT_INSTRUCTION_CN
 
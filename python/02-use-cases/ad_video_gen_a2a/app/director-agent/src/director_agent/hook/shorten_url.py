@@ -15,34 +15,30 @@
 import os
 from typing import Optional, Any
 
-import requests
 from google.adk.tools import BaseTool, ToolContext
 from veadk.utils.logger import get_logger
 
+from director_agent.utils.short_link_client import short_link_client
+
 logger = get_logger(__name__)
 
 shorten_url_service_url = os.getenv("SHORTEN_URL_SERVICE_URL", None)
 
+# 需要缩短结果URL的工具及其资源类型
+SHORTEN_RESOURCE_TYPES = {
+    "image_generate": "image",
+    "video_generate": "video",
+}
+
 
-def shorten_url_impl(url: str, resource_type: Optional[str] = "resource") -> str:
+async def shorten_url_impl(url: str, resource_type: Optional[str] = "resource") -> str:
     """
-    Shorten the URL using the TinyURL API.
+    Shorten the URL using the short link service.
     """
-    data = {"url": url, "type": resource_type}
-    # 发送 POST 请求
-
-    shorten_url = shorten_url_service_url + r"/shorten"
-    response = requests.post(shorten_url, json=data)
-    if response.status_code == 200:
-        response_data = response.json()
-        short_url = response_data.get("short_url")
-        return short_url
-    else:
-        logger.error(f"Failed to shorten URL: {response.status_code}")
-        return url
+    return await short_link_client.shorten(url, resource_type)
 
 
-def hook_shorten_url(
+async def hook_shorten_url(
     tool: BaseTool, args: dict[str, Any], tool_context: ToolContext, tool_response: Any
 ) -> Optional[Any]:
     """
@@ -53,24 +49,23 @@ def hook_shorten_url(
         return None
 
     tool_name = tool.name
-    if tool_name == "image_generate":
-        success_list = tool_response["success_list"]
-        for data in success_list:
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    if isinstance(value, str):
-                        value = shorten_url_impl(url=value, resource_type="image")
-                        data[key] = value
-        logger.debug(f"Shorten URL of `image_generate` successfully: {success_list}")
-        return tool_response
-    elif tool_name == "video_generate":
-        success_list = tool_response["success_list"]
-        for data in success_list:
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    if isinstance(value, str):
-                        value = shorten_url_impl(url=value, resource_type="video")
-                        data[key] = value
-        logger.debug(f"Shorten URL of `video_generate` successfully: {success_list}")
-        return tool_response
-    return None
+    resource_type = SHORTEN_RESOURCE_TYPES.get(tool_name)
+    if resource_type is None:
+        return None
+
+    success_list = tool_response["success_list"]
+    # 收集全部URL，通过批量接口一次往返完成缩短
+    targets = [
+        (data, key)
+        for data in success_list
+        if isinstance(data, dict)
+        for key, value in data.items()
+        if isinstance(value, str)
+    ]
+    short_urls = await short_link_client.shorten_many(
+        [data[key] for data, key in targets], resource_type=resource_type
+    )
+    for (data, key), short_url in zip(targets, short_urls):
+        data[key] = short_url
+    logger.debug(f"Shorten URL of `{tool_name}` successfully: {success_list}")
+    return tool_response
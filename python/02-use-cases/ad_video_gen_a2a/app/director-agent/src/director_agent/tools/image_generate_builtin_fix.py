@@ -14,18 +14,18 @@
 
 import asyncio
 import base64
-import concurrent.futures
-import contextvars
 import json
 import mimetypes
+import os
+import random
 import traceback
-from typing import Dict
+from typing import AsyncIterator, Dict
 
 from google.adk.tools import ToolContext
 from google.genai.types import Blob, Part
 from opentelemetry import trace
 from opentelemetry.trace import Span
-from volcenginesdkarkruntime import Ark
+from volcenginesdkarkruntime import AsyncArk
 from volcenginesdkarkruntime.types.images.images import SequentialImageGenerationOptions
 
 from veadk.config import getenv, settings
@@ -39,14 +39,19 @@ from veadk.version import VERSION
 
 logger = get_logger(__name__)
 
-client = Ark(
+client = AsyncArk(
     api_key=getenv(
         "MODEL_IMAGE_API_KEY", getenv("MODEL_AGENT_API_KEY", settings.model.api_key)
     ),
     base_url=getenv("MODEL_IMAGE_API_BASE", DEFAULT_IMAGE_GENERATE_MODEL_API_BASE),
 )
 
-executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+# 图片生成并发与重试配置，信号量在所有并发的工具调用之间共享
+IMAGE_GENERATE_CONCURRENCY = int(os.getenv("IMAGE_GENERATE_CONCURRENCY", "16"))
+IMAGE_GENERATE_TIMEOUT = float(os.getenv("IMAGE_GENERATE_TIMEOUT", "300"))
+IMAGE_GENERATE_MAX_RETRIES = int(os.getenv("IMAGE_GENERATE_MAX_RETRIES", "2"))
+
+image_generate_semaphore = asyncio.Semaphore(IMAGE_GENERATE_CONCURRENCY)
 tracer = trace.get_tracer("veadk")
 
 
@@ -79,10 +84,33 @@ def _build_input_parts(item: dict, task_type: str, image_field):
     return input_part
 
 
-def handle_single_task_sync(
+async def _generate_with_retry(**kwargs):
+    """
+    Call the model under the shared concurrency limit with a per-attempt timeout,
+    retrying timeouts, rate limits and server errors with exponential backoff
+    """
+    for attempt in range(IMAGE_GENERATE_MAX_RETRIES + 1):
+        try:
+            async with image_generate_semaphore:
+                return await asyncio.wait_for(
+                    client.images.generate(**kwargs), timeout=IMAGE_GENERATE_TIMEOUT
+                )
+        except Exception as e:
+            status_code = getattr(e, "status_code", None)
+            retryable = status_code is None or status_code == 429 or status_code >= 500
+            if not retryable or attempt >= IMAGE_GENERATE_MAX_RETRIES:
+                raise
+            delay = (2**attempt) + random.uniform(0, 1)
+            logger.warning(
+                f"images.generate attempt {attempt + 1} failed: {e}, retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def handle_single_task(
     idx: int, item: dict, tool_context
 ) -> tuple[list[dict], list[str]]:
-    logger.debug(f"handle_single_task_sync item {idx}: {item}")
+    logger.debug(f"handle_single_task item {idx}: {item}")
     success_list: list[dict] = []
     error_list: list[str] = []
     total_tokens = 0
@@ -119,7 +147,7 @@ def handle_single_task_sync(
                 and sequential_image_generation == "auto"
                 and max_images
             ):
-                response = client.images.generate(
+                response = await _generate_with_retry(
                     model=getenv("MODEL_IMAGE_NAME", DEFAULT_IMAGE_GENERATE_MODEL_NAME),
                     **inputs,
                     sequential_image_generation_options=SequentialImageGenerationOptions(
@@ -135,7 +163,7 @@ def handle_single_task_sync(
                     },
                 )
             else:
-                response = client.images.generate(
+                response = await _generate_with_retry(
                     model=getenv("MODEL_IMAGE_NAME", DEFAULT_IMAGE_GENERATE_MODEL_NAME),
                     **inputs,
                     extra_headers={
@@ -172,8 +200,10 @@ def handle_single_task_sync(
                             error_list.append(image_name)
                             continue
                         image_bytes = base64.b64decode(b64)
-                        image_url = _upload_image_to_tos(
-                            image_bytes=image_bytes, object_key=f"{image_name}.png"
+                        image_url = await asyncio.to_thread(
+                            _upload_image_to_tos,
+                            image_bytes=image_bytes,
+                            object_key=f"{image_name}.png",
                         )
                         if not image_url:
                             logger.error(f"Upload image to TOS failed: {image_name}")
@@ -221,6 +251,27 @@ def handle_single_task_sync(
     return success_list, error_list
 
 
+async def iter_image_tasks(
+    tasks: list[dict], tool_context
+) -> AsyncIterator[tuple[list[dict], list[str]] | Exception]:
+    """
+    Run every task concurrently and yield each (success_list, error_list) as soon as it finishes
+    """
+    futures = [
+        asyncio.create_task(handle_single_task(idx, item, tool_context))
+        for idx, item in enumerate(tasks)
+    ]
+    try:
+        for next_done in asyncio.as_completed(futures):
+            try:
+                yield await next_done
+            except Exception as e:
+                yield e
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 async def image_generate(tasks: list[dict], tool_context) -> Dict:
     """Generate images with Seedream 4.0.
 
@@ -325,21 +376,8 @@ async def image_generate(tasks: list[dict], tool_context) -> Dict:
     logger.debug(f"image_generate tasks: {tasks}")
 
     with tracer.start_as_current_span("image_generate"):
-        base_ctx = contextvars.copy_context()
-
-        def make_task(idx, item):
-            ctx = base_ctx.copy()
-            return lambda: ctx.run(handle_single_task_sync, idx, item, tool_context)
-
-        loop = asyncio.get_event_loop()
-        futures = [
-            loop.run_in_executor(executor, make_task(idx, item))
-            for idx, item in enumerate(tasks)
-        ]
-
-        results = await asyncio.gather(*futures, return_exceptions=True)
-
-        for res in results:
+        # Results are merged as each task finishes instead of after the slowest one
+        async for res in iter_image_tasks(tasks, tool_context):
             if isinstance(res, Exception):
                 logger.error(f"Task raised exception: {res}")
                 error_list.append("unknown_task_exception")
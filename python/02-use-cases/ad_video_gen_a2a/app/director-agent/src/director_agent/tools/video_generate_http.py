@@ -15,10 +15,10 @@
 import asyncio
 import json
 import os
+import random
 import traceback
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional
 import aiohttp
-import urllib.parse
 
 from google.adk.tools import ToolContext
 from opentelemetry import trace
@@ -29,12 +29,20 @@ from veadk.consts import DEFAULT_VIDEO_MODEL_API_BASE, DEFAULT_VIDEO_MODEL_NAME
 from veadk.utils.logger import get_logger
 from veadk.version import VERSION
 
+from director_agent.utils.short_link_client import short_link_client
+
 logger = get_logger(__name__)
 
 # 短链接服务配置
 shorten_url_service_url = os.getenv("SHORTEN_URL_SERVICE_URL", None)
 assert shorten_url_service_url, "SHORTEN_URL_SERVICE_URL is not set"
 
+# 视频任务引擎配置
+VIDEO_SUBMIT_CONCURRENCY = int(os.getenv("VIDEO_GENERATE_SUBMIT_CONCURRENCY", "8"))
+VIDEO_POLL_INITIAL_INTERVAL = float(os.getenv("VIDEO_GENERATE_POLL_INITIAL", "5"))
+VIDEO_POLL_MAX_INTERVAL = float(os.getenv("VIDEO_GENERATE_POLL_MAX", "30"))
+VIDEO_GENERATE_DEADLINE = float(os.getenv("VIDEO_GENERATE_DEADLINE", "1800"))
+
 
 async def resolve_short_url(short_url: str) -> str:
     """
@@ -46,44 +54,15 @@ async def resolve_short_url(short_url: str) -> str:
     Returns:
         原始URL，如果解析失败则返回短链接本身
     """
-    if not shorten_url_service_url:
-        return short_url
-
-    try:
-        # 从短链接中提取短码
-        # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
-        parsed_url = urllib.parse.urlparse(short_url)
-        path_parts = parsed_url.path.strip("/").split("/")
-
-        if len(path_parts) >= 2 and path_parts[0] == "t":
-            # 调用短链接服务的重定向接口来获取原始URL
-            async with aiohttp.ClientSession() as session:
-                # 使用GET请求获取原始URL（短链接服务直接返回原始URL字符串）
-                async with session.get(short_url) as response:
-                    if response.status == 200:
-                        # 短链接服务直接返回原始URL字符串
-                        original_url = await response.text()
-                        original_url = original_url.strip().strip('"')
-                        logger.debug(
-                            f"Successfully resolved short URL: {short_url} -> {original_url}"
-                        )
-                        return original_url
-                    else:
-                        logger.warning(
-                            f"Failed to resolve short URL: {short_url}, status: {response.status}"
-                        )
-                        return short_url
-        else:
-            logger.warning(f"Not a valid short URL format: {short_url}")
-            return short_url
-
-    except Exception as e:
-        logger.error(f"Error resolving short URL {short_url}: {e}")
-        # 如果解析失败，返回原始短链接
-        return short_url
+    return await short_link_client.resolve(short_url)
 
 
-async def generate(prompt, first_frame_image=None, last_frame_image=None):
+async def generate(
+    prompt,
+    first_frame_image=None,
+    last_frame_image=None,
+    session: Optional[aiohttp.ClientSession] = None,
+):
     """
     Generate a video using HTTP requests
     """
@@ -94,10 +73,9 @@ async def generate(prompt, first_frame_image=None, last_frame_image=None):
     model = getenv("MODEL_VIDEO_NAME", DEFAULT_VIDEO_MODEL_NAME)
 
     # 解析短链接为原始URL
-    if first_frame_image:
-        first_frame_image = await resolve_short_url(first_frame_image)
-    if last_frame_image:
-        last_frame_image = await resolve_short_url(last_frame_image)
+    first_frame_image, last_frame_image = await short_link_client.resolve_many(
+        [first_frame_image, last_frame_image]
+    )
 
     # Build the content array
     prompt_with_media = f"（可以有极其轻度的动作音，但禁止任何人声，禁止背景音乐，禁止音效，禁止旁白，禁止解说）{prompt}"
@@ -129,8 +107,29 @@ async def generate(prompt, first_frame_image=None, last_frame_image=None):
         "duration": 5,
     }
 
-    # Build headers
-    headers = {
+    # Make the POST request, reuse the caller's session when provided
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+    try:
+        async with session.post(
+            f"{base_url.rstrip('/')}/contents/generations/tasks",
+            json=request_body,
+            headers=_build_headers(api_key),
+        ) as response:
+            response.raise_for_status()
+            response_json = await response.json()
+            return response_json
+    except Exception:
+        logger.error(f"Error in generate: {traceback.format_exc()}")
+        raise
+    finally:
+        if own_session:
+            await session.close()
+
+
+def _build_headers(api_key: str) -> Dict[str, str]:
+    return {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {api_key}",
         "veadk-source": "veadk",
@@ -139,20 +138,106 @@ async def generate(prompt, first_frame_image=None, last_frame_image=None):
         "X-Client-Request-Id": getenv("MODEL_AGENT_CLIENT_REQ_ID", f"veadk/{VERSION}"),
     }
 
-    # Make the POST request
-    async with aiohttp.ClientSession() as session:
+
+async def _poll_task(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    api_key: str,
+    task_id: str,
+    video_name: str,
+    deadline: float,
+) -> Dict:
+    """
+    Poll one task with exponential backoff and jitter until it finishes or the deadline passes
+    """
+    loop = asyncio.get_running_loop()
+    interval = VIDEO_POLL_INITIAL_INTERVAL
+    url = f"{base_url.rstrip('/')}/contents/generations/tasks/{task_id}"
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError(f"task {task_id} exceeded deadline")
+        # Full jitter keeps concurrent tasks from polling in lockstep
+        await asyncio.sleep(min(remaining, interval * random.uniform(0.5, 1.0)))
         try:
-            async with session.post(
-                f"{base_url.rstrip('/')}/contents/generations/tasks",
-                json=request_body,
-                headers=headers,
-            ) as response:
+            async with session.get(url, headers=_build_headers(api_key)) as response:
                 response.raise_for_status()
-                response_json = await response.json()
-                return response_json
-        except Exception:
-            logger.error(f"Error in generate: {traceback.format_exc()}")
-            raise
+                result = await response.json()
+        except Exception as e:
+            # Keep the task and retry on the next round
+            logger.error(f"Error checking task status for {task_id}: {e}")
+        else:
+            status = result["status"]
+            if status in ("succeeded", "failed"):
+                return result
+            logger.debug(
+                f"{video_name} video_generate current status: {status}, Retrying after {interval:.0f} seconds..."
+            )
+        interval = min(interval * 2, VIDEO_POLL_MAX_INTERVAL)
+
+
+async def iter_video_tasks(
+    params: list,
+    max_in_flight: int = 32,
+    deadline: float = VIDEO_GENERATE_DEADLINE,
+) -> AsyncIterator[Dict]:
+    """
+    Submit every item concurrently over one shared session and yield each result as soon as it finishes.
+
+    Yields:
+        {"video_name": str, "status": "succeeded" | "failed", "video_url" | "error": ...}
+    """
+    api_key = getenv(
+        "MODEL_VIDEO_API_KEY", getenv("MODEL_AGENT_API_KEY", settings.model.api_key)
+    )
+    base_url = getenv("MODEL_VIDEO_API_BASE", DEFAULT_VIDEO_MODEL_API_BASE)
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+    submit_semaphore = asyncio.Semaphore(VIDEO_SUBMIT_CONCURRENCY)
+    in_flight_semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def run_one(session: aiohttp.ClientSession, item: dict) -> Dict:
+        video_name = item["video_name"]
+        async with in_flight_semaphore:
+            try:
+                async with submit_semaphore:
+                    # Create video generation task
+                    response = await generate(
+                        item["prompt"],
+                        item.get("first_frame", None),
+                        item.get("last_frame", None),
+                        session=session,
+                    )
+                task_id = response["id"]
+                logger.debug(f"Created task {task_id} for video {video_name}")
+                result = await _poll_task(
+                    session, base_url, api_key, task_id, video_name, deadline_at
+                )
+            except Exception as e:
+                logger.error(f"Error generating video {video_name}: {e}")
+                return {"video_name": video_name, "status": "failed", "error": str(e)}
+
+        if result["status"] == "succeeded":
+            return {
+                "video_name": video_name,
+                "status": "succeeded",
+                "video_url": result["content"]["video_url"],
+            }
+        return {
+            "video_name": video_name,
+            "status": "failed",
+            "error": result.get("error"),
+        }
+
+    connector = aiohttp.TCPConnector(limit=max(max_in_flight, VIDEO_SUBMIT_CONCURRENCY))
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [asyncio.create_task(run_one(session, item)) for item in params]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
 
 
 async def video_generate(
@@ -260,122 +345,50 @@ async def video_generate(
     """
     success_list = []
     error_list = []
-    api_key = getenv(
-        "MODEL_VIDEO_API_KEY", getenv("MODEL_AGENT_API_KEY", settings.model.api_key)
-    )
-    base_url = getenv("MODEL_VIDEO_API_BASE", DEFAULT_VIDEO_MODEL_API_BASE)
     model = getenv("MODEL_VIDEO_NAME", DEFAULT_VIDEO_MODEL_NAME)
 
     logger.debug(f"Using model: {model}")
     logger.debug(f"video_generate params: {params}")
 
-    for start_idx in range(0, len(params), batch_size):
-        batch = params[start_idx : start_idx + batch_size]
-        logger.debug(f"video_generate batch {start_idx // batch_size}: {batch}")
-
-        task_dict = {}  # task_id: video_name
-        tracer = trace.get_tracer("gcp.vertex.agent")
-        with tracer.start_as_current_span("call_llm") as span:
-            input_part = {"role": "user"}
-            output_part = {"message.role": "model"}
-            total_tokens = 0
-
-            for idx, item in enumerate(batch):
-                input_part[f"parts.{idx}.type"] = "text"
-                input_part[f"parts.{idx}.text"] = json.dumps(item, ensure_ascii=False)
-
-                video_name = item["video_name"]
-                prompt = item["prompt"]
-                first_frame = item.get("first_frame", None)
-                last_frame = item.get("last_frame", None)
-
-                try:
-                    # Create video generation task
-                    response = await generate(prompt, first_frame, last_frame)
-                    task_id = response["id"]
-                    task_dict[task_id] = video_name
-                    logger.debug(f"Created task {task_id} for video {video_name}")
-                except Exception as e:
-                    logger.error(f"Error creating task for {video_name}: {e}")
-                    error_list.append(video_name)
-                    continue
-
-            logger.debug("Begin querying video_generate task status...")
-
-            while True:
-                task_list = list(task_dict.keys())
-                if len(task_list) == 0:
-                    break
-
-                # Check each task status
-                async with aiohttp.ClientSession() as session:
-                    headers = {
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                        "veadk-source": "veadk",
-                        "veadk-version": VERSION,
-                        "User-Agent": f"VeADK/{VERSION}",
-                        "X-Client-Request-Id": getenv(
-                            "MODEL_AGENT_CLIENT_REQ_ID", f"veadk/{VERSION}"
-                        ),
-                    }
-
-                    for task_id in task_list:
-                        try:
-                            async with session.get(
-                                f"{base_url.rstrip('/')}/contents/generations/tasks/{task_id}",
-                                headers=headers,
-                            ) as response:
-                                response.raise_for_status()
-                                result = await response.json()
-                                status = result["status"]
-
-                                if status == "succeeded":
-                                    video_name = task_dict[task_id]
-                                    video_url = result["content"]["video_url"]
-                                    logger.debug(
-                                        f"{video_name} video_generate succeeded. Video URL: {video_url}"
-                                    )
-                                    tool_context.state[f"{video_name}_video_url"] = (
-                                        video_url
-                                    )
-
-                                    success_list.append({video_name: video_url})
-                                    task_dict.pop(task_id, None)
-
-                                elif status == "failed":
-                                    video_name = task_dict[task_id]
-                                    error_msg = result["error"]
-                                    logger.error(
-                                        f"{video_name} video_generate failed. Error: {error_msg}"
-                                    )
-                                    error_list.append(video_name)
-                                    task_dict.pop(task_id, None)
-
-                                else:
-                                    logger.debug(
-                                        f"{task_dict[task_id]} video_generate current status: {status}, Retrying after 10 seconds..."
-                                    )
-                        except Exception as e:
-                            logger.error(
-                                f"Error checking task status for {task_id}: {e}"
-                            )
-                            # Keep the task in the dict to retry later
-
-                # Wait before next polling
-                await asyncio.sleep(10)
-
-            # Add span attributes
-            add_span_attributes(
-                span,
-                tool_context,
-                input_part=input_part,
-                output_part=output_part,
-                output_tokens=total_tokens,
-                total_tokens=total_tokens,
-                request_model=model,
-                response_model=model,
-            )
+    tracer = trace.get_tracer("gcp.vertex.agent")
+    with tracer.start_as_current_span("call_llm") as span:
+        input_part = {"role": "user"}
+        output_part = {"message.role": "model"}
+        total_tokens = 0
+
+        for idx, item in enumerate(params):
+            input_part[f"parts.{idx}.type"] = "text"
+            input_part[f"parts.{idx}.text"] = json.dumps(item, ensure_ascii=False)
+
+        logger.debug("Begin submitting and querying video_generate tasks...")
+
+        # Finished clips are recorded as soon as they complete
+        async for result in iter_video_tasks(params, max_in_flight=batch_size):
+            video_name = result["video_name"]
+            if result["status"] == "succeeded":
+                video_url = result["video_url"]
+                logger.debug(
+                    f"{video_name} video_generate succeeded. Video URL: {video_url}"
+                )
+                tool_context.state[f"{video_name}_video_url"] = video_url
+                success_list.append({video_name: video_url})
+            else:
+                logger.error(
+                    f"{video_name} video_generate failed. Error: {result['error']}"
+                )
+                error_list.append(video_name)
+
+        # Add span attributes
+        add_span_attributes(
+            span,
+            tool_context,
+            input_part=input_part,
+            output_part=output_part,
+            output_tokens=total_tokens,
+            total_tokens=total_tokens,
+            request_model=model,
+            response_model=model,
+        )
 
     if len(success_list) == 0:
         logger.debug(
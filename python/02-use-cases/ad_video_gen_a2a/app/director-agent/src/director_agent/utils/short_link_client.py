@@ -0,0 +1,248 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import List, Optional
+
+import aiohttp
+from veadk.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 短链接客户端配置
+SHORT_LINK_MAX_CONNECTIONS = int(os.getenv("SHORT_LINK_MAX_CONNECTIONS", "32"))
+SHORT_LINK_TIMEOUT = float(os.getenv("SHORT_LINK_TIMEOUT", "10"))
+SHORT_LINK_RESOLVE_CACHE_SIZE = int(os.getenv("SHORT_LINK_RESOLVE_CACHE_SIZE", "4096"))
+# 短链接服务端映射有效期为 24 小时，本地缓存需短于该值
+SHORT_LINK_RESOLVE_CACHE_TTL = float(
+    os.getenv("SHORT_LINK_RESOLVE_CACHE_TTL", str(23 * 3600))
+)
+
+
+def is_short_url(url: str) -> bool:
+    """
+    判断是否为短链接
+    短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
+    """
+    path_parts = urllib.parse.urlparse(url).path.strip("/").split("/")
+    return len(path_parts) >= 2 and path_parts[0] == "t"
+
+
+class ShortLinkClient:
+    """
+    短链接服务的共享异步客户端
+
+    进程内复用同一个 keep-alive 连接池，批量接口一次往返完成多条短链接的生成与还原，
+    并缓存 短链接 -> 原始URL 的映射，避免重复解析。
+    """
+
+    def __init__(
+        self,
+        service_url: Optional[str] = None,
+        max_connections: int = SHORT_LINK_MAX_CONNECTIONS,
+        timeout: float = SHORT_LINK_TIMEOUT,
+        cache_size: int = SHORT_LINK_RESOLVE_CACHE_SIZE,
+        cache_ttl: float = SHORT_LINK_RESOLVE_CACHE_TTL,
+    ):
+        self.service_url = service_url or os.getenv("SHORTEN_URL_SERVICE_URL")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # short_url -> (original_url, expires_at)
+        self._cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # 会话与事件循环绑定，循环切换后需要重建
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def _cache_get(self, short_url: str) -> Optional[str]:
+        entry = self._cache.get(short_url)
+        if entry is None:
+            return None
+        original_url, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._cache[short_url]
+            return None
+        self._cache.move_to_end(short_url)
+        return original_url
+
+    def _cache_put(self, short_url: str, original_url: str):
+        self._cache[short_url] = (original_url, time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(short_url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def shorten_many(
+        self, urls: List[str], resource_type: Optional[str] = "resource"
+    ) -> List[str]:
+        """
+        批量生成短链接，失败时原样返回原始URL
+        """
+        if not urls or not self.service_url:
+            return list(urls)
+
+        session = self._get_session()
+        data = {"urls": list(urls), "type": resource_type}
+        try:
+            async with session.post(
+                f"{self.service_url}/shorten/batch", json=data
+            ) as response:
+                if response.status == 404:
+                    # 旧版短链接服务没有批量接口，回退为并发的单条请求
+                    return list(
+                        await asyncio.gather(
+                            *(self.shorten(url, resource_type) for url in urls)
+                        )
+                    )
+                if response.status != 200:
+                    logger.error(f"Failed to shorten URLs: {response.status}")
+                    return list(urls)
+                results = (await response.json())["results"]
+        except Exception as e:
+            logger.error(f"Error shortening URLs: {e}")
+            return list(urls)
+
+        short_urls = []
+        for url, result in zip(urls, results):
+            short_url = result.get("short_url") or url
+            if short_url != url:
+                self._cache_put(short_url, url)
+            short_urls.append(short_url)
+        return short_urls
+
+    async def shorten(self, url: str, resource_type: Optional[str] = "resource") -> str:
+        """
+        生成单条短链接，失败时原样返回原始URL
+        """
+        if not self.service_url:
+            return url
+
+        session = self._get_session()
+        data = {"url": url, "type": resource_type}
+        try:
+            async with session.post(
+                f"{self.service_url}/shorten", json=data
+            ) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to shorten URL: {response.status}")
+                    return url
+                short_url = (await response.json()).get("short_url") or url
+        except Exception as e:
+            logger.error(f"Error shortening URL: {e}")
+            return url
+
+        if short_url != url:
+            self._cache_put(short_url, url)
+        return short_url
+
+    async def _resolve_one(self, short_url: str) -> str:
+        # 短链接服务的重定向接口直接返回原始URL字符串
+        session = self._get_session()
+        async with session.get(short_url, allow_redirects=False) as response:
+            if response.status in (301, 302, 303, 307, 308):
+                return response.headers.get("Location", short_url)
+            if response.status == 200:
+                return (await response.text()).strip().strip('"')
+            logger.warning(
+                f"Failed to resolve short URL: {short_url}, status: {response.status}"
+            )
+            return short_url
+
+    async def resolve_many(self, short_urls: List[str]) -> List[str]:
+        """
+        批量将短链接还原为原始URL，非短链接或解析失败的条目原样返回
+        """
+        resolved = {}
+        pending = []
+        for url in short_urls:
+            if url in resolved:
+                continue
+            if not url or not self.service_url or not is_short_url(url):
+                resolved[url] = url
+                continue
+            cached = self._cache_get(url)
+            if cached is not None:
+                self.hits += 1
+                resolved[url] = cached
+            else:
+                self.misses += 1
+                resolved[url] = url
+                pending.append(url)
+
+        if pending:
+            try:
+                originals = await self._resolve_batch(pending)
+            except Exception as e:
+                logger.error(f"Error resolving short URLs: {e}")
+                originals = pending
+            for short_url, original_url in zip(pending, originals):
+                if original_url and original_url != short_url:
+                    self._cache_put(short_url, original_url)
+                    resolved[short_url] = original_url
+
+        return [resolved[url] for url in short_urls]
+
+    async def _resolve_batch(self, short_urls: List[str]) -> List[Optional[str]]:
+        session = self._get_session()
+        async with session.post(
+            f"{self.service_url}/resolve/batch", json={"short_codes": short_urls}
+        ) as response:
+            if response.status == 404:
+                # 旧版短链接服务没有批量接口，回退为并发的单条请求
+                return list(
+                    await asyncio.gather(*(self._resolve_one(u) for u in short_urls))
+                )
+            if response.status != 200:
+                logger.warning(f"Failed to resolve short URLs: {response.status}")
+                return short_urls
+            return (await response.json())["results"]
+
+    async def resolve(self, short_url: str) -> str:
+        """
+        将短链接还原为原始URL，如果解析失败则返回短链接本身
+        """
+        return (await self.resolve_many([short_url]))[0]
+
+
+short_link_client = ShortLinkClient()
@@ -13,12 +13,15 @@
 # limitations under the License.
 
 import asyncio
+import hashlib
 import json
 import os
-from typing import Any
-import aiohttp
-import urllib.parse
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Optional
 
+import openai
 from openai import AsyncOpenAI
 from veadk.utils.logger import get_logger
 from evaluate_agent.utils.types import (
@@ -27,11 +30,177 @@ from evaluate_agent.utils.types import (
     ScoredVideoList,
 )
 from evaluate_agent.prompt import PROMPT_EVALUATE_ITEM_AGENT
+from evaluate_agent.utils.short_link_client import short_link_client
 
 # evaluate_agent_instruction = os.getenv("PROMPT_EVALUATE_ITEM_AGENT")
 evaluate_agent_instruction = PROMPT_EVALUATE_ITEM_AGENT
 logger = get_logger(__name__)
 
+# 评估并发、重试与缓存配置
+GEVAL_CONCURRENCY = int(os.getenv("GEVAL_CONCURRENCY", "8"))
+GEVAL_MAX_RETRIES = int(os.getenv("GEVAL_MAX_RETRIES", "4"))
+GEVAL_RETRY_BASE_DELAY = float(os.getenv("GEVAL_RETRY_BASE_DELAY", "1"))
+GEVAL_CACHE_SIZE = int(os.getenv("GEVAL_CACHE_SIZE", "1024"))
+GEVAL_CACHE_TTL = float(os.getenv("GEVAL_CACHE_TTL", str(24 * 3600)))
+
+# 限流与临时性错误，退避后重试
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class EvaluationCache:
+    """
+    评估结果缓存（LRU + TTL），键为 (媒体类型, 媒体URL, 参考图集合, 评估提示词哈希, 模型)
+    """
+
+    def __init__(
+        self, max_entries: int = GEVAL_CACHE_SIZE, ttl: float = GEVAL_CACHE_TTL
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+    @staticmethod
+    def key(media_type: str, media_url: str, references: list[str], model: str) -> str:
+        prompt_hash = hashlib.sha256(evaluate_agent_instruction.encode("utf-8"))
+        payload = json.dumps(
+            [media_type, media_url, sorted(references), prompt_hash.hexdigest(), model],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self._entries.move_to_end(key)
+            return entry[0]
+        self._entries.pop(key, None)
+        return None
+
+    def put(self, key: str, value: dict):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+evaluation_cache = EvaluationCache()
+
+# 累计指标：调用次数、缓存命中、重试、失败、耗时与 token 用量
+geval_metrics = {
+    "calls": 0,
+    "cache_hits": 0,
+    "retries": 0,
+    "failures": 0,
+    "latency_seconds": 0.0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+}
+
+_clients: dict[tuple[str, str], AsyncOpenAI] = {}
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # 全局限制并发，重试中的请求同样占用并发名额
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(GEVAL_CONCURRENCY)
+        _semaphore_loop = loop
+    return _semaphore
+
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after:
+            return float(retry_after)
+    except ValueError:
+        pass
+    # 指数退避 + 抖动
+    return GEVAL_RETRY_BASE_DELAY * (2**attempt) * random.uniform(0.5, 1.0)
+
+
+async def _create_evaluation(client: AsyncOpenAI, model: str, msg: dict) -> dict:
+    async with _get_semaphore():
+        for attempt in range(GEVAL_MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                response = await client.responses.create(
+                    model=model,
+                    instructions=evaluate_agent_instruction,
+                    input=[msg],
+                    text={
+                        "format": {
+                            "type": "json_schema",
+                            "name": "EvaluationList",
+                            "schema": EvaluationList.model_json_schema(),
+                            "strict": True,
+                        }
+                    },
+                    extra_body={"thinking": {"type": "disabled"}},
+                )
+            except _RETRYABLE_ERRORS as e:
+                if attempt == GEVAL_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(attempt, e)
+                geval_metrics["retries"] += 1
+                logger.warning(
+                    f"Evaluate call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            latency = time.perf_counter() - start
+            usage = getattr(response, "usage", None)
+            input_tokens = getattr(usage, "input_tokens", 0) or 0
+            output_tokens = getattr(usage, "output_tokens", 0) or 0
+            geval_metrics["calls"] += 1
+            geval_metrics["latency_seconds"] += latency
+            geval_metrics["input_tokens"] += input_tokens
+            geval_metrics["output_tokens"] += output_tokens
+            logger.debug(
+                f"Evaluate call finished: latency={latency:.2f}s, input_tokens={input_tokens}, output_tokens={output_tokens}"
+            )
+            return json.loads(response.output_text).get("evaluation", {})
+
+
+async def _evaluate_with_cache(
+    client: AsyncOpenAI, model: str, msg: dict, cache_key: str
+) -> Optional[dict]:
+    cached = evaluation_cache.get(cache_key)
+    if cached is not None:
+        geval_metrics["cache_hits"] += 1
+        return dict(cached)
+    try:
+        evaluation = await _create_evaluation(client, model, msg)
+    except Exception as e:
+        geval_metrics["failures"] += 1
+        logger.error(f"Evaluate call failed: {e}")
+        return None
+    evaluation_cache.put(cache_key, evaluation)
+    return dict(evaluation)
+
+
+def _get_client() -> AsyncOpenAI:
+    """按 (base_url, api_key) 复用 AsyncOpenAI 客户端，重试由调用方控制"""
+    base_url = os.getenv("MODEL_AGENT_API_BASE")
+    api_key = os.getenv("MODEL_AGENT_API_KEY")
+    client = _clients.get((base_url, api_key))
+    if client is None:
+        client = _clients[(base_url, api_key)] = AsyncOpenAI(
+            base_url=base_url, api_key=api_key, max_retries=0
+        )
+    return client
+
+
 # 短链接服务配置
 shorten_url_service_url = os.getenv("SHORTEN_URL_SERVICE_URL", None)
 assert shorten_url_service_url, "SHORTEN_URL_SERVICE_URL is not set"
@@ -47,46 +216,15 @@ async def resolve_short_url(short_url: str) -> str:
     Returns:
         原始URL，如果解析失败则返回短链接本身
     """
-    if not shorten_url_service_url:
-        return short_url
-
-    try:
-        # 从短链接中提取短码
-        # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
-        parsed_url = urllib.parse.urlparse(short_url)
-        path_parts = parsed_url.path.strip("/").split("/")
-
-        if len(path_parts) >= 2 and path_parts[0] == "t":
-            # 调用短链接服务的重定向接口来获取原始URL
-            async with aiohttp.ClientSession() as session:
-                # 使用GET请求获取原始URL（短链接服务直接返回原始URL字符串）
-                async with session.get(short_url) as response:
-                    if response.status == 200:
-                        # 短链接服务直接返回原始URL字符串
-                        original_url = await response.text()
-                        original_url = original_url.strip().strip('"')
-                        logger.debug(
-                            f"Successfully resolved short URL: {short_url} -> {original_url}"
-                        )
-                        return original_url
-                    else:
-                        logger.warning(
-                            f"Failed to resolve short URL: {short_url}, status: {response.status}"
-                        )
-                        return short_url
-        else:
-            logger.warning(f"Not a valid short URL format: {short_url}")
-            return short_url
-
-    except Exception as e:
-        logger.error(f"Error resolving short URL {short_url}: {e}")
-        # 如果解析失败，返回原始短链接
-        return short_url
+    return await short_link_client.resolve(short_url)
 
 
-async def repair_evaluate_input(
+async def _build_evaluation_requests(
     media_list: list[dict[str, Any]], media_type: str = "image"
-) -> list[list[dict[str, Any]]]:
+) -> list[tuple[dict[str, Any], str, int, str, list[str]]]:
+    """
+    构造评估请求，返回 (消息, shot_id, media_id, 媒体URL, 参考图URL列表) 列表
+    """
     if media_type == "image":
         MEDIA_URL_FIELD = "image_url"
         MEDIA_TYPE_FIELD = "input_image"
@@ -95,6 +233,21 @@ async def repair_evaluate_input(
         MEDIA_URL_FIELD = "video_url"
         MEDIA_TYPE_FIELD = "input_video"
         MEDIA = "视频"
+
+    # 一次批量还原全部媒体与参考图的短链接
+    all_urls = []
+    for shot in media_list:
+        reference_media_list = shot.get("reference", [])
+        if isinstance(reference_media_list, str):
+            reference_media_list = [reference_media_list]
+        all_urls.extend(ref for ref in reference_media_list if ref.strip())
+        all_urls.extend(media["url"] for media in shot.get("media", []))
+    resolved_urls = {}
+    if shorten_url_service_url:
+        resolved_urls = dict(
+            zip(all_urls, await short_link_client.resolve_many(all_urls))
+        )
+
     result = []
     for shot in media_list:
         # 这是一组shot
@@ -109,10 +262,7 @@ async def repair_evaluate_input(
             if len(reference_media.strip()) == 0:
                 continue
 
-            # 如果启用了短链接服务，尝试解析reference图片URL
-            resolved_reference_url = reference_media
-            if shorten_url_service_url:
-                resolved_reference_url = await resolve_short_url(reference_media)
+            resolved_reference_url = resolved_urls.get(reference_media, reference_media)
 
             reference_part = {
                 "type": "input_image",
@@ -121,10 +271,7 @@ async def repair_evaluate_input(
             reference_part_list.append(reference_part)
 
         for i, media_url in enumerate(media_url_list):
-            # 如果启用了短链接服务，尝试解析media URL
-            resolved_media_url = media_url
-            if shorten_url_service_url:
-                resolved_media_url = await resolve_short_url(media_url)
+            resolved_media_url = resolved_urls.get(media_url, media_url)
 
             text_part = {
                 "type": "input_text",
@@ -140,11 +287,26 @@ async def repair_evaluate_input(
             media_part = {"type": MEDIA_TYPE_FIELD, MEDIA_URL_FIELD: resolved_media_url}
             user_prompt["content"] = [text_part] + [media_part] + reference_part_list
 
-            result.append(user_prompt)
+            result.append(
+                (
+                    user_prompt,
+                    shot_id,
+                    i,
+                    resolved_media_url,
+                    [part["image_url"] for part in reference_part_list],
+                )
+            )
 
     return result
 
 
+async def repair_evaluate_input(
+    media_list: list[dict[str, Any]], media_type: str = "image"
+) -> list[list[dict[str, Any]]]:
+    requests = await _build_evaluation_requests(media_list, media_type=media_type)
+    return [request[0] for request in requests]
+
+
 async def evaluate_media(
     media_list: list[dict[str, Any]], media_type: str = "image"
 ) -> dict:
@@ -196,35 +358,34 @@ async def evaluate_media(
     """
     # 接下来是根据shot id聚合在一起
     logger.debug(f"Start to evaluate {media_type} list: items={len(media_list)}")
-    m_content = await repair_evaluate_input(media_list, media_type=media_type)
-    logger.debug(f"Repaired {media_type} list: messages={len(m_content)}")
-    # 创建异步OpenAI客户端
-    client = AsyncOpenAI(
-        base_url=os.getenv("MODEL_AGENT_API_BASE"),
-        api_key=os.getenv("MODEL_AGENT_API_KEY"),
-    )
-
-    # 定义异步处理单个消息的函数
-    async def process_message(msg):
-        response = await client.responses.create(
-            model=os.getenv("MODEL_EVALUATE_ITEM", "doubao-seed-1-6-flash-250828"),
-            instructions=evaluate_agent_instruction,
-            input=[msg],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "EvaluationList",
-                    "schema": EvaluationList.model_json_schema(),
-                    "strict": True,
-                }
-            },
-            extra_body={"thinking": {"type": "disabled"}},
-        )
-        return json.loads(response.output_text).get("evaluation", {})
-
-    # 使用 asyncio.gather 并发处理所有消息
-    result = await asyncio.gather(*(process_message(msg) for msg in m_content))
+    requests = await _build_evaluation_requests(media_list, media_type=media_type)
+    logger.debug(f"Repaired {media_type} list: messages={len(requests)}")
+    client = _get_client()
+    model = os.getenv("MODEL_EVALUATE_ITEM", "doubao-seed-1-6-flash-250828")
+
+    # 相同的媒体与参考图只评估一次，并在并发上限内执行
+    tasks = {}
+    keys = []
+    for msg, _, _, media_url, references in requests:
+        key = EvaluationCache.key(media_type, media_url, references, model)
+        if key not in tasks:
+            tasks[key] = _evaluate_with_cache(client, model, msg, key)
+        keys.append(key)
+    evaluations = dict(zip(tasks, await asyncio.gather(*tasks.values())))
 
+    result = []
+    failed = 0
+    for (_, shot_id, media_id, _, _), key in zip(requests, keys):
+        evaluation = evaluations[key]
+        if evaluation is None:
+            failed += 1
+            continue
+        # 以输入为准填充编号，缓存结果可跨 shot 复用
+        result.append({**evaluation, "shot_id": shot_id, "media_id": media_id})
+
+    logger.info(
+        f"Evaluated {len(requests)} {media_type}(s): unique={len(tasks)}, failed={failed}, metrics={geval_metrics}"
+    )
     logger.debug(f"Finish to evaluate {media_type} list: result_items={len(result)}")
     # 后处理：按shot_id合并结果，并确保media_id顺序
     merged_result = {}
@@ -302,7 +463,12 @@ async def evaluate_media(
 
         output = {
             "scored_image_list": scored_image_list,
-            "status": {"success": True, "message": ""},
+            "status": {
+                "success": failed == 0,
+                "message": f"{failed} {media_type}(s) failed to evaluate, please retry"
+                if failed
+                else "",
+            },
         }
         try:
             model = ScoredImageList.model_validate(output)
@@ -343,7 +509,12 @@ async def evaluate_media(
 
         output = {
             "scored_video_list": scored_video_list,
-            "status": {"success": True, "message": ""},
+            "status": {
+                "success": failed == 0,
+                "message": f"{failed} {media_type}(s) failed to evaluate, please retry"
+                if failed
+                else "",
+            },
         }
         try:
             model = ScoredVideoList.model_validate(output)
@@ -12,13 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import requests
+import argparse
+import asyncio
 import json
 import traceback
 import logging
 import time
 import os
 
+import aiohttp
+
 test_dict = {
     "local": "http://localhost:8004/{}",  # 0: do not use
 }
@@ -26,21 +29,28 @@ test_dict = {
 # 全局变量，用于存储 URL 模板
 url_template = test_dict["local"]
 
+logger = logging.getLogger(__name__)
+
 
 def save_result(result, filename):
-    with open(filename, "w", encoding="utf-8") as f:
+    # 先写临时文件再原子替换，避免中断时留下半个 checkpoint
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w", encoding="utf-8") as f:
         json.dump(result, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_filename, filename)
 
 
-def create_session(app_name, user_id):
-    url = url_template.format(f"apps/{app_name}/users/{user_id}/sessions")
+def load_result(filename):
+    with open(filename, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    payload = {}
-    headers = {}
 
-    response = requests.request("POST", url, headers=headers, data=payload)
+async def create_session(http, app_name, user_id):
+    url = url_template.format(f"apps/{app_name}/users/{user_id}/sessions")
 
-    session_id = json.loads(response.text)["id"]
+    async with http.post(url) as response:
+        response.raise_for_status()
+        session_id = json.loads(await response.text())["id"]
     logger.info(f"main output: session_id: {session_id}")
     return session_id
 
@@ -88,221 +98,240 @@ def pick_best_video(evaluate_video_result):
     return best_video_list
 
 
-def run_sse(app_name, user_id, session_id, text):
+async def run_sse(http, app_name, user_id, session_id, text):
     url = url_template.format("run_sse")
-    # logger.info(f"main output: run_sse url: {url}")
-    payload = json.dumps(
-        {
-            "app_name": app_name,
-            "user_id": user_id,
-            "session_id": session_id,
-            "new_message": {"role": "user", "parts": [{"text": text}]},
-        }
+    payload = {
+        "app_name": app_name,
+        "user_id": user_id,
+        "session_id": session_id,
+        "new_message": {"role": "user", "parts": [{"text": text}]},
+    }
+
+    # ❶ 流式读取 SSE，逐行解析，不再缓存完整响应体
+    last_event = None
+    event_count = 0
+    buffer = b""
+    async with http.post(url, json=payload) as response:
+        response.raise_for_status()  # 如果返回 4xx / 5xx，会抛出异常
+        # 手动按行切分，单个 data: 块可能超过 aiohttp 的行长度上限
+        async for chunk in response.content.iter_any():
+            buffer += chunk
+            *raw_lines, buffer = buffer.split(b"\n")
+            for raw_line in raw_lines:
+                line = raw_line.decode("utf-8", errors="ignore").strip()
+                if not line.startswith("data: "):
+                    continue
+                try:
+                    event = json.loads(line[6:])  # 去掉 'data: ' 前缀
+                except json.JSONDecodeError:
+                    logger.warning(f"无法解析的 data: 块: {line[:200]}")
+                    continue
+                event_count += 1
+                # ❷ 只保留最后一个 event（最终结果）
+                last_event = event
+                logger.debug(f"收到第 {event_count} 个 event")
+
+    if last_event is None:
+        logger.warning("未找到任何 data: 块")
+        return None
+
+    logger.info(
+        f"最后一个 event: {json.dumps(last_event, ensure_ascii=False, indent=2)}"
     )
-    headers = {"Content-Type": "application/json"}
 
-    try:
-        # ❶ 去掉 stream=True，直接等完整响应
-        response = requests.post(url, headers=headers, data=payload, timeout=6000)
-        response.raise_for_status()  # 如果返回 4xx / 5xx，会抛出异常
-        logger.info(f"原始响应: {response.text[:500]}...")  # 打印前500字符防止太长
+    # ❸ 提取最终内容（如果结构固定）
+    return last_event["content"]["parts"][0]["text"]
 
-        # ❷ 按行解析最后一个 data: 块（因为服务器仍返回 SSE 格式）
-        data_lines = [
-            line for line in response.text.splitlines() if line.startswith("data: ")
-        ]
-        if not data_lines:
-            logger.warning("未找到任何 data: 块")
-            return None
-
-        last_data = data_lines[-1][6:]  # 去掉 'data: ' 前缀
-        event = json.loads(last_data)
-        logger.info(
-            f"最后一个 event: {json.dumps(event, ensure_ascii=False, indent=2)}"
-        )
 
-        # ❸ 提取最终内容（如果结构固定）
-        return event["content"]["parts"][0]["text"]
+async def run_stage(tmp_json_dir, filename, label, produce):
+    """
+    执行一个阶段：如果 checkpoint 已存在则直接加载（断点续跑），否则执行并保存
+    """
+    checkpoint = os.path.join(tmp_json_dir, filename)
+    if os.path.exists(checkpoint):
+        logger.info(f"main output: {label} 已完成，从 {checkpoint} 恢复")
+        return load_result(checkpoint)
 
-    except requests.exceptions.Timeout:
-        logger.error("请求超时（超过6000秒）")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"请求失败: {e}")
-    except (KeyError, json.JSONDecodeError) as e:
-        logger.error(f"解析响应失败: {e}")
+    logger.info(f"main output: {label}...")
+    result = await produce()
+    logger.info(f"main output: {label}: {result}")
+    save_result(result, checkpoint)
+    return result
 
-    return None
 
+async def main(http, user_need, tmp_json_dir):
+    async def remote(session_id, text):
+        result = await run_sse(http, "demo_app", "user", session_id, text)
+        if result is None:
+            raise RuntimeError("run_sse returned no result")
+        return json.loads(result)
 
-def main(user_need):
-    # step 0: create session
-    try:
-        logger.info("main output: 0. 创建 session...")
-        session_id = create_session("demo_app", "user")
-        save_result(session_id, tmp_json_dir + "0_session_id.json")
-    except Exception as e:
-        logger.info(f"main output: 0. create session failed: {e}")
-        traceback.print_exc()
-        return
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False)
 
-    # step 1: generate video config
     try:
-        logger.info("main output: 1. 生成视频配置...")
-        generate_video_config_input = user_need + "\n生成视频配置"
-        video_config = run_sse(
-            "demo_app", "user", session_id, generate_video_config_input
+        # step 0: create session
+        # 不做 checkpoint：服务端会话保存在内存中，重启后旧会话已不存在；
+        # 各阶段都显式传入上一阶段的结果，断点续跑时新建会话即可
+        logger.info("main output: 0. 创建 session...")
+        session_id = await create_session(http, "demo_app", "user")
+
+        # step 1: generate video config
+        video_config = await run_stage(
+            tmp_json_dir,
+            "1_video_config.json",
+            "1. 生成视频配置",
+            lambda: remote(session_id, user_need + "\n生成视频配置"),
         )
-        logger.info(f"main output: 1. video_config: {video_config}")
-        save_result(json.loads(video_config), tmp_json_dir + "1_video_config.json")
-    except Exception as e:
-        logger.info(f"main output: 1. run sse failed: {e}")
-        traceback.print_exc()
-        return
-
-    # step 1.1: parse video_type
-    try:
-        logger.info("main output: 1.1 解析video_type...")
-        logger.info(f"main output: 1.1 video_config: {video_config}")
-        video_type = json.loads(video_config)["video_type"]
-    except Exception as e:
-        logger.info(f"main output: 1.1 get video_type failed: {e}")
-        traceback.print_exc()
-        return
 
-    # step 2: generate shot list
-    try:
-        logger.info("main output: 2. 生成分镜脚本...")
-        generate_shot_list_input = (
-            "请根据如下video_config，生成分镜脚本\n\n" + video_config
+        # step 1.1: parse video_type
+        video_type = video_config["video_type"]
+
+        # step 2: generate shot list
+        shot_list = await run_stage(
+            tmp_json_dir,
+            "2_shot_list.json",
+            "2. 生成分镜脚本",
+            lambda: remote(
+                session_id,
+                "请根据如下video_config，生成分镜脚本\n\n" + dumps(video_config),
+            ),
         )
-        shot_list = run_sse("demo_app", "user", session_id, generate_shot_list_input)
-        logger.info(f"main output: 2. shot_list: {shot_list}")
-        save_result(json.loads(shot_list), tmp_json_dir + "2_shot_list.json")
-    except Exception as e:
-        logger.info(f"main output: 2. run sse failed: {e}")
-        traceback.print_exc()
-        return
 
-    # step 3: generate image list
-    try:
-        logger.info("main output: 3. 生成分镜图片...")
-        generate_image_list_input = "请根据如下shot_list，生成分镜图片\n\n" + shot_list
-        image_list = run_sse("demo_app", "user", session_id, generate_image_list_input)
-        logger.info(f"main output: 3. image_list: {image_list}")
-        save_result(json.loads(image_list), tmp_json_dir + "3_image_list.json")
-    except Exception as e:
-        logger.info(f"main output: 3. run sse failed: {e}")
-        traceback.print_exc()
-        return
-
-    # step 4: evaluate image list
-    try:
-        logger.info("main output: 4. 评估分镜图片...")
-        evaluate_image_list_input = (
-            "请根据如下分镜图片列表image_list，评估分镜图片的质量\n\n" + image_list
+        # step 3: generate image list
+        image_list = await run_stage(
+            tmp_json_dir,
+            "3_image_list.json",
+            "3. 生成分镜图片",
+            lambda: remote(
+                session_id, "请根据如下shot_list，生成分镜图片\n\n" + dumps(shot_list)
+            ),
         )
-        evaluate_image_result = run_sse(
-            "demo_app", "user", session_id, evaluate_image_list_input
+
+        # step 4: evaluate image list
+        evaluate_image_result = await run_stage(
+            tmp_json_dir,
+            "4_evaluate_image_list.json",
+            "4. 评估分镜图片",
+            lambda: remote(
+                session_id,
+                "请根据如下分镜图片列表image_list，评估分镜图片的质量\n\n"
+                + dumps(image_list),
+            ),
         )
-        logger.info(f"main output: 4. evaluate_image_result: {evaluate_image_result}")
+
+        # step 4.1: pick best image
+        best_image_list = pick_best_image(evaluate_image_result)
         save_result(
-            json.loads(evaluate_image_result),
-            tmp_json_dir + "4_evaluate_image_list.json",
+            best_image_list,
+            os.path.join(tmp_json_dir, "4_1_selected_image_list.json"),
         )
-    except Exception as e:
-        logger.info(f"main output: 4. run sse failed: {e}")
-        traceback.print_exc()
-        return
-
-    # step 4.1: pick best image
-    try:
-        logger.info("main output: 4.1 选择最佳分镜图片...")
-        best_image_list = pick_best_image(json.loads(evaluate_image_result))
-        save_result(best_image_list, tmp_json_dir + "4_1_selected_image_list.json")
         logger.info(f"main output: 4.1 best_image_list: {best_image_list}")
-    except Exception as e:
-        logger.info(f"main output: 4.1 pick best image failed: {e}")
-        traceback.print_exc()
-        return
 
-    # step 5: generate video list
-    try:
-        logger.info("main output: 5. 生成分镜视频...")
-        generate_video_list_input = (
-            "请根据如下image_list，生成分镜视频、每个shot生成4个视频\n\n"
-            + str(best_image_list)
+        # step 5: generate video list
+        video_list = await run_stage(
+            tmp_json_dir,
+            "5_video_list.json",
+            "5. 生成分镜视频",
+            lambda: remote(
+                session_id,
+                "请根据如下image_list，生成分镜视频、每个shot生成4个视频\n\n"
+                + str(best_image_list),
+            ),
         )
-        video_list = run_sse("demo_app", "user", session_id, generate_video_list_input)
-        logger.info(f"main output: 5. video_list: {video_list}")
-        save_result(json.loads(video_list), tmp_json_dir + "5_video_list.json")
-    except Exception as e:
-        logger.info(f"main output: 5. run sse failed: {e}")
-        traceback.print_exc()
-        return
 
-    # step 6: evaluate video list
-    try:
-        logger.info("main output: 6. 评估分镜视频...")
-        evaluate_video_list_input = (
-            "请根据如下分镜视频列表video_list，评估分镜视频的质量\n\n" + str(video_list)
-        )
-        logger.info(
-            f"main output: 6. evaluate_video_list_input: {evaluate_video_list_input}"
+        # step 6: evaluate video list
+        evaluate_video_result = await run_stage(
+            tmp_json_dir,
+            "6_evaluate_video_list.json",
+            "6. 评估分镜视频",
+            lambda: remote(
+                session_id,
+                "请根据如下分镜视频列表video_list，评估分镜视频的质量\n\n"
+                + dumps(video_list),
+            ),
         )
-        evaluate_video_result = run_sse(
-            "demo_app", "user", session_id, evaluate_video_list_input
-        )
-        logger.info(f"main output: 6. evaluate_video_result: {evaluate_video_result}")
+
+        # step 6.1: pick best video
+        best_video_list = pick_best_video(evaluate_video_result)
         save_result(
-            json.loads(evaluate_video_result),
-            tmp_json_dir + "6_evaluate_video_list.json",
+            best_video_list,
+            os.path.join(tmp_json_dir, "6_1_selected_video_list.json"),
         )
-    except Exception as e:
-        logger.info(f"main output: 6. run sse failed: {e}")
-        traceback.print_exc()
-        return
-
-    # step 6.1: pick best video
-    try:
-        logger.info("main output: 6.1 选择最佳分镜视频...")
-        best_video_list = pick_best_video(json.loads(evaluate_video_result))
-        save_result(best_video_list, tmp_json_dir + "6_1_selected_video_list.json")
         logger.info(f"main output: 6.1 best_video_list: {best_video_list}")
+
+        # step 7: generate final video
+        async def generate_final_video():
+            final_video = await run_sse(
+                http,
+                "demo_app",
+                "user",
+                session_id,
+                f"进行{video_type}视频的合成\n\n" + str(best_video_list),
+            )
+            if final_video is None:
+                raise RuntimeError("run_sse returned no result")
+            return final_video
+
+        return await run_stage(
+            tmp_json_dir,
+            "7_final_video.json",
+            "7. 生成最终视频",
+            generate_final_video,
+        )
     except Exception as e:
-        logger.info(f"main output: 6.1 pick best video failed: {e}")
+        # 已完成阶段的 checkpoint 保留，重新运行时从失败阶段继续
+        logger.info(f"main output: pipeline failed in {tmp_json_dir}: {e}")
         traceback.print_exc()
-        return
+        return None
 
-    # step 7: generate final video
-    try:
-        logger.info("main output: 7. 生成最终视频...")
-        generate_final_video_input = f"进行{video_type}视频的合成\n\n" + str(
-            best_video_list
-        )
 
-        logger.info(f"main output: 7. session_id: {session_id}")
-        logger.info(
-            f"main output: 7. generate_final_video_input: {generate_final_video_input}"
-        )
+async def run_briefs(user_needs, base_dir, workers):
+    """
+    使用 workers 个并发 worker 运行多个产品需求，每个需求有独立的 checkpoint 目录
+    """
+    queue = asyncio.Queue()
+    for idx, user_need in enumerate(user_needs):
+        queue.put_nowait((idx, user_need))
+    results = [None] * len(user_needs)
 
-        final_video = run_sse(
-            "demo_app", "user", session_id, generate_final_video_input
-        )
-        logger.info(f"main output: 7. final_video: {final_video}")
-        save_result(final_video, tmp_json_dir + "7_final_video.json")
-    except Exception as e:
-        logger.info(f"main output: 7. run sse failed: {e}")
-        traceback.print_exc()
-        return
+    timeout = aiohttp.ClientTimeout(total=6000)
+    async with aiohttp.ClientSession(timeout=timeout) as http:
+
+        async def worker():
+            while True:
+                try:
+                    idx, user_need = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                tmp_json_dir = os.path.join(base_dir, f"brief_{idx}")
+                os.makedirs(tmp_json_dir, exist_ok=True)
+                results[idx] = await main(http, user_need, tmp_json_dir)
+
+        await asyncio.gather(*[worker() for _ in range(max(1, workers))])
+    return results
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--briefs", help="JSON 文件，内容为产品需求字符串列表；不指定时使用内置示例"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="并发运行的需求数")
+    parser.add_argument(
+        "--resume", help="已有的 tmp-json 运行目录，从上次完成的阶段继续"
+    )
+    args = parser.parse_args()
+
     # 设置默认运行模式为 local
     t_type = "local"
 
     # 创建临时目录
-    time_start = t_type + "-" + str(time.time())
-    tmp_json_dir = "tmp-json/" + str(time_start) + "/"
+    if args.resume:
+        tmp_json_dir = args.resume.rstrip("/") + "/"
+    else:
+        time_start = t_type + "-" + str(time.time())
+        tmp_json_dir = "tmp-json/" + str(time_start) + "/"
     os.makedirs(tmp_json_dir, exist_ok=True)
 
     # 设置日志
@@ -320,10 +349,16 @@ if __name__ == "__main__":
             logging.StreamHandler(),  # 输出到控制台
         ],
     )
-    logger = logging.getLogger(__name__)
 
-    user_need = "帮我生成杨梅饮料的宣传视频（商品展示视频），图片素材为：https://ark-tutorial.tos-cn-beijing.volces.com/multimedia/%E6%9D%A8%E6%A2%85%E9%A5%AE%E6%96%99.jpg"
-    logger.info(f"!!!! main output: test_type:{t_type}, url_template: {url_template}")
+    if args.briefs:
+        user_needs = load_result(args.briefs)
+    else:
+        user_needs = [
+            "帮我生成杨梅饮料的宣传视频（商品展示视频），图片素材为：https://ark-tutorial.tos-cn-beijing.volces.com/multimedia/%E6%9D%A8%E6%A2%85%E9%A5%AE%E6%96%99.jpg"
+        ]
+    logger.info(
+        f"!!!! main output: test_type:{t_type}, url_template: {url_template}, briefs: {len(user_needs)}, workers: {args.workers}"
+    )
 
     # 调用主函数
-    main(user_need)
+    asyncio.run(run_briefs(user_needs, tmp_json_dir, args.workers))
@@ -13,16 +13,49 @@
 # limitations under the License.
 
 import asyncio
+import hashlib
+import io
 import json
 import os
-from typing import Any
+import re
+from typing import Any, Optional
+from urllib.parse import urlparse
 
-from openai import AsyncOpenAI
+import aiohttp
 from pydantic import BaseModel
 from veadk.utils.logger import get_logger
 
+from market_agent.tools.web_parser_local import _is_public_ip
+from market_agent.utils.model_client import get_model_client
+
+try:
+    from PIL import Image
+except ImportError:  # 未安装 Pillow 时跳过尺寸探测与感知哈希去重
+    Image = None
+
 logger = get_logger(__name__)
 
+# 每次请求打包判断的图片数量，1 表示逐张判断
+FILTER_IMAGES_BATCH_SIZE = int(os.getenv("FILTER_IMAGES_BATCH_SIZE", "8"))
+# 同时进行的判断请求数
+FILTER_IMAGES_CONCURRENCY = int(os.getenv("FILTER_IMAGES_CONCURRENCY", "4"))
+# 预过滤：短边小于该值或长宽比过大的图片视为图标/装饰素材
+FILTER_IMAGES_MIN_SIDE = int(os.getenv("FILTER_IMAGES_MIN_SIDE", "200"))
+FILTER_IMAGES_MAX_ASPECT = float(os.getenv("FILTER_IMAGES_MAX_ASPECT", "3.5"))
+# 探测图片尺寸时最多读取的字节数
+FILTER_IMAGES_PROBE_BYTES = int(os.getenv("FILTER_IMAGES_PROBE_BYTES", str(256 * 1024)))
+
+# 图标、雪碧图、占位图等常见命名
+# 只匹配以 _ - . 分隔的完整词，避免误伤 google-pixel-8.jpg、logo-tee.jpg 之类的商品图
+_ICON_PATTERN = re.compile(
+    r"(^|[_\-.])(icon|sprite|avatar|loading|placeholder|spacer|blank|arrow|btn|button|"
+    r"badge|qrcode|emoji|favicon|1x1)([_\-.]|$)",
+    re.I,
+)
+# URL 中的尺寸提示，如 _60x60.jpg
+_URL_SIZE_PATTERN = re.compile(r"(?<!\d)(\d{2,4})[x*](\d{2,4})(?!\d)")
+_SKIP_EXTENSIONS = (".svg", ".ico", ".gif")
+
 filter_agent_instructions = """
 你是一个专业的图片过滤器，服务于一个商品图片相关的任务
 你将收到一张图片输入，他来自于一个网页的链接，通过网页解析等机制解析下来的，
@@ -36,6 +69,23 @@ filter_agent_instructions = """
 }
 """
 
+batch_filter_agent_instructions = """
+你是一个专业的图片过滤器，服务于一个商品图片相关的任务
+你将收到多张图片输入，它们来自于一个网页的链接，通过网页解析等机制解析下来的，
+每张图片之前都有一个形如 "图片 0" 的编号。
+你需要根据每张图片的内容判断它是商品，还是类似网页素材，点缀之类的无关内容。
+对每一张图片都返回一条结果，不允许任何额外的输出
+注意如果你不能确定是否是商品，那它就不是。
+
+### 参考输出
+{
+    "results": [
+        {"index": 0, "is_good": true},
+        {"index": 1, "is_good": false}
+    ]
+}
+"""
+
 summarize_text_instructions = """
 你是一个专业的文本总结器，服务于一个商品图片相关的任务
 你将收到一段文本输入，他来自于一个网页的链接，通过网页解析等机制解析下来的，
@@ -47,6 +97,37 @@ class IsGood(BaseModel):
     is_good: bool
 
 
+class IndexedIsGood(BaseModel):
+    index: int
+    is_good: bool
+
+
+class BatchIsGood(BaseModel):
+    results: list[IndexedIsGood]
+
+
+# 手写的内联 schema，避免 pydantic 生成 $defs 引用
+BATCH_IS_GOOD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "is_good": {"type": "boolean"},
+                },
+                "required": ["index", "is_good"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False,
+}
+
+
 def repair_image_input(image_list: list[str]) -> list[dict[str, Any]]:
     result = []
     for image in image_list:
@@ -59,46 +140,222 @@ def repair_image_input(image_list: list[str]) -> list[dict[str, Any]]:
     return result
 
 
-async def filter_images(image_list: list[str]) -> list[str]:
-    inputs = repair_image_input(image_list)
-    client = AsyncOpenAI(
-        base_url=os.getenv("MODEL_AGENT_API_BASE"),
-        api_key=os.getenv("MODEL_AGENT_API_KEY"),
+def _prefilter_by_url(image_list: list[str]) -> list[str]:
+    """
+    仅根据URL的零成本预过滤：去重，去掉图标/雪碧图/矢量图与尺寸提示过小的图片
+    """
+    seen = set()
+    result = []
+    for image in image_list:
+        path = urlparse(image).path
+        if image in seen or path.lower().endswith(_SKIP_EXTENSIONS):
+            continue
+        seen.add(image)
+        if _ICON_PATTERN.search(path.rsplit("/", 1)[-1]):
+            continue
+        size_hint = _URL_SIZE_PATTERN.search(path)
+        if size_hint and min(map(int, size_hint.groups())) < FILTER_IMAGES_MIN_SIDE:
+            continue
+        result.append(image)
+    return result
+
+
+def _dhash(image) -> str:
+    """差值感知哈希，用于识别同一张图的不同压缩/缩放版本"""
+    pixels = list(image.convert("L").resize((9, 8)).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
+def _parse_probe(data: bytes, complete: bool) -> tuple[tuple[int, int], str]:
+    with Image.open(io.BytesIO(data)) as img:
+        size = img.size
+        # 完整读取到的图片用感知哈希去重，否则用内容前缀去重
+        if complete:
+            return size, _dhash(img)
+    return size, hashlib.sha1(data).hexdigest()
+
+
+async def _probe_image(
+    session: aiohttp.ClientSession, image: str
+) -> tuple[Optional[tuple[int, int]], Optional[str]]:
+    """
+    只读取图片开头的部分字节，返回 (尺寸, 去重键)；无法探测时返回 (None, None)
+    """
+    try:
+        # 不跟随重定向，避免经由跳转访问内网地址
+        async with session.get(
+            image,
+            headers={"Range": f"bytes=0-{FILTER_IMAGES_PROBE_BYTES - 1}"},
+            allow_redirects=False,
+        ) as response:
+            if response.status not in (200, 206):
+                return None, None
+            data = await response.content.read(FILTER_IMAGES_PROBE_BYTES)
+            complete = response.content.at_eof()
+        return await asyncio.to_thread(_parse_probe, data, complete)
+    except Exception:
+        return None, None
+
+
+async def _prefilter_by_content(image_list: list[str]) -> list[str]:
+    """
+    读取图片头部探测尺寸：过滤过小或长宽比过大的图片，并按感知哈希去重；
+    探测失败的图片保留给模型判断
+    """
+    if Image is None or not image_list:
+        return image_list
+
+    # 只探测解析到公网地址的 http(s) 图片，防止SSRF；每个主机只解析一次
+    origins = {}
+    for image in image_list:
+        parsed = urlparse(image)
+        if parsed.scheme in ("http", "https") and parsed.hostname:
+            origins.setdefault(f"{parsed.scheme}://{parsed.netloc}", None)
+    public = await asyncio.gather(
+        *(asyncio.to_thread(_is_public_ip, origin) for origin in origins)
+    )
+    public_origins = {origin for origin, ok in zip(origins, public) if ok}
+
+    def probable(image: str) -> bool:
+        parsed = urlparse(image)
+        return f"{parsed.scheme}://{parsed.netloc}" in public_origins
+
+    timeout = aiohttp.ClientTimeout(total=5)
+    connector = aiohttp.TCPConnector(limit=16)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        probes = await asyncio.gather(
+            *(
+                _probe_image(session, image)
+                if probable(image)
+                else asyncio.sleep(0, result=(None, None))
+                for image in image_list
+            )
+        )
+
+    seen = set()
+    result = []
+    for image, (size, dedupe_key) in zip(image_list, probes):
+        if size is not None:
+            short_side, long_side = sorted(size)
+            if short_side < FILTER_IMAGES_MIN_SIDE:
+                continue
+            if long_side / short_side > FILTER_IMAGES_MAX_ASPECT:
+                continue
+        if dedupe_key is not None:
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+        result.append(image)
+    return result
+
+
+async def _classify_single(client, _input: dict[str, Any]) -> bool:
+    try:
+        response = await client.responses.create(
+            model="doubao-seed-1-6-251015",
+            instructions=filter_agent_instructions,
+            input=[{"role": "user", "content": [_input]}],
+            text={
+                "format": {
+                    "type": "json_schema",
+                    "name": "IsGood",
+                    "schema": IsGood.model_json_schema(),
+                    "strict": True,
+                }
+            },
+            extra_body={"thinking": {"type": "disabled"}},
+        )
+        return json.loads(response.output_text).get("is_good", False)
+    except Exception:
+        return False
+
+
+async def _classify_batch(client, inputs: list[dict[str, Any]]) -> list[bool]:
+    """
+    一次请求判断多张图片；结果不完整或解析失败时回退为逐张判断
+    """
+    if len(inputs) == 1:
+        return [await _classify_single(client, inputs[0])]
+
+    content = []
+    for i, _input in enumerate(inputs):
+        content.append({"type": "input_text", "text": f"图片 {i}"})
+        content.append(_input)
+    try:
+        response = await client.responses.create(
+            model="doubao-seed-1-6-251015",
+            instructions=batch_filter_agent_instructions,
+            input=[{"role": "user", "content": content}],
+            text={
+                "format": {
+                    "type": "json_schema",
+                    "name": "BatchIsGood",
+                    "schema": BATCH_IS_GOOD_SCHEMA,
+                    "strict": True,
+                }
+            },
+            extra_body={"thinking": {"type": "disabled"}},
+        )
+        results = BatchIsGood.model_validate_json(response.output_text).results
+        verdicts = {r.index: r.is_good for r in results}
+        if set(verdicts) >= set(range(len(inputs))):
+            return [verdicts[i] for i in range(len(inputs))]
+        logger.warning(
+            f"批量图片判断结果不完整（{len(verdicts)}/{len(inputs)}），回退逐张判断"
+        )
+    except Exception as e:
+        logger.warning(f"批量图片判断失败，回退逐张判断: {e}")
+    return list(
+        await asyncio.gather(*(_classify_single(client, _input) for _input in inputs))
     )
-    sem = asyncio.Semaphore(10)  # 限制并发
-
-    async def process_message(_input):
-        async with sem:
-            try:
-                response = await client.responses.create(
-                    model="doubao-seed-1-6-251015",
-                    instructions=filter_agent_instructions,
-                    input=[{"role": "user", "content": [_input]}],
-                    text={
-                        "format": {
-                            "type": "json_schema",
-                            "name": "IsGood",
-                            "schema": IsGood.model_json_schema(),
-                            "strict": True,
-                        }
-                    },
-                    extra_body={"thinking": {"type": "disabled"}},
-                )
-                x = json.loads(response.output_text).get("is_good", False)
-            except Exception:
-                x = False
-            return _input["image_url"] if x else None
-
-    result = await asyncio.gather(*(process_message(_input) for _input in inputs))
-    result = [r for r in result if r is not None]
+
+
+async def filter_images(
+    image_list: list[str],
+    max_images: Optional[int] = None,
+    batch_size: int = FILTER_IMAGES_BATCH_SIZE,
+) -> list[str]:
+    """
+    过滤出商品图片，保持页面中的顺序
+    :param image_list: 候选图片URL列表
+    :param max_images: 找到足够数量的商品图片后提前结束，None 表示判断全部图片
+    :param batch_size: 每次请求打包判断的图片数量
+    """
+    candidates = _prefilter_by_url(image_list)
+    candidates = await _prefilter_by_content(candidates)
+    logger.debug(f"图片预过滤：{len(image_list)} -> {len(candidates)}")
+
+    inputs = repair_image_input(candidates)
+    batch_size = max(batch_size, 1)
+    batches = [inputs[i : i + batch_size] for i in range(0, len(inputs), batch_size)]
+    client = get_model_client()
+
+    result = []
+    # 按页面顺序逐轮并发判断，凑够 max_images 张后不再发起新的请求
+    for i in range(0, len(batches), FILTER_IMAGES_CONCURRENCY):
+        wave = batches[i : i + FILTER_IMAGES_CONCURRENCY]
+        verdicts = await asyncio.gather(
+            *(_classify_batch(client, batch) for batch in wave)
+        )
+        for batch, batch_verdicts in zip(wave, verdicts):
+            result.extend(
+                _input["image_url"]
+                for _input, is_good in zip(batch, batch_verdicts)
+                if is_good
+            )
+        if max_images is not None and len(result) >= max_images:
+            logger.debug(f"已找到 {len(result)} 张商品图片，提前结束判断")
+            return result[:max_images]
     return result
 
 
 async def summarize_text(text: str):
-    client = AsyncOpenAI(
-        base_url=os.getenv("MODEL_AGENT_API_BASE"),
-        api_key=os.getenv("MODEL_AGENT_API_KEY"),
-    )
+    client = get_model_client()
     try:
         response = await client.responses.create(
             model="doubao-seed-1-6-251015",
@@ -12,12 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os
 from typing import Any
 
-from openai import AsyncOpenAI
 from veadk.utils.logger import get_logger
 
+from market_agent.utils.model_client import get_model_client
+
 logger = get_logger(__name__)
 
 filter_agent_instructions = """
@@ -41,11 +41,7 @@ def repair_image_input(image: str) -> dict[str, Any]:
 async def comment_image(image: str) -> dict[str, Any]:
     logger.debug(f"开始调用image_understand解析图片：{image}")
     image_part = repair_image_input(image)
-    client = AsyncOpenAI(
-        base_url=os.getenv("MODEL_AGENT_API_BASE"),
-        api_key=os.getenv("MODEL_AGENT_API_KEY"),
-    )
-    response = await client.responses.create(
+    response = await get_model_client().responses.create(
         model="doubao-seed-1-6-251015",
         instructions=filter_agent_instructions,
         input=[{"role": "user", "content": [image_part]}],
@@ -13,9 +13,28 @@
 # limitations under the License.
 
 import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
 import aiohttp
-import requests
-from typing import List, Tuple
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# 连接池配置
+IS_IMAGE_MAX_CONNECTIONS = int(os.getenv("IS_IMAGE_MAX_CONNECTIONS", "64"))
+IS_IMAGE_MAX_CONNECTIONS_PER_HOST = int(
+    os.getenv("IS_IMAGE_MAX_CONNECTIONS_PER_HOST", "8")
+)
+# 检测结果缓存：成功结果在TTL内直接复用，过期后带 ETag/Last-Modified 条件请求重新验证
+IS_IMAGE_CACHE_SIZE = int(os.getenv("IS_IMAGE_CACHE_SIZE", "4096"))
+IS_IMAGE_CACHE_TTL = float(os.getenv("IS_IMAGE_CACHE_TTL", "600"))
+# 请求失败（超时、网络错误、非2xx）的负缓存时间
+IS_IMAGE_NEGATIVE_CACHE_TTL = float(os.getenv("IS_IMAGE_NEGATIVE_CACHE_TTL", "60"))
+
+# 无法据此判断类型、需要继续读取文件魔数的 Content-Type
+_GENERIC_CONTENT_TYPES = ("", "application/octet-stream", "binary/octet-stream")
 
 # 图片魔数映射（前N字节特征）
 IMAGE_MAGIC_NUMBERS = {
@@ -29,113 +48,226 @@ IMAGE_MAGIC_NUMBERS = {
 }
 
 
+def _match_magic_number(header_bytes: bytes) -> bool:
+    for magic, _ in IMAGE_MAGIC_NUMBERS.items():
+        if header_bytes.startswith(magic):
+            # WebP特殊验证（RIFF后需包含WEBP）
+            if magic == b"\x52\x49\x46\x46" and b"WEBP" not in header_bytes:
+                continue
+            # SVG特殊验证（文本格式，需兼容大小写）
+            if magic == b"\x3c\x73\x76\x67" and not header_bytes.lower().startswith(
+                b"<svg"
+            ):
+                continue
+            return True
+    return False
+
+
+class ImageChecker:
+    """
+    共享的异步图片资源检测器
+
+    优先发送 HEAD 请求，Content-Type 无法判断时降级为只读取前16字节的 Range GET；
+    连接池按 host 限流，检测结果按 URL 缓存，并对失败结果做短时负缓存。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = IS_IMAGE_MAX_CONNECTIONS,
+        max_connections_per_host: int = IS_IMAGE_MAX_CONNECTIONS_PER_HOST,
+        cache_size: int = IS_IMAGE_CACHE_SIZE,
+        cache_ttl: float = IS_IMAGE_CACHE_TTL,
+        negative_cache_ttl: float = IS_IMAGE_NEGATIVE_CACHE_TTL,
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = negative_cache_ttl
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # url -> (is_image, reason, validators, checked_at, ttl)
+        self._cache: OrderedDict[str, tuple] = OrderedDict()
+        # 同一URL的并发检测共享一次请求
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # 会话与事件循环绑定，循环切换后需要重建
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers={"User-Agent": USER_AGENT}
+            )
+            self._session_loop = loop
+            self._inflight.clear()
+        return self._session
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def _cache_put(
+        self, url: str, is_image: bool, reason: str, validators: dict, ttl: float
+    ):
+        self._cache[url] = (is_image, reason, validators, time.monotonic(), ttl)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _fetch(
+        self, url: str, timeout: float, conditional_headers: dict
+    ) -> Tuple[Optional[bool], str, dict]:
+        """
+        返回 (是否为图片, 验证依据, 缓存验证头)；资源未修改时是否为图片返回 None
+        """
+        session = self._get_session()
+        timeout_obj = aiohttp.ClientTimeout(total=timeout)
+
+        # 1. HEAD请求（仅获取响应头，最快）
+        async with session.head(
+            url,
+            timeout=timeout_obj,
+            allow_redirects=True,
+            headers=conditional_headers,
+        ) as resp:
+            if resp.status == 304:
+                return None, "not_modified", conditional_headers
+            validators = {
+                k: resp.headers[k]
+                for k in ("ETag", "Last-Modified")
+                if k in resp.headers
+            }
+            content_type = resp.headers.get("Content-Type", "").lower()
+            if resp.status == 200:
+                # 2. 验证Content-Type（优先级最高，成本最低）
+                if content_type.startswith("image/"):
+                    return True, "content_type", validators
+                if content_type.split(";")[0].strip() not in _GENERIC_CONTENT_TYPES:
+                    return False, "content_type", validators
+
+        # 3. HEAD不被支持或Content-Type不可靠时，Range GET 只读取前16字节验证魔数
+        async with session.get(
+            url,
+            timeout=timeout_obj,
+            allow_redirects=True,
+            headers={"Range": "bytes=0-15"},
+        ) as resp:
+            resp.raise_for_status()
+            validators = {
+                k: resp.headers[k]
+                for k in ("ETag", "Last-Modified")
+                if k in resp.headers
+            }
+            content_type = resp.headers.get("Content-Type", "").lower()
+            if content_type.startswith("image/"):
+                return True, "content_type", validators
+            header_bytes = await resp.content.read(16)
+            if _match_magic_number(header_bytes):
+                return True, "magic_number", validators
+            return False, "content_type", validators
+
+    async def _check(self, url: str, timeout: float) -> Tuple[str, bool, str]:
+        entry = self._cache.get(url)
+        conditional_headers = {}
+        if entry is not None:
+            is_image, reason, validators, checked_at, ttl = entry
+            if time.monotonic() - checked_at < ttl:
+                self._cache.move_to_end(url)
+                self.hits += 1
+                return url, is_image, reason
+            # 过期的成功结果带验证头发起条件请求
+            if "ETag" in validators:
+                conditional_headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                conditional_headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        try:
+            is_image, reason, validators = await self._fetch(
+                url, timeout, conditional_headers
+            )
+        except Exception as e:
+            # 捕获所有异常（超时、网络错误、SSL错误等），短时负缓存
+            reason = f"error: {str(e)[:50]}"
+            self._cache_put(url, False, reason, {}, self.negative_cache_ttl)
+            self.misses += 1
+            return url, False, reason
+
+        if is_image is None:
+            # 资源未修改，沿用缓存结果
+            is_image, reason = entry[0], entry[1]
+            self.revalidations += 1
+        else:
+            self.misses += 1
+        self._cache_put(url, is_image, reason, validators, self.cache_ttl)
+        return url, is_image, reason
+
+    async def check(self, url: str, timeout: float = 3.0) -> Tuple[str, bool, str]:
+        """
+        异步判断单个URL是否为图片资源
+        :return: (url, 是否为图片, 验证依据)
+        """
+        self._get_session()
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._check(url, timeout))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # 调用方被取消时不影响其他等待同一URL的调用方
+        return await asyncio.shield(task)
+
+
+image_checker = ImageChecker()
+
+
 def is_image_resource(
     url: str, timeout: float = 3.0, allow_redirects: bool = True
 ) -> Tuple[bool, str]:
     """
-    同步判断单个URL是否为图片资源（非URL后缀，仅验证HTTP头/文件内容）
+    同步判断单个URL是否为图片资源（仅供脚本等无事件循环的场景使用）
     :param url: 待检测URL
     :param timeout: 超时时间（秒）
-    :param allow_redirects: 是否允许重定向
+    :param allow_redirects: 保留参数，检测时始终跟随重定向
     :return: (是否为图片, 验证依据)
              验证依据可选：content_type / magic_number / error
     """
-    # 第一步：发起轻量请求（优先HEAD，失败则降级GET）
-    try:
-        # 1. 尝试HEAD请求（仅获取响应头，最快）
-        resp = requests.head(
-            url,
-            timeout=timeout,
-            allow_redirects=allow_redirects,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-        )
-        # 2. HEAD失败则降级为GET（仅读响应头，不下载正文）
-        if resp.status_code != 200:
-            resp = requests.get(
-                url,
-                timeout=timeout,
-                allow_redirects=allow_redirects,
-                stream=True,  # 关键：不下载正文
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                },
-            )
 
-        # 3. 验证Content-Type（优先级最高，成本最低）
-        content_type = resp.headers.get("Content-Type", "").lower()
-        if content_type.startswith("image/"):
-            return True, "content_type"
-
-        # 第二步：Content-Type不可靠时，验证文件魔数（仅下载前16字节）
+    async def run():
+        checker = ImageChecker()
         try:
-            # 读取前16字节（足够覆盖所有图片魔数）
-            header_bytes = resp.raw.read(16) if resp.raw else b""
-            # 匹配魔数
-            for magic, _ in IMAGE_MAGIC_NUMBERS.items():
-                if header_bytes.startswith(magic):
-                    # WebP特殊验证（RIFF后需包含WEBP）
-                    if magic == b"\x52\x49\x46\x46" and b"WEBP" not in header_bytes:
-                        continue
-                    # SVG特殊验证（文本格式，需兼容大小写）
-                    if (
-                        magic == b"\x3c\x73\x76\x67"
-                        and not header_bytes.lower().startswith(b"<svg")
-                    ):
-                        continue
-                    return True, "magic_number"
-            return False, "content_type"
+            return await checker.check(url, timeout)
         finally:
-            resp.close()  # 强制关闭连接，避免资源泄漏
+            await checker.aclose()
 
-    except Exception as e:
-        # 捕获所有异常（超时、网络错误、SSL错误等）
-        return False, f"error: {str(e)[:50]}"
+    _, is_image, reason = asyncio.run(run())
+    return is_image, reason
 
 
 async def async_is_image_resource(
-    url: str, session: aiohttp.ClientSession, timeout: float = 3.0
+    url: str, session: Optional[aiohttp.ClientSession] = None, timeout: float = 3.0
 ) -> Tuple[str, bool, str]:
     """
     异步判断单个URL是否为图片资源（批量场景首选）
     :param url: 待检测URL
-    :param session: aiohttp会话（复用连接，提升批量性能）
+    :param session: 保留参数，检测统一使用共享检测器的连接池
     :param timeout: 超时时间（秒）
     :return: (url, 是否为图片, 验证依据)
     """
-    timeout_obj = aiohttp.ClientTimeout(total=timeout)
-    try:
-        # 1. 发起GET请求（aiohttp对HEAD支持较差，直接用GET+stream）
-        async with session.get(
-            url,
-            timeout=timeout_obj,
-            allow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-        ) as resp:
-            # 2. 验证Content-Type
-            content_type = resp.headers.get("Content-Type", "").lower()
-            if content_type.startswith("image/"):
-                return url, True, "content_type"
-
-            # 3. 验证魔数（仅读取前16字节）
-            header_bytes = await resp.content.read(16)
-            for magic, _ in IMAGE_MAGIC_NUMBERS.items():
-                if header_bytes.startswith(magic):
-                    if magic == b"\x52\x49\x46\x46" and b"WEBP" not in header_bytes:
-                        continue
-                    if (
-                        magic == b"\x3c\x73\x76\x67"
-                        and not header_bytes.lower().startswith(b"<svg")
-                    ):
-                        continue
-                    return url, True, "magic_number"
-            return url, False, "content_type"
-
-    except Exception as e:
-        return url, False, f"error: {str(e)[:50]}"
+    return await image_checker.check(url, timeout)
 
 
 async def batch_check_images(
@@ -150,16 +282,11 @@ async def batch_check_images(
     :param max_concurrency: 最大并发数
     :return: 列表，每个元素为(url, 是否为图片, 验证依据)
     """
-    # 限制并发数（防止请求过多被封禁）
+    # 限制并发数（防止请求过多被封禁），单host连接数由共享连接池限制
     semaphore = asyncio.Semaphore(max_concurrency)
 
     async def bounded_check(url):
         async with semaphore:
-            return await async_is_image_resource(url, session, timeout)
-
-    # 创建复用的aiohttp会话（提升性能）
-    connector = aiohttp.TCPConnector(limit=0)  # 连接池不限制（靠semaphore控制）
-    async with aiohttp.ClientSession(connector=connector) as session:
-        tasks = [bounded_check(url) for url in urls]
-        results = await asyncio.gather(*tasks)
-    return results
+            return await image_checker.check(url, timeout)
+
+    return list(await asyncio.gather(*(bounded_check(url) for url in urls)))
@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
 from urllib.parse import urlparse
 
 from market_agent.tools.image_understand import comment_image
@@ -23,6 +28,106 @@ from veadk.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 同时解析的链接数
+LINK_READER_CONCURRENCY = int(os.getenv("LINK_READER_CONCURRENCY", "4"))
+# 每个网页最多保留的商品图片数
+LINK_READER_MAX_IMAGES = 5
+# 解析结果缓存
+LINK_READER_CACHE_SIZE = int(os.getenv("LINK_READER_CACHE_SIZE", "256"))
+LINK_READER_CACHE_TTL = float(os.getenv("LINK_READER_CACHE_TTL", str(6 * 3600)))
+
+
+class LinkResultCache:
+    """
+    按 URL + 内容哈希缓存链接解析结果（LRU + TTL）
+
+    网页先抓取再按内容哈希查缓存，页面未变化时直接复用过滤与总结结果，不再调用模型；
+    图片链接仅按 URL 缓存。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LINK_READER_CACHE_SIZE,
+        ttl: float = LINK_READER_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, content_hash: str = "") -> str:
+        return hashlib.sha256(f"{url}\0{content_hash}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self._entries.pop(key, None)
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: dict[str, Any]):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+link_result_cache = LinkResultCache()
+
+
+def _content_hash(images: list[str], text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8"))
+    for image in images:
+        digest.update(b"\0")
+        digest.update(image.encode("utf-8"))
+    return digest.hexdigest()
+
+
+async def _read_image_link(link: str) -> dict[str, Any]:
+    cache_key = link_result_cache.key(link)
+    cached = link_result_cache.get(cache_key)
+    if cached is not None:
+        logger.debug(f"图片解析命中缓存：{urlparse(link).netloc}")
+        return cached
+    res = await comment_image(link)
+    link_result_cache.put(cache_key, res)
+    return res
+
+
+async def _read_webpage_link(link: str) -> dict[str, Any]:
+    # 调用 `LinkReader` 工具进行网页内容抓取与解析（避免控制台打印完整链接）
+    logger.debug(f"调用parse_webpage解析链接域名：{urlparse(link).netloc}")
+    images, text = await parse_webpage(link)
+
+    cache_key = link_result_cache.key(link, _content_hash(images, text))
+    cached = link_result_cache.get(cache_key)
+    if cached is not None:
+        logger.debug(f"网页内容未变化，复用缓存结果：{urlparse(link).netloc}")
+        return cached
+
+    # 过滤无效图片与总结文本互不依赖，并发执行
+    raw_text = text
+    images, text = await asyncio.gather(
+        filter_images(images, max_images=LINK_READER_MAX_IMAGES), summarize_text(text)
+    )
+    logger.debug(
+        f"对url: {link} \n 解析到图片数量: {len(images)}, 解析到文本长度 {len(text)}"
+    )
+    if len(text) < 100:
+        logger.debug(f"对url: {link} \n 文本过短，长度: {len(text)}")
+    if len(images) >= LINK_READER_MAX_IMAGES:
+        logger.debug(f"对url: {link} \n  已选取前{LINK_READER_MAX_IMAGES}张图片")
+    res = {"images": images, "text": text}
+    # 总结失败时 summarize_text 返回截断的原文，此时不缓存以便下次重试
+    if text != raw_text[0:10000]:
+        link_result_cache.put(cache_key, res)
+    return res
+
 
 async def read_url_link(link_list: list[str]) -> str | list[dict[str, Any]]:
     """
@@ -43,39 +148,25 @@ async def read_url_link(link_list: list[str]) -> str | list[dict[str, Any]]:
         - 'text': str 对图片/网页的文本解释。
     """
     logger.debug(f"开始解析链接：{link_list}")
-    is_images_results = await batch_check_images(link_list)
+    # 重复链接只解析一次
+    unique_links = list(dict.fromkeys(link_list))
+    is_images_results = await batch_check_images(unique_links)
     logger.debug(f"图片检测结果： {is_images_results}")
-    result = []
-    for i, link in enumerate(link_list):
-        # try:
-        # is_images_results 中的每个元素是 (url, is_image, reason) 的元组
-        _, is_image, _ = is_images_results[i]
-        if is_image:
-            res = await comment_image(link)
-            result.append(res)
-            continue
-        else:
-            # 调用 `LinkReader` 工具进行网页内容抓取与解析（避免控制台打印完整链接）
-            logger.debug(f"调用parse_webpage解析链接域名：{urlparse(link).netloc}")
-            images, text = await parse_webpage(link)
-            # 过滤掉无效的图片链接
-            images = await filter_images(images)
-            # 对文本内容进行总结
-            text = await summarize_text(text)
-            logger.debug(
-                f"对url: {link} \n 解析到图片数量: {len(images)}, 解析到文本长度 {len(text)}"
-            )
-            if len(text) < 100:
-                logger.debug(f"对url: {link} \n 文本过短，长度: {len(text)}")
-            if len(images) > 5:
-                logger.debug(f"对url: {link} \n  图片数量过多，选取前5张")
-                images = images[:5]
-            result.append({"images": images, "text": text})
-
-        # except Exception as e:
-        #     # 捕获并打印异常信息
-        #     logger.error(f"Error parsing {link}: {e}")
-        #     # 继续处理下一个链接
-        #     result.append({"images": [], "text": ""})
-
-    return result
+
+    semaphore = asyncio.Semaphore(LINK_READER_CONCURRENCY)
+
+    async def read_link(link: str, is_image: bool) -> dict[str, Any]:
+        async with semaphore:
+            if is_image:
+                return await _read_image_link(link)
+            return await _read_webpage_link(link)
+
+    # is_images_results 中的每个元素是 (url, is_image, reason) 的元组
+    results = await asyncio.gather(
+        *(
+            read_link(link, is_image)
+            for link, (_, is_image, _) in zip(unique_links, is_images_results)
+        )
+    )
+    result_by_link = dict(zip(unique_links, results))
+    return [result_by_link[link] for link in link_list]
@@ -12,14 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import os
 import re
 import socket
 import warnings
+from contextlib import asynccontextmanager
+from typing import Optional
 from urllib.parse import urljoin
 
-import requests
+import aiohttp
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Error as PlaywrightError,
+    Page,
+    async_playwright,
+)
 from veadk.utils.logger import get_logger
 
 # 忽略无关警告
@@ -28,31 +38,178 @@ warnings.filterwarnings("ignore")
 # 日志配置
 logger = get_logger(__name__)
 
-# 全局浏览器实例（复用避免重复启动，提升性能）
-_global_browser = None
-
-
-async def _init_browser():
-    """初始化 Playwright 浏览器（全局复用）"""
-    global _global_browser
-    if not _global_browser:
-        try:
-            playwright = await async_playwright().start()
-            # 启动浏览器（根据系统环境自动选择）
-            _global_browser = await playwright.chromium.launch(
-                headless=True,
-                args=[
-                    "--no-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-gpu",
-                    "--disable-images",
-                    "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                ],
-            )
-            logger.info("Chromium 浏览器初始化成功")
-        except Exception as e:
-            logger.error(f"浏览器初始化失败: {e}", exc_info=True)
-            raise
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# 同时解析的页面数上限
+WEB_PARSER_MAX_PAGES = int(os.getenv("WEB_PARSER_MAX_PAGES", "4"))
+# 单个页面复用多少次后重建，避免长时间运行的页面内存膨胀
+WEB_PARSER_PAGE_MAX_USES = int(os.getenv("WEB_PARSER_PAGE_MAX_USES", "50"))
+# 拦截的资源类型；图片只读取 DOM 属性，无需真正下载
+WEB_PARSER_BLOCKED_RESOURCES = frozenset(
+    t.strip()
+    for t in os.getenv("WEB_PARSER_BLOCKED_RESOURCES", "font,media,image").split(",")
+    if t.strip()
+)
+# 响应大小上限，超过则拒绝解析
+WEB_PARSER_MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB
+
+# 在页面内一次性提取 HTML、<img> 地址与内联背景图，避免逐元素 IPC 往返
+_EXTRACT_JS = r"""
+() => {
+    const imgs = [];
+    for (const img of document.images) {
+        const src = img.getAttribute("src") || img.getAttribute("data-src")
+            || img.getAttribute("lazy-src") || img.getAttribute("data-lazy");
+        if (src) imgs.push(src);
+    }
+    const bgPattern = /background-image:\s*url\(["']?(.*?)["']?\)/i;
+    const bgs = [];
+    for (const el of document.querySelectorAll("[style]")) {
+        const match = bgPattern.exec(el.getAttribute("style") || "");
+        if (match) bgs.push(match[1]);
+    }
+    return {html: document.documentElement.outerHTML, imgs, bgs};
+}
+"""
+
+
+class BrowserPagePool:
+    """
+    复用同一个 Chromium 浏览器与上下文，按并发上限借出页面
+
+    页面用完后归还到空闲队列供下一次解析直接跳转；浏览器断开时自动重建。
+    """
+
+    def __init__(
+        self,
+        max_pages: int = WEB_PARSER_MAX_PAGES,
+        page_max_uses: int = WEB_PARSER_PAGE_MAX_USES,
+        blocked_resources: frozenset = WEB_PARSER_BLOCKED_RESOURCES,
+    ):
+        self.max_pages = max_pages
+        self.page_max_uses = page_max_uses
+        self.blocked_resources = blocked_resources
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._context: Optional[BrowserContext] = None
+        self._idle_pages: list[Page] = []
+        self._page_uses: dict[Page, int] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._init_lock: Optional[asyncio.Lock] = None
+
+    async def _block_resources(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _ensure_context(self) -> BrowserContext:
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+        async with self._init_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._context
+            try:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                # 启动浏览器（根据系统环境自动选择）
+                self._browser = await self._playwright.chromium.launch(
+                    headless=True,
+                    args=[
+                        "--no-sandbox",
+                        "--disable-dev-shm-usage",
+                        "--disable-gpu",
+                        f"--user-agent={USER_AGENT}",
+                    ],
+                )
+                self._context = await self._browser.new_context(user_agent=USER_AGENT)
+                # 页面超时配置
+                self._context.set_default_timeout(15 * 1000)  # 15秒超时
+                if self.blocked_resources:
+                    await self._context.route("**/*", self._block_resources)
+                self._idle_pages.clear()
+                self._page_uses.clear()
+                logger.info("Chromium 浏览器初始化成功")
+            except Exception as e:
+                logger.error(f"浏览器初始化失败: {e}", exc_info=True)
+                raise
+            return self._context
+
+    @asynccontextmanager
+    async def page(self):
+        """借出一个页面，退出时归还；浏览器报错的页面直接关闭不再复用"""
+        context = await self._ensure_context()
+        async with self._semaphore:
+            page = None
+            while self._idle_pages and page is None:
+                candidate = self._idle_pages.pop()
+                if not candidate.is_closed():
+                    page = candidate
+            if page is None:
+                page = await context.new_page()
+                self._page_uses[page] = 0
+                logger.debug("创建了新的浏览器页面")
+
+            healthy = True
+            try:
+                yield page
+            except PlaywrightError:
+                healthy = False
+                raise
+            finally:
+                self._page_uses[page] = self._page_uses.get(page, 0) + 1
+                if (
+                    healthy
+                    and not page.is_closed()
+                    and self._page_uses[page] < self.page_max_uses
+                    and self._context is context
+                ):
+                    self._idle_pages.append(page)
+                else:
+                    self._page_uses.pop(page, None)
+                    if not page.is_closed():
+                        await page.close()
+
+    async def aclose(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._context = self._playwright = None
+        self._idle_pages.clear()
+        self._page_uses.clear()
+
+
+page_pool = BrowserPagePool()
+
+
+async def _check_content_length(url: str):
+    """
+    增加DoS防护：只读取响应头检查 Content-Length
+    """
+    try:
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(url, headers={"User-Agent": USER_AGENT}) as r:
+                content_length = r.headers.get("Content-Length")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"检查响应大小时出错: {e}")
+        raise ValueError("无法访问URL")
+    if content_length and int(content_length) > WEB_PARSER_MAX_CONTENT_LENGTH:
+        raise ValueError("响应内容大于10MB，因安全保护拒绝解析")
+
+
+def _extract_text(html_content: str) -> str:
+    soup = BeautifulSoup(html_content, "html.parser")
+    # 移除无用标签
+    for useless_tag in soup(
+        ["script", "style", "noscript", "iframe", "header", "footer"]
+    ):
+        useless_tag.extract()
+    # 格式化文本
+    raw_text = soup.get_text(strip=True)
+    return re.sub(r"\s+", " ", raw_text)
 
 
 def _is_public_ip(url: str) -> bool:
@@ -78,124 +235,60 @@ async def parse_webpage_local(url: str, render_js: bool = True, delay: int = 5):
     :param delay: 渲染延迟（秒，默认5）
     :return: (img_url_list, text_content)
     """
-    global _global_browser
-
     logger.info(f"开始网页解析：{url}，render_js={render_js}，延迟={delay}秒")
 
-    # 初始化浏览器（如果尚未初始化）
-    if not _global_browser:
-        await _init_browser()
-
-    if not _global_browser:
-        logger.error("浏览器未初始化")
-        raise RuntimeError("浏览器未初始化")
-
-    page = None
+    # 大小检查与等待空闲页面同时进行
+    preflight = asyncio.create_task(_check_content_length(url))
     try:
-        # 创建新页面
-        context = await _global_browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = await context.new_page()
-        logger.debug("创建了新的浏览器上下文和页面")
+        async with page_pool.page() as page:
+            await preflight
 
-        # 页面请求超时配置
-        page.set_default_timeout(15 * 1000)  # 15秒超时
-        logger.debug("将页面超时设置为15秒")
+            # 访问目标URL
+            await page.goto(
+                url, wait_until="domcontentloaded" if render_js else "commit"
+            )
+            logger.info(f"成功访问URL：{url}")
 
-        # 增加DoS防护：检查Content-Length
-        try:
-            with requests.get(url, stream=True, timeout=10) as r:
-                content_length = r.headers.get("Content-Length")
-                if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB
-                    raise ValueError("响应内容大于10MB，因安全保护拒绝解析")
-        except requests.RequestException as e:
-            logger.error(f"检查响应大小时出错: {e}")
-            raise ValueError("无法访问URL")
-
-        # 访问目标URL
-        await page.goto(url, wait_until="domcontentloaded" if render_js else "commit")
-        logger.info(f"成功访问URL：{url}")
-
-        # 渲染JS（等待动态内容加载）
-        if render_js:
-            logger.info(f"等待{delay}秒进行JS渲染")
-            try:
-                await page.wait_for_load_state("networkidle", timeout=delay * 1000)
-            except Exception:
-                import asyncio
+            # 渲染JS（等待动态内容加载）
+            if render_js:
+                logger.info(f"等待最多{delay}秒进行JS渲染")
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=delay * 1000)
+                except Exception:
+                    pass
+                logger.debug("JS渲染完成")
 
-                await asyncio.sleep(delay)  # 等待页面加载完成
-            logger.debug("JS渲染完成")
+            # 一次 evaluate 取回 HTML 与全部图片地址
+            extracted = await page.evaluate(_EXTRACT_JS)
 
-        # 获取页面完整HTML
-        html_content = await page.content()
+        html_content = extracted["html"]
         logger.debug(f"获取到页面HTML，长度：{len(html_content)}字符")
 
-        # 1. 提取所有图片URL
-        img_url_list = []
-
-        # 1.1 提取<img>标签的图片（src/data-src/lazy-src等）
-        # 方式1：通过Playwright选择器提取（更高效）
-        img_elements = await page.query_selector_all("img")
-        logger.debug(f"在页面上找到{len(img_elements)}个img标签")
-
-        for img_elem in img_elements:
-            # 获取图片属性
-            img_src = (
-                await img_elem.get_attribute("src")
-                or await img_elem.get_attribute("data-src")
-                or await img_elem.get_attribute("lazy-src")
-                or await img_elem.get_attribute("data-lazy")
-            )
-            if img_src:
-                absolute_url = urljoin(url, img_src)
-                # 过滤无效链接
-                if (
-                    not absolute_url.startswith(
-                        ("data:", "svg:", "javascript:", "blob:")
-                    )
-                    and "." in absolute_url.split("/")[-1]
-                ):
-                    img_url_list.append(absolute_url)
-        logger.debug(f"从img标签中提取了{len(img_url_list)}张有效图片")
-
-        # 1.2 提取背景图片（style中的background-image）
-        bg_pattern = re.compile(r'background-image:\s*url\(["\']?(.*?)["\']?\)', re.I)
-        # 获取所有元素的style属性
-        all_elements = await page.query_selector_all("*")
-        logger.debug(f"检查了{len(all_elements)}个元素的背景图片")
-
-        for elem in all_elements:
-            style = await elem.get_attribute("style") or ""
-            match = bg_pattern.search(style)
-            if match:
-                bg_img = match.group(1)
-                absolute_bg_url = urljoin(url, bg_img)
-                if (
-                    absolute_bg_url not in img_url_list
-                    and not absolute_bg_url.startswith(("data:", "svg:", "blob:"))
-                ):
-                    img_url_list.append(absolute_bg_url)
-        logger.debug(
-            f"从背景样式中提取了{len(img_url_list) - len(set(img_url_list))}张有效图片"
-        )
+        # 1. 提取所有图片URL（去重并保持页面顺序）
+        img_urls = {}
+
+        # 1.1 <img>标签的图片（src/data-src/lazy-src等）
+        for img_src in extracted["imgs"]:
+            absolute_url = urljoin(url, img_src)
+            # 过滤无效链接
+            if (
+                not absolute_url.startswith(("data:", "svg:", "javascript:", "blob:"))
+                and "." in absolute_url.split("/")[-1]
+            ):
+                img_urls[absolute_url] = None
+        logger.debug(f"从img标签中提取了{len(img_urls)}张有效图片")
 
-        # 1.3 去重
-        img_url_list = list(set(img_url_list))
+        # 1.2 背景图片（style中的background-image）
+        for bg_img in extracted["bgs"]:
+            absolute_bg_url = urljoin(url, bg_img)
+            if not absolute_bg_url.startswith(("data:", "svg:", "blob:")):
+                img_urls[absolute_bg_url] = None
+        img_url_list = list(img_urls)
         logger.debug(f"去重后最终图片列表：{len(img_url_list)}张图片")
 
         # 2. 提取纯文本内容
         logger.debug("正在提取文本内容")
-        soup = BeautifulSoup(html_content, "html.parser")
-        # 移除无用标签
-        for useless_tag in soup(
-            ["script", "style", "noscript", "iframe", "header", "footer"]
-        ):
-            useless_tag.extract()
-        # 格式化文本
-        raw_text = soup.get_text(strip=True)
-        text_content = re.sub(r"\s+", " ", raw_text)
+        text_content = await asyncio.to_thread(_extract_text, html_content)
         logger.debug(f"提取到文本内容，长度：{len(text_content)}字符")
 
         logger.info(
@@ -207,8 +300,5 @@ async def parse_webpage_local(url: str, render_js: bool = True, delay: int = 5):
         logger.error(f"解析网页失败: {e}", exc_info=True)
         raise
     finally:
-        # 关闭页面和上下文，释放资源
-        if page:
-            await page.close()
-        if "context" in locals():
-            await context.close()
+        if not preflight.done():
+            preflight.cancel()
@@ -0,0 +1,33 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from typing import Optional
+
+from openai import AsyncOpenAI
+
+_client: Optional[AsyncOpenAI] = None
+
+
+def get_model_client() -> AsyncOpenAI:
+    """
+    返回进程内共享的 AsyncOpenAI 客户端，复用底层连接池
+    """
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            base_url=os.getenv("MODEL_AGENT_API_BASE"),
+            api_key=os.getenv("MODEL_AGENT_API_KEY"),
+        )
+    return _client
@@ -25,6 +25,8 @@ from moviepy import CompositeVideoClip, VideoFileClip
 from veadk.config import veadk_environments  # noqa
 from veadk.utils.logger import get_logger
 
+from release_agent.utils.short_link_client import short_link_client
+
 logger = get_logger(__name__)
 
 
@@ -43,43 +45,7 @@ async def resolve_short_url(short_url: str) -> str:
     Returns:
         原始URL，如果解析失败则返回短链接本身
     """
-    # 避免在控制台打印短链接，改用结构化日志
-    logger.debug("Resolving short URL")
-    if not shorten_url_service_url:
-        return short_url
-
-    try:
-        # 从短链接中提取短码
-        # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
-        parsed_url = urllib.parse.urlparse(short_url)
-        path_parts = parsed_url.path.strip("/").split("/")
-
-        if len(path_parts) >= 2 and path_parts[0] == "t":
-            # 调用短链接服务的重定向接口来获取原始URL
-            async with aiohttp.ClientSession() as session:
-                # 使用GET请求获取原始URL（短链接服务直接返回原始URL字符串）
-                async with session.get(short_url) as response:
-                    if response.status == 200:
-                        # 短链接服务直接返回原始URL字符串
-                        original_url = await response.text()
-                        original_url = original_url.strip().strip('"')
-                        logger.debug(
-                            f"Successfully resolved short URL: {short_url} -> {original_url}"
-                        )
-                        return original_url
-                    else:
-                        logger.warning(
-                            f"Failed to resolve short URL: {short_url}, status: {response.status}"
-                        )
-                        return short_url
-        else:
-            logger.warning(f"Not a valid short URL format: {short_url}")
-            return short_url
-
-    except Exception as e:
-        logger.error(f"Error resolving short URL {short_url}: {e}")
-        # 如果解析失败，返回原始短链接
-        return short_url
+    return await short_link_client.resolve(short_url)
 
 
 async def video_combine(video_urls: List[str]) -> Optional[str]:
@@ -107,8 +73,7 @@ async def video_combine(video_urls: List[str]) -> Optional[str]:
 
     # 解析短链接
     resolved_urls = []
-    for url in video_urls:
-        resolved_url = await resolve_short_url(url)
+    for resolved_url in await short_link_client.resolve_many(video_urls):
         # 仅允许 http/https 协议，降低 SSRF 风险
         parsed = urllib.parse.urlparse(resolved_url)
         if parsed.scheme not in {"http", "https"}:
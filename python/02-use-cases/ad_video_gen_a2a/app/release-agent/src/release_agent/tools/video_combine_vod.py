@@ -15,20 +15,27 @@
 import asyncio
 import json
 import os
+import random
 from typing import List, Dict, Any
 from typing import Optional
-import urllib.parse
-import aiohttp
 import fastmcp
 from fastmcp import Client
 from veadk.utils.logger import get_logger
 
+from release_agent.utils.short_link_client import short_link_client
+
 logger = get_logger(__name__)
 
 # 短链接服务配置
 shorten_url_service_url = os.getenv("SHORTEN_URL_SERVICE_URL", None)
 assert shorten_url_service_url, "SHORTEN_URL_SERVICE_URL is not set"
 
+# MCP 会话空闲超过该时间（秒）后，下次调用前先 ping 检查健康状态
+VOD_MCP_HEALTHCHECK_INTERVAL = float(os.getenv("VOD_MCP_HEALTHCHECK_INTERVAL", "60"))
+VOD_MCP_HEALTHCHECK_TIMEOUT = float(os.getenv("VOD_MCP_HEALTHCHECK_TIMEOUT", "10"))
+# 任务轮询的初始间隔（秒），之后指数退避到 task_polling_interval
+VOD_TASK_POLL_INITIAL = float(os.getenv("TOOLS_VOD_TASK_POLL_INITIAL", "5"))
+
 
 async def resolve_short_url(short_url: str) -> str:
     """
@@ -40,43 +47,7 @@ async def resolve_short_url(short_url: str) -> str:
     Returns:
         原始URL，如果解析失败则返回短链接本身
     """
-    # 避免在控制台打印短链接，改用结构化日志
-    logger.debug("Resolving short URL")
-    if not shorten_url_service_url:
-        return short_url
-
-    try:
-        # 从短链接中提取短码
-        # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
-        parsed_url = urllib.parse.urlparse(short_url)
-        path_parts = parsed_url.path.strip("/").split("/")
-
-        if len(path_parts) >= 2 and path_parts[0] == "t":
-            # 调用短链接服务的重定向接口来获取原始URL
-            async with aiohttp.ClientSession() as session:
-                # 使用GET请求获取原始URL（短链接服务直接返回原始URL字符串）
-                async with session.get(short_url) as response:
-                    if response.status == 200:
-                        # 短链接服务直接返回原始URL字符串
-                        original_url = await response.text()
-                        original_url = original_url.strip().strip('"')
-                        logger.debug(
-                            f"Successfully resolved short URL: {short_url} -> {original_url}"
-                        )
-                        return original_url
-                    else:
-                        logger.warning(
-                            f"Failed to resolve short URL: {short_url}, status: {response.status}"
-                        )
-                        return short_url
-        else:
-            logger.warning(f"Not a valid short URL format: {short_url}")
-            return short_url
-
-    except Exception as e:
-        logger.error(f"Error resolving short URL {short_url}: {e}")
-        # 如果解析失败，返回原始短链接
-        return short_url
+    return await short_link_client.resolve(short_url)
 
 
 vod_mcp_config = {
@@ -97,6 +68,160 @@ vod_mcp_config = {
 }
 
 
+class VodMcpSession:
+    """
+    长期复用的 VOD MCP 客户端会话
+
+    会话在独立的后台任务中进入和退出（stdio 子进程的生命周期要求同一任务内进出），
+    各次工具调用共享同一个 mcp-server-vod 子进程；会话空闲一段时间后先 ping 检查，
+    连接断开或调用出现传输错误时自动重启。
+    """
+
+    def __init__(
+        self,
+        mcp_config: dict,
+        healthcheck_interval: float = VOD_MCP_HEALTHCHECK_INTERVAL,
+        healthcheck_timeout: float = VOD_MCP_HEALTHCHECK_TIMEOUT,
+    ):
+        self.mcp_config = mcp_config
+        self.healthcheck_interval = healthcheck_interval
+        self.healthcheck_timeout = healthcheck_timeout
+        self._client: Optional[Client] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._last_used = 0.0
+        self.starts = 0
+
+    async def _run(self, client: Client, ready: asyncio.Future, stop: asyncio.Event):
+        try:
+            async with client:
+                ready.set_result(None)
+                await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"VOD MCP session closed with error: {e}")
+        finally:
+            if not ready.done():
+                ready.set_exception(RuntimeError("VOD MCP session was cancelled"))
+
+    def _is_alive(self) -> bool:
+        return (
+            self._runner is not None
+            and not self._runner.done()
+            and self._client is not None
+            and self._client.is_connected()
+        )
+
+    async def _shutdown(self):
+        if self._stop is not None:
+            self._stop.set()
+        if self._runner is not None and not self._runner.done():
+            try:
+                await asyncio.wait_for(self._runner, timeout=10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._runner.cancel()
+        self._client = self._runner = self._stop = None
+
+    async def _start(self) -> Client:
+        client = Client(self.mcp_config)
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(client, ready, self._stop))
+        try:
+            await ready
+        except Exception:
+            await self._shutdown()
+            raise
+        self._client = client
+        self._last_used = asyncio.get_running_loop().time()
+        self.starts += 1
+        logger.info(f"VOD MCP session started (starts={self.starts})")
+        return client
+
+    def _close_on_old_loop(self):
+        old_loop, stop, runner = self._loop, self._stop, self._runner
+        self._client = self._runner = self._stop = None
+        if stop is None or old_loop is None or old_loop.is_closed():
+            return
+        if old_loop.is_running():
+            # 由旧循环执行，_run 退出 Client 上下文并结束子进程
+            old_loop.call_soon_threadsafe(stop.set)
+        elif runner is not None and not runner.done():
+            runner.cancel()
+
+    async def get_client(self) -> Client:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 事件循环切换后旧会话不可用，通知旧循环关闭它
+            self._close_on_old_loop()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._is_alive():
+                idle = loop.time() - self._last_used
+                if idle < self.healthcheck_interval or await self._ping():
+                    return self._client
+                logger.warning("VOD MCP session failed health check, restarting")
+            await self._shutdown()
+            return await self._start()
+
+    async def _ping(self) -> bool:
+        try:
+            return bool(
+                await asyncio.wait_for(
+                    self._client.ping(), timeout=self.healthcheck_timeout
+                )
+            )
+        except Exception:
+            return False
+
+    async def restart(self):
+        if self._lock is None:
+            return
+        async with self._lock:
+            await self._shutdown()
+
+    async def call_tool(self, name: str, arguments: dict[str, Any], retry: bool = True):
+        """
+        :param retry: 传输层错误后是否重新发起调用；提交任务等非幂等调用应传 False，
+            避免服务端已受理时重复创建任务
+        """
+        client = await self.get_client()
+        try:
+            response = await client.call_tool(name=name, arguments=arguments)
+        except fastmcp.exceptions.ToolError:
+            raise
+        except Exception as e:
+            # 传输层错误（子进程退出、管道断开等）时重启会话，幂等调用重试一次
+            logger.warning(f"VOD MCP call `{name}` failed, restarting session: {e}")
+            await self.restart()
+            if not retry:
+                raise
+            client = await self.get_client()
+            response = await client.call_tool(name=name, arguments=arguments)
+        self._last_used = asyncio.get_running_loop().time()
+        return response
+
+    async def aclose(self):
+        await self.restart()
+
+
+# 按配置复用会话，同一配置的所有 VodToolSet 共享一个子进程
+_vod_mcp_sessions: dict[str, VodMcpSession] = {}
+
+
+def get_vod_mcp_session(mcp_config: dict) -> VodMcpSession:
+    key = json.dumps(mcp_config, sort_keys=True, default=str)
+    session = _vod_mcp_sessions.get(key)
+    if session is None:
+        session = _vod_mcp_sessions[key] = VodMcpSession(mcp_config)
+    return session
+
+
 class VodToolSet:
     def __init__(
         self,
@@ -104,34 +229,35 @@ class VodToolSet:
         space_name: Optional[str] = None,
         task_polling_interval: int = 20,
         max_retries: int = 30,
+        task_deadline: Optional[float] = None,
     ):
-        self.mcp_client = Client(mcp_config)
+        self.mcp_session = get_vod_mcp_session(mcp_config)
         self.space_name = space_name
         self.task_polling_interval = task_polling_interval
         self.max_retries = max_retries
+        # 默认总时限与原来的 轮询间隔 x 最大次数 保持一致
+        self.task_deadline = (
+            task_deadline
+            if task_deadline is not None
+            else task_polling_interval * max_retries
+        )
 
     async def list_tools(self):
-        async with self.mcp_client as client:
-            response = await client.list_tools()
-            return response
-
-    async def _call_tools(self, tool_name: str, arguments: dict[str, Any]):
-        async with self.mcp_client as client:
-            response = await client.call_tool(
-                name=tool_name,
-                arguments=arguments,
-            )
+        client = await self.mcp_session.get_client()
+        return await client.list_tools()
 
-            return [
-                json.loads(content.model_dump().get("text", ""))
-                for content in response.content
-            ]
+    async def _call_tools(
+        self, tool_name: str, arguments: dict[str, Any], retry: bool = True
+    ):
+        response = await self.mcp_session.call_tool(tool_name, arguments, retry=retry)
+        return [
+            json.loads(content.model_dump().get("text", ""))
+            for content in response.content
+        ]
 
     async def video_stitching(self, videos_url: list[str]) -> dict:
-        new_videos_url = []
-        for item in videos_url:
-            item = resolve_short_url(item)
-            new_videos_url.append(item)
+        # 批量并发解析短链接
+        new_videos_url = await short_link_client.resolve_many(videos_url)
 
         response = await self._call_tools(
             tool_name="audio_video_stitching",
@@ -140,25 +266,22 @@ class VodToolSet:
                 "SpaceName": self.space_name,
                 "videos": new_videos_url,
             },
+            # 提交合成任务不是幂等的，传输失败时不自动重发
+            retry=False,
         )
 
         task_id = response[0]["VCreativeId"]
 
-        for _ in range(self.max_retries):
-            response = await self._get_task_message(task_id)
-            status = response.get("Status", "error")
-            if status in {"success", "failed_run"}:
-                break
-            elif status == "error":
-                return {
-                    "film_url": "",
-                    "success": False,
-                    "message": "视频合成工具繁忙，请重试",
-                }
-            else:
-                await asyncio.sleep(self.task_polling_interval)
-        else:
-            return {"url": "", "status": "timeout"}
+        response = await self._wait_task(task_id)
+        if response is None:
+            return {"film_url": "", "success": False, "message": "timeout"}
+        status = response.get("Status", "error")
+        if status == "error":
+            return {
+                "film_url": "",
+                "success": False,
+                "message": "视频合成工具繁忙，请重试",
+            }
 
         return {
             "film_url": response.get("OutputJson", {}).get("url", ""),
@@ -166,6 +289,27 @@ class VodToolSet:
             "message": status,
         }
 
+    async def _wait_task(self, task_id: str) -> Optional[dict]:
+        """
+        指数退避轮询任务状态，直到任务结束或超过总时限；超时返回None
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.task_deadline
+        interval = min(VOD_TASK_POLL_INITIAL, self.task_polling_interval)
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                logger.warning(f"VOD task {task_id} exceeded {self.task_deadline}s")
+                return None
+            # 抖动避免多个任务同步轮询
+            await asyncio.sleep(min(remaining, interval * random.uniform(0.5, 1.0)))
+            response = await self._get_task_message(task_id)
+            status = response.get("Status", "error")
+            if status in {"success", "failed_run", "error"}:
+                return response
+            logger.debug(f"VOD task {task_id} status: {status}")
+            interval = min(interval * 2, self.task_polling_interval)
+
     async def _get_task_message(self, task_id: str) -> dict:
         try:
             response = await self._call_tools(
@@ -267,6 +411,11 @@ async def video_combine(video_list: List[Dict[str, Any]]) -> Dict[str, Any]:
         space_name=os.getenv("TOOLS_VOD_SPACE_NAME", None),
         task_polling_interval=int(os.getenv("TOOLS_VOD_TASK_POLLING_INTERVAL", "20")),
         max_retries=int(os.getenv("TOOLS_VOD_MAX_RETRIES", "60")),
+        task_deadline=(
+            float(os.getenv("TOOLS_VOD_TASK_DEADLINE"))
+            if os.getenv("TOOLS_VOD_TASK_DEADLINE")
+            else None
+        ),
         mcp_config=vod_mcp_config,
     )
     try:
@@ -13,15 +13,29 @@
 # limitations under the License.
 
 import os
+import asyncio
 import hashlib
 import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 
 # 配置模式
 SHORT_LINK_MODE = os.getenv(
     "SHORT_LINK_MODE", "dict"
-)  # 默认为字典模式，可选值: "redis", "dict"
+)  # 默认为字典模式，可选值: "redis", "dict", "sqlite"
+
+# 字典模式最多保留的键数量，超出后按LRU淘汰
+SHORT_LINK_MAX_ENTRIES = int(os.getenv("SHORT_LINK_MAX_ENTRIES", 100000))
+# sqlite模式的数据库文件，多个 worker 共享同一个文件
+SHORT_LINK_SQLITE_PATH = os.getenv("SHORT_LINK_SQLITE_PATH", "short_link.db")
+# 短链接有效期（秒）
+SHORT_LINK_TTL = int(os.getenv("SHORT_LINK_TTL", 24 * 3600))
 
 # 条件导入Redis
 if SHORT_LINK_MODE == "redis":
@@ -52,6 +66,144 @@ app = FastAPI(
     openapi_url=None,
 )
 
+
+# 模拟Redis客户端的异步接口
+class DictStorageClient:
+    """
+    进程内存储，支持TTL惰性过期与容量上限的LRU淘汰
+
+    所有方法内部没有 await，在单个事件循环中天然是原子的；
+    多 worker 部署时各进程互不共享，请使用 sqlite 或 redis 模式。
+    """
+
+    def __init__(self, max_entries: int = SHORT_LINK_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> (value, expires_at)，按最近使用排序
+        self.storage: OrderedDict[str, tuple[str, Optional[float]]] = OrderedDict()
+        # 计数器单独保存，不参与淘汰
+        self.counters: dict[str, int] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        entry = self.storage.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self.storage[key]
+            self.expirations += 1
+            return None
+        self.storage.move_to_end(key)
+        return value
+
+    def _evict(self, now: float):
+        # 优先淘汰最久未使用的键，顺带清理已过期的键
+        while len(self.storage) > self.max_entries:
+            _, (_, expires_at) = self.storage.popitem(last=False)
+            if expires_at is not None and expires_at <= now:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+    async def get(self, key: str):
+        return self._get(key, time.monotonic())
+
+    async def mget(self, keys: List[str]):
+        now = time.monotonic()
+        return [self._get(key, now) for key in keys]
+
+    async def setex(self, key: str, ttl: int, value: str):
+        now = time.monotonic()
+        self.storage[key] = (value, now + ttl)
+        self.storage.move_to_end(key)
+        self._evict(now)
+
+    async def incr(self, key: str):
+        value = self.counters.get(key, 0) + 1
+        self.counters[key] = value
+        return value
+
+
+class SqliteStorageClient:
+    """
+    基于 sqlite 的存储，多个 worker 进程共享同一个数据库文件，
+    自增计数器通过单条 UPSERT 语句保证跨进程原子性
+
+    sqlite 调用是阻塞的（写锁竞争时最多等待 timeout 秒），
+    因此统一放到线程池执行，避免卡住事件循环
+    """
+
+    def __init__(self, path: str = SHORT_LINK_SQLITE_PATH):
+        self.path = path
+        self._db = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        # 连接在线程池中共享，同一时刻只允许一个线程使用
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS kv "
+            "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER)"
+        )
+        self._last_purge = 0.0
+
+    def _get(self, key: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM kv WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _mget(self, keys: List[str]):
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, value FROM kv WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*keys, time.time()),
+            ).fetchall()
+        values = dict(rows)
+        return [values.get(key) for key in keys]
+
+    def _setex(self, key: str, ttl: int, value: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, value, now + ttl)
+            )
+            # 定期清理过期键，避免数据库无限增长
+            if now - self._last_purge > 60:
+                self._last_purge = now
+                self._db.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+
+    def _incr(self, key: str):
+        with self._lock:
+            return self._db.execute(
+                "INSERT INTO counters VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1 RETURNING value",
+                (key,),
+            ).fetchone()[0]
+
+    async def get(self, key: str):
+        return await asyncio.to_thread(self._get, key)
+
+    async def mget(self, keys: List[str]):
+        if not keys:
+            return []
+        return await asyncio.to_thread(self._mget, keys)
+
+    async def setex(self, key: str, ttl: int, value: str):
+        await asyncio.to_thread(self._setex, key, ttl, value)
+
+    async def incr(self, key: str):
+        return await asyncio.to_thread(self._incr, key)
+
+
 # 存储后端初始化
 if SHORT_LINK_MODE == "redis" and REDIS_AVAILABLE:
     # 连接Redis
@@ -63,46 +215,15 @@ if SHORT_LINK_MODE == "redis" and REDIS_AVAILABLE:
         db=int(os.getenv("REDIS_DB", 0)),
         decode_responses=True,
     )
+elif SHORT_LINK_MODE == "sqlite":
+    logger.info(
+        f"使用sqlite模式存储短链接 (SHORT_LINK_SQLITE_PATH={SHORT_LINK_SQLITE_PATH})"
+    )
+    storage_client = SqliteStorageClient(SHORT_LINK_SQLITE_PATH)
 else:
     # 使用字典作为存储后端
     logger.info(f"使用字典模式存储短链接 (SHORT_LINK_MODE={SHORT_LINK_MODE})")
-    # 初始化字典存储
-    dict_storage = {
-        "auto_id_counter": 0,
-        "long_md5": {},  # long:md5:{md5} -> short_code
-        "short": {},  # short:{short_code} -> url
-    }
-
-    # 模拟Redis客户端的异步接口
-    class DictStorageClient:
-        def __init__(self, storage):
-            self.storage = storage
-
-        async def get(self, key: str):
-            if key.startswith("long:md5:"):
-                md5 = key.replace("long:md5:", "")
-                return self.storage["long_md5"].get(md5)
-            elif key.startswith("short:"):
-                short_code = key.replace("short:", "")
-                return self.storage["short"].get(short_code)
-            return None
-
-        async def setex(self, key: str, ttl: int, value: str):
-            # 字典模式不支持TTL，但保留接口兼容性
-            if key.startswith("long:md5:"):
-                md5 = key.replace("long:md5:", "")
-                self.storage["long_md5"][md5] = value
-            elif key.startswith("short:"):
-                short_code = key.replace("short:", "")
-                self.storage["short"][short_code] = value
-
-        async def incr(self, key: str):
-            if key == "auto_id:counter":
-                self.storage["auto_id_counter"] += 1
-                return self.storage["auto_id_counter"]
-            return 0
-
-    storage_client = DictStorageClient(dict_storage)
+    storage_client = DictStorageClient(SHORT_LINK_MAX_ENTRIES)
 
 # 进制转换字符集
 CHAR_SET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
@@ -129,6 +250,64 @@ class URLRequest(BaseModel):
     type: str = None
 
 
+class BatchURLRequest(BaseModel):
+    urls: List[str]
+    type: str = None
+
+
+class BatchResolveRequest(BaseModel):
+    # 短码或完整短链接均可
+    short_codes: List[str]
+
+
+# 批量接口单次请求的最大条目数
+BATCH_MAX_ITEMS = int(os.getenv("SHORT_LINK_BATCH_MAX_ITEMS", 256))
+
+
+def build_short_url(short_code: str, type: Optional[str] = None) -> str:
+    domain = os.getenv("SHORT_LINK_DOMAIN", "http://localhost:8005")
+    if type:
+        return f"{domain}/t/{type}/{short_code}"
+    return f"{domain}/t/{short_code}"
+
+
+def extract_short_code(value: str) -> str:
+    """
+    从短链接中提取短码，传入短码本身时原样返回
+    """
+    return value.rstrip("/").rsplit("/", 1)[-1]
+
+
+async def _shorten(url: str, type: Optional[str] = None) -> dict:
+    # 计算URL的MD5值
+    url_md5 = hashlib.md5(url.encode()).hexdigest()
+
+    # 检查长URL是否已经生成过短码，且短码映射尚未过期或被淘汰
+    short_code = await storage_client.get(f"long:md5:{url_md5}")
+    if short_code and not await storage_client.get(f"short:{short_code}"):
+        short_code = None
+    if not short_code:
+        # 获取自增ID
+        unique_id = await storage_client.incr("auto_id:counter")
+
+        # 将自增ID转换为短码
+        short_code = encode_id(unique_id)
+
+        # 存储三个核心映射
+        await storage_client.setex(f"long:md5:{url_md5}", SHORT_LINK_TTL, short_code)
+        await storage_client.setex(f"short:{short_code}", SHORT_LINK_TTL, url)
+
+    return {"short_code": short_code, "short_url": build_short_url(short_code, type)}
+
+
+def _check_batch_size(items: List[str]):
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items in batch request, max {BATCH_MAX_ITEMS}",
+        )
+
+
 @app.post("/shorten", response_model=dict)
 async def shorten_url(request: URLRequest):
     """
@@ -136,40 +315,34 @@ async def shorten_url(request: URLRequest):
     :param url: 原始长URL
     :return: 短码和短链接
     """
-    # 计算URL的MD5值
-    url = request.url
-    url_md5 = hashlib.md5(url.encode()).hexdigest()
+    return await _shorten(request.url, request.type)
 
-    # 检查长URL是否已经生成过短码
-    existing_short_code = await storage_client.get(f"long:md5:{url_md5}")
-    if existing_short_code:
-        domain = os.getenv("SHORT_LINK_DOMAIN", "http://localhost:8005")
-        if request.type:
-            short_url = f"{domain}/t/{request.type}/{existing_short_code}"
-        else:
-            short_url = f"{domain}/t/{existing_short_code}"
-        return {
-            "short_code": existing_short_code,
-            "short_url": short_url,
-        }
-
-    # 获取自增ID
-    unique_id = await storage_client.incr("auto_id:counter")
-
-    # 将自增ID转换为短码
-    short_code = encode_id(unique_id)
-
-    # 存储三个核心映射
-    await storage_client.setex(f"long:md5:{url_md5}", 24 * 3600, short_code)
-    await storage_client.setex(f"short:{short_code}", 24 * 3600, url)
-
-    # 返回结果
-    domain = os.getenv("SHORT_LINK_DOMAIN", "http://localhost:8005")
-    if request.type:
-        short_url = f"{domain}/t/{request.type}/{short_code}"
-    else:
-        short_url = f"{domain}/t/{short_code}"
-    return {"short_code": short_code, "short_url": short_url}
+
+@app.post("/shorten/batch", response_model=dict)
+async def shorten_url_batch(request: BatchURLRequest):
+    """
+    批量生成短链接
+    :param urls: 原始长URL列表
+    :return: 与输入顺序一致的短码和短链接列表
+    """
+    _check_batch_size(request.urls)
+    results = [await _shorten(url, request.type) for url in request.urls]
+    return {"results": results}
+
+
+@app.post("/resolve/batch", response_model=dict)
+async def resolve_url_batch(request: BatchResolveRequest):
+    """
+    批量还原短链接
+    :param short_codes: 短码或短链接列表
+    :return: 与输入顺序一致的原始URL列表，未找到的条目为 null
+    """
+    _check_batch_size(request.short_codes)
+    if not request.short_codes:
+        return {"results": []}
+    keys = [f"short:{extract_short_code(code)}" for code in request.short_codes]
+    urls = await storage_client.mget(keys)
+    return {"results": [url.strip('"') if url else None for url in urls]}
 
 
 @app.get("/t/{short_code}")
@@ -179,10 +352,10 @@ async def redirect_url(short_code: str, type: str = None):
     短链接跳转
     :param type: 资源类型 (可选)
     :param short_code: 短码
-    :return: 重定向到原始长URL
+    :return: 302 重定向到原始长URL
     """
     # 获取原始长URL
     url = await storage_client.get(f"short:{short_code}")
     if not url:
         raise HTTPException(status_code=404, detail="Short code not found")
-    return url.strip('"')
+    return RedirectResponse(url.strip('"'), status_code=302)
@@ -0,0 +1,205 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+短链接服务压测脚本，对比不同存储模式下 shorten / redirect 的 QPS 与延迟
+
+用法:
+    # 依次以 dict / sqlite / redis 模式启动服务并压测
+    python benchmark.py --modes dict,sqlite,redis --requests 5000 --concurrency 64
+
+    # 压测已经启动的服务
+    python benchmark.py --base-url http://127.0.0.1:8005
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import aiohttp
+
+
+async def run_phase(name, requests, concurrency, send):
+    """
+    以固定并发执行一组请求，返回QPS与延迟分位数
+    """
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for item in requests:
+        queue.put_nowait(item)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            item = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                await send(item)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "phase": name,
+        "qps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000
+        if latencies
+        else 0.0,
+        "errors": errors,
+    }
+
+
+async def benchmark(base_url: str, total: int, concurrency: int, batch_size: int):
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        run_id = uuid.uuid4().hex[:8]
+        urls = [f"https://example.com/{run_id}/{i}.png" for i in range(total)]
+        short_urls = []
+
+        async def shorten(url):
+            async with session.post(
+                f"{base_url}/shorten", json={"url": url, "type": "image"}
+            ) as response:
+                response.raise_for_status()
+                short_urls.append((await response.json())["short_url"])
+
+        async def redirect(short_url):
+            async with session.get(short_url, allow_redirects=False) as response:
+                if response.status not in (301, 302, 307, 308):
+                    raise RuntimeError(f"unexpected status {response.status}")
+
+        async def shorten_batch(chunk):
+            async with session.post(
+                f"{base_url}/shorten/batch", json={"urls": chunk, "type": "image"}
+            ) as response:
+                response.raise_for_status()
+
+        results = [
+            await run_phase("shorten", urls, concurrency, shorten),
+            await run_phase("redirect", list(short_urls), concurrency, redirect),
+        ]
+        chunks = [
+            [f"{url}?batch" for url in urls[i : i + batch_size]]
+            for i in range(0, total, batch_size)
+        ]
+        batch = await run_phase("shorten_batch", chunks, concurrency, shorten_batch)
+        # 按URL数量折算批量接口的吞吐
+        batch["qps"] *= batch_size
+        batch["phase"] = f"shorten_batch x{batch_size}"
+        results.append(batch)
+        return results
+
+
+async def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/t/__ready__") as response:
+                    if response.status in (302, 404):
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Service at {base_url} is not ready")
+
+
+def start_service(mode: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, SHORT_LINK_MODE=mode)
+    env["SHORT_LINK_DOMAIN"] = f"http://127.0.0.1:{port}"
+    if mode == "sqlite":
+        env["SHORT_LINK_SQLITE_PATH"] = os.path.join(
+            tempfile.mkdtemp(), "short_link.db"
+        )
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+
+
+def print_results(label: str, results: list[dict]):
+    print(f"\n== {label} ==")
+    print(f"{'phase':<20}{'qps':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'errors':>8}")
+    for r in results:
+        print(
+            f"{r['phase']:<20}{r['qps']:>10.0f}{r['p50_ms']:>10.2f}"
+            f"{r['p99_ms']:>10.2f}{r['errors']:>8}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Short link service benchmark")
+    parser.add_argument("--base-url", help="压测已启动的服务，不再自动拉起")
+    parser.add_argument("--modes", default="dict,sqlite", help="逗号分隔的存储模式")
+    parser.add_argument("--port", type=int, default=8095)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker 数")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.base_url:
+        results = await benchmark(
+            args.base_url, args.requests, args.concurrency, args.batch_size
+        )
+        print_results(args.base_url, results)
+        return
+
+    for mode in args.modes.split(","):
+        if mode == "dict" and args.workers > 1:
+            # 字典模式各 worker 互不共享，跳转请求会落到没有该短码的进程
+            print(f"\n== {mode} == skipped: dict mode requires --workers 1")
+            continue
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = start_service(mode, args.port, args.workers)
+        try:
+            await wait_ready(base_url)
+            results = await benchmark(
+                base_url, args.requests, args.concurrency, args.batch_size
+            )
+            print_results(f"{mode} (workers={args.workers})", results)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
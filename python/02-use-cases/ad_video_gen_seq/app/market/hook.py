@@ -12,20 +12,55 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import tempfile
+import asyncio
+import ipaddress
 import os
 import re
-import ipaddress
+import time
+from collections import OrderedDict
 from typing import Optional, Tuple, List, Dict
-import requests
+from urllib.parse import unquote, urlparse
 
+import aiohttp
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.run_config import StreamingMode
 from google.adk.models.llm_request import LlmRequest
 from google.adk.models.llm_response import LlmResponse
 from google.genai import types
-
-from app.utils import upload_file_to_tos
+from veadk.utils.logger import get_logger
+
+from app.utils import media_upload_cache
+
+logger = get_logger(__name__)
+
+# URL 类型探测配置
+MIME_TYPE_MAX_CONNECTIONS = int(os.getenv("MIME_TYPE_MAX_CONNECTIONS", "16"))
+MIME_TYPE_TIMEOUT = float(os.getenv("MIME_TYPE_TIMEOUT", "5"))
+MIME_TYPE_CACHE_SIZE = int(os.getenv("MIME_TYPE_CACHE_SIZE", "2048"))
+MIME_TYPE_CACHE_TTL = float(os.getenv("MIME_TYPE_CACHE_TTL", "3600"))
+
+URL_PATTERN = re.compile(
+    r"https?://"
+    r"(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+(?:[a-zA-Z]{2,6}\.?|[a-zA-Z0-9-]{2,}\.?)"
+    r"(?::\d+)?"
+    r"(?:/[a-zA-Z0-9\-._~%!$&\'()*+,;=:@/]*|/%[0-9A-Fa-f]{2})*"
+    r"(?:\?[a-zA-Z0-9\-._~%!$&\'()*+,;=:@/?%]*)?",
+    re.IGNORECASE,
+)
+
+EXTENSION_TO_MIME = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "bmp": "image/bmp",
+    "svg": "image/svg+xml",
+    "tiff": "image/tiff",
+    "tif": "image/tiff",
+    "ico": "image/x-icon",
+}
+IMAGE_MIME_TYPES = frozenset(EXTENSION_TO_MIME.values())
 
 
 def is_internal_ip(hostname: str) -> bool:
@@ -43,7 +78,114 @@ def is_internal_ip(hostname: str) -> bool:
         return False
 
 
-def get_url_mime_type(url: str) -> Optional[str]:
+class UrlMimeTypeResolver:
+    """
+    异步探测URL的图片MIME类型
+
+    优先按扩展名判断，否则通过共享连接池发送 HEAD 请求；结果（包括非图片）按URL缓存，
+    同一URL的并发探测只发起一次请求。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MIME_TYPE_MAX_CONNECTIONS,
+        timeout: float = MIME_TYPE_TIMEOUT,
+        cache_size: int = MIME_TYPE_CACHE_SIZE,
+        cache_ttl: float = MIME_TYPE_CACHE_TTL,
+    ):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # url -> (mime_type, expires_at)
+        self._cache: OrderedDict[str, tuple[Optional[str], float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # 会话与事件循环绑定，循环切换后需要重建
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._session_loop = loop
+            self._inflight.clear()
+        return self._session
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def _cache_get(self, url: str) -> tuple[bool, Optional[str]]:
+        entry = self._cache.get(url)
+        if entry is None:
+            return False, None
+        mime_type, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._cache[url]
+            return False, None
+        self._cache.move_to_end(url)
+        return True, mime_type
+
+    def _cache_put(self, url: str, mime_type: Optional[str]):
+        self._cache[url] = (mime_type, time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _head(self, url: str) -> Optional[str]:
+        try:
+            session = self._get_session()
+            async with session.head(url, allow_redirects=True) as response:
+                content_type = response.headers.get("Content-Type", "")
+        except Exception as e:
+            logger.debug(f"Failed to detect mime type of {url}: {e}")
+            return None
+        mime_type = content_type.split(";")[0].strip().lower()
+        mime_type = mime_type if mime_type in IMAGE_MIME_TYPES else None
+        self._cache_put(url, mime_type)
+        return mime_type
+
+    async def resolve(self, url: str) -> Optional[str]:
+        """
+        返回URL的图片MIME类型，如果不是图片或获取失败返回None
+        """
+        path = unquote(urlparse(url).path)
+        extension = path.split(".")[-1].lower() if "." in path else ""
+        if extension in EXTENSION_TO_MIME:
+            return EXTENSION_TO_MIME[extension]
+
+        found, mime_type = self._cache_get(url)
+        if found:
+            return mime_type
+
+        self._get_session()
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._head(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # shield：某个调用方被取消时不影响其他等待同一URL的调用方
+        return await asyncio.shield(task)
+
+
+mime_type_resolver = UrlMimeTypeResolver()
+
+
+async def get_url_mime_type(url: str) -> Optional[str]:
     """
     获取URL的MIME类型
     参数:
@@ -51,49 +193,7 @@ def get_url_mime_type(url: str) -> Optional[str]:
     返回:
         Optional[str]: MIME类型，如果不是图片或获取失败返回None
     """
-    extension_to_mime = {
-        "jpg": "image/jpeg",
-        "jpeg": "image/jpeg",
-        "png": "image/png",
-        "gif": "image/gif",
-        "webp": "image/webp",
-        "bmp": "image/bmp",
-        "svg": "image/svg+xml",
-        "tiff": "image/tiff",
-        "tif": "image/tiff",
-        "ico": "image/x-icon",
-    }
-
-    try:
-        from urllib.parse import urlparse, unquote
-
-        parsed = urlparse(url)
-        path = unquote(parsed.path)
-
-        extension = path.split(".")[-1].lower() if "." in path else ""
-        if extension in extension_to_mime:
-            return extension_to_mime[extension]
-
-        response = requests.head(url, timeout=5, allow_redirects=True)
-        content_type = response.headers.get("Content-Type", "")
-
-        if content_type:
-            mime_type = content_type.split(";")[0].strip().lower()
-            image_mime_types = [
-                "image/jpeg",
-                "image/png",
-                "image/gif",
-                "image/webp",
-                "image/bmp",
-                "image/svg+xml",
-                "image/tiff",
-                "image/x-icon",
-            ]
-            if mime_type in image_mime_types:
-                return mime_type
-        return None
-    except Exception:
-        return None
+    return await mime_type_resolver.resolve(url)
 
 
 def is_safe_url(url: str) -> bool:
@@ -105,8 +205,6 @@ def is_safe_url(url: str) -> bool:
         bool: 如果URL安全返回True，否则返回False
     """
     try:
-        from urllib.parse import urlparse
-
         parsed = urlparse(url)
         hostname = parsed.hostname
 
@@ -118,7 +216,7 @@ def is_safe_url(url: str) -> bool:
         return False
 
 
-def process_urls_with_mime_types(text: str) -> Tuple[List[Dict[str, str]], str]:
+async def process_urls_with_mime_types(text: str) -> Tuple[List[Dict[str, str]], str]:
     """
     处理文本中的URL，提取图片类型的URL并修改文本
     参数:
@@ -131,46 +229,28 @@ def process_urls_with_mime_types(text: str) -> Tuple[List[Dict[str, str]], str]:
     if not isinstance(text, str) or text.strip() == "":
         return [], text
 
-    url_start_pattern = re.compile(r"https?://", re.IGNORECASE)
-
-    urls = []
-    for match in url_start_pattern.finditer(text):
-        start_pos = match.start()
-        url_pattern = re.compile(
-            r"https?://"
-            r"(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+(?:[a-zA-Z]{2,6}\.?|[a-zA-Z0-9-]{2,}\.?)"
-            r"(?::\d+)?"
-            r"(?:/[a-zA-Z0-9\-._~%!$&\'()*+,;=:@/]*|/%[0-9A-Fa-f]{2})*"
-            r"(?:\?[a-zA-Z0-9\-._~%!$&\'()*+,;=:@/?%]*)?",
-            re.IGNORECASE,
-        )
-        url_match = url_pattern.match(text, start_pos)
-
-        if url_match:
-            url = url_match.group()
-            if url not in urls:
-                urls.append(url)
-
-    image_urls = []
-    modified_text = text
-    image_idx = 0
+    # 一次扫描提取全部URL，按出现顺序去重
+    urls = list(dict.fromkeys(m.group() for m in URL_PATTERN.finditer(text)))
+    urls = [url for url in urls if is_safe_url(url)]
+    if not urls:
+        return [], text
 
-    for url in urls:
-        if not is_safe_url(url):
-            continue
+    mime_types = await asyncio.gather(*(get_url_mime_type(url) for url in urls))
 
-        mime_type = get_url_mime_type(url)
+    image_urls = []
+    labels = {}
+    for url, mime_type in zip(urls, mime_types):
         if mime_type:
-            image_idx += 1
             image_urls.append({"url": url, "mime_type": mime_type})
-            modified_text = modified_text.replace(url, f"{url} (图片{image_idx})")
+            labels[url] = f"{url} (图片{len(image_urls)})"
         else:
-            modified_text = modified_text.replace(url, f"{url} (识别为非图片)")
+            labels[url] = f"{url} (识别为非图片)"
 
+    modified_text = URL_PATTERN.sub(lambda m: labels.get(m.group(), m.group()), text)
     return image_urls, modified_text
 
 
-def hook_inline_data_transform(
+async def hook_inline_data_transform(
     callback_context: CallbackContext,
 ) -> Optional[types.Content]:
     user_content = callback_context.user_content
@@ -185,28 +265,22 @@ def hook_inline_data_transform(
                 )
             )
         if part.inline_data:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-                tmp_file.write(part.inline_data.data)
-                tmp_file_path = tmp_file.name
-
-            try:
-                file_uri = upload_file_to_tos(tmp_file_path)
-                if file_uri:
-                    image_idx += 1
-                    new_parts.append(
-                        types.Part(
-                            text=f"图片URL: {file_uri}",
-                        )
+            # Content-addressed upload, the same image is uploaded only once
+            file_uri = await media_upload_cache.aget_or_upload(
+                part.inline_data.data, part.inline_data.mime_type or "image/jpeg"
+            )
+            if file_uri:
+                image_idx += 1
+                new_parts.append(
+                    types.Part(
+                        text=f"图片URL: {file_uri}",
                     )
-
-            finally:
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
+                )
 
     user_content.parts = new_parts
 
 
-def hook_input_urls(
+async def hook_input_urls(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> Optional[LlmResponse]:
     callback_context.state["cb_agent_state"] = (
@@ -219,7 +293,7 @@ def hook_input_urls(
         if len(llm_request.contents) > 0:
             for part in llm_request.contents[0].parts:
                 if part.text:
-                    url_list, new_text = process_urls_with_mime_types(part.text)
+                    url_list, new_text = await process_urls_with_mime_types(part.text)
                     new_parts.append(
                         types.Part(
                             text=new_text,
@@ -14,12 +14,16 @@
 
 # adapted from Google ADK models adk-python/blob/main/src/google/adk/models/lite_llm.py at f1f44675e4a86b75e72cfd838efd8a0399f23e24 · google/adk-python
 
+import asyncio
 import base64
+import importlib.util
 import json
+import os
 import time
 from typing import Any, Dict, Union, AsyncGenerator, Tuple, List, Optional, Literal
 from typing_extensions import override
 
+import httpx
 from google.adk.models import LlmRequest, LlmResponse, Gemini
 from google.genai import types
 from pydantic import Field, BaseModel
@@ -56,6 +60,8 @@ from veadk.config import settings
 from veadk.consts import DEFAULT_VIDEO_MODEL_API_BASE
 from veadk.utils.logger import get_logger
 
+from app.utils import media_upload_cache
+
 logger = get_logger(__name__)
 
 
@@ -148,6 +154,10 @@ def _schema_to_dict(schema: types.Schema | dict[str, Any]) -> dict:
     return schema_dict
 
 
+# Inline image/video params whose URL is filled in after uploading
+_InlineMedia = List[Tuple[Dict[str, Any], types.Blob]]
+
+
 # -----------------------------------------------------------------
 # inputs param transform ------------------------------------------
 def _file_data_to_content_param(
@@ -189,21 +199,35 @@ def _file_data_to_content_param(
     )
 
 
-def _inline_data_to_content_param(part: types.Part) -> ResponseInputContentParam:
+def _inline_data_to_data_url(inline_data: types.Blob, mime_type: str) -> str:
+    base64_string = base64.b64encode(inline_data.data).decode("utf-8")
+    return f"data:{mime_type};base64,{base64_string}"
+
+
+def _inline_data_to_content_param(
+    part: types.Part,
+    inline_media: Optional[_InlineMedia] = None,
+) -> ResponseInputContentParam:
     mime_type = (
         part.inline_data.mime_type if part.inline_data else None
     ) or "application/octet-stream"
-    base64_string = base64.b64encode(part.inline_data.data).decode("utf-8")
-    data_uri = f"data:{mime_type};base64,{base64_string}"
+    if inline_media is not None and mime_type.startswith(("image", "video")):
+        # Filled in later by _resolve_inline_media with a signed URL
+        media_uri = None
+    else:
+        media_uri = _inline_data_to_data_url(part.inline_data, mime_type)
 
     if mime_type.startswith("image"):
-        return ResponseInputImageParam(
+        image_param = ResponseInputImageParam(
             type="input_image",
-            image_url=data_uri,
+            image_url=media_uri,
             detail="auto",
         )
+        if media_uri is None:
+            inline_media.append((image_param, part.inline_data))
+        return image_param
     if mime_type.startswith("video"):
-        param: Dict[str, Any] = {"video_url": data_uri}
+        param: Dict[str, Any] = {"video_url": media_uri}
         if getattr(part, "video_metadata", None):
             video_metadata = part.video_metadata
             if isinstance(video_metadata, dict):
@@ -212,21 +236,53 @@ def _inline_data_to_content_param(part: types.Part) -> ResponseInputContentParam
                 fps = getattr(video_metadata, "fps", None)
             if fps is not None:
                 param["fps"] = fps
-        return ResponseInputVideoParam(
+        video_param = ResponseInputVideoParam(
             type="input_video",
             **param,
         )
+        if media_uri is None:
+            inline_media.append((video_param, part.inline_data))
+        return video_param
 
-    file_param: Dict[str, Any] = {"file_data": data_uri}
+    file_param: Dict[str, Any] = {"file_data": media_uri}
     return ResponseInputFileParam(
         type="input_file",
         **file_param,
     )
 
 
+async def _resolve_inline_media(
+    inline_media: _InlineMedia,
+) -> None:
+    """
+    Prefer a cached signed URL over megabytes of base64 in every request.
+    Only media of the items actually sent is collected; hashing and uploading
+    run off the event loop, falling back to a data URL when the upload fails.
+    """
+    blobs = {id(inline_data.data): inline_data for _, inline_data in inline_media}
+    if not blobs:
+        return
+    signed_urls = await asyncio.gather(
+        *(
+            media_upload_cache.aget_or_upload(d.data, d.mime_type)
+            for d in blobs.values()
+        )
+    )
+    media_uris = dict(zip(blobs, signed_urls))
+    for param, inline_data in inline_media:
+        media_uri = media_uris[id(inline_data.data)] or _inline_data_to_data_url(
+            inline_data, inline_data.mime_type
+        )
+        if param["type"] == "input_image":
+            param["image_url"] = media_uri
+        else:
+            param["video_url"] = media_uri
+
+
 def _get_content(
     parts: List[types.Part],
     role: Literal["user", "system", "developer", "assistant"],
+    inline_media: Optional[_InlineMedia] = None,
 ) -> Optional[EasyInputMessageParam]:
     content = []
     for part in parts:
@@ -238,7 +294,7 @@ def _get_content(
                 )
             )
         elif part.inline_data and part.inline_data.data:
-            content.append(_inline_data_to_content_param(part))
+            content.append(_inline_data_to_content_param(part, inline_media))
         elif part.file_data:  # file_id和file_url
             content.append(_file_data_to_content_param(part))
     if len(content) > 0:
@@ -249,6 +305,7 @@ def _get_content(
 
 def _content_to_input_item(
     content: types.Content,
+    inline_media: Optional[_InlineMedia] = None,
 ) -> Union[ResponseInputItemParam, List[ResponseInputItemParam]]:
     role = _to_ark_role(content.role)
 
@@ -266,7 +323,9 @@ def _content_to_input_item(
     if input_list:
         return input_list if len(input_list) > 1 else input_list[0]
 
-    input_content = _get_content(content.parts, role=role) or None
+    input_content = (
+        _get_content(content.parts, role=role, inline_media=inline_media) or None
+    )
 
     if role == "user":
         # 2. Process the user's message
@@ -361,8 +420,46 @@ def _responses_schema_to_text(
     )
 
 
+def _is_trailing_input_item(item: ResponseInputItemParam) -> bool:
+    return item.get("type") == "function_call_output" or item.get("role") == "user"
+
+
+def _get_trailing_input_items(
+    contents: List[types.Content],
+    inline_media: Optional[_InlineMedia] = None,
+) -> List[ResponseInputItemParam]:
+    """
+    Convert only the trailing contents that survive `filtered_inputs`.
+    Walks the history backwards and stops at the first non-user item, so the
+    per-turn cost is O(new messages) instead of O(history).
+    Inline images/videos of the returned items are collected into
+    `inline_media` when given.
+    """
+    new_inputs: List[ResponseInputItemParam] = []
+    for content in reversed(contents):
+        # Each content represents `one conversation`.
+        # This `one conversation` may contain `multiple pieces of content`,
+        # but it cannot contain `multiple conversations`.
+        # Media is kept only once the content is known to be sent
+        content_media = None if inline_media is None else []
+        input_item_or_list = _content_to_input_item(content, content_media)
+        if not input_item_or_list:
+            continue
+        if not isinstance(input_item_or_list, list):
+            input_item_or_list = [input_item_or_list]
+        for item in reversed(input_item_or_list):
+            if not _is_trailing_input_item(item):
+                return new_inputs[::-1]
+            new_inputs.append(item)
+        if content_media:
+            inline_media.extend(content_media)
+
+    return new_inputs[::-1]
+
+
 def _get_responses_inputs(
     llm_request: LlmRequest,
+    inline_media: Optional[_InlineMedia] = None,
 ) -> Tuple[
     Optional[str],
     Optional[List[ResponseInputItemParam]],
@@ -375,16 +472,9 @@ def _get_responses_inputs(
     if llm_request.config and llm_request.config.system_instruction:
         instructions = llm_request.config.system_instruction
     # 1. input
-    input_params: Optional[List[ResponseInputItemParam]] = []
-    for content in llm_request.contents or []:
-        # Each content represents `one conversation`.
-        # This `one conversation` may contain `multiple pieces of content`,
-        # but it cannot contain `multiple conversations`.
-        input_item_or_list = _content_to_input_item(content)
-        if isinstance(input_item_or_list, list):
-            input_params.extend(input_item_or_list)
-        elif input_item_or_list:
-            input_params.append(input_item_or_list)
+    input_params: Optional[List[ResponseInputItemParam]] = _get_trailing_input_items(
+        llm_request.contents or [], inline_media
+    )
 
     # 2. Convert tool declarations
     tools: Optional[List[FunctionToolParam]] = None
@@ -448,7 +538,7 @@ def filtered_inputs(
     # Collect all consecutive user messages from the end
     new_inputs = []
     for m in reversed(inputs):  # Skip the first message
-        if m.get("type") == "function_call_output" or m.get("role") == "user":
+        if _is_trailing_input_item(m):
             new_inputs.append(m)
         else:
             break  # Stop when we encounter a non-user message
@@ -631,7 +721,91 @@ def ark_response_to_generate_content_response(
     return llm_response
 
 
+class ArkClientRegistry:
+    """
+    Process-wide registry of long-lived `AsyncArk` clients keyed by (api_base, api_key).
+    Each client owns a keep-alive httpx pool, so consecutive turns reuse warm
+    connections instead of paying DNS/TCP/TLS setup on every request.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = int(os.getenv("ARK_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections: int = int(
+            os.getenv("ARK_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+        ),
+        keepalive_expiry: float = float(os.getenv("ARK_HTTP_KEEPALIVE_EXPIRY", "60")),
+        http2: bool = os.getenv("ARK_HTTP2", "true").lower() in {"1", "true", "yes"},
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # HTTP/2 needs the optional `h2` package, fall back to HTTP/1.1 keep-alive otherwise
+        self._http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._clients: Dict[Tuple[str, str], AsyncArk] = {}
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, api_base: str, api_key: str) -> AsyncArk:
+        key = (api_base, api_key)
+        client = self._clients.get(key)
+        if client is not None and not client.is_closed():
+            self.hits += 1
+            return client
+
+        async with self._lock:
+            # Double check in case another coroutine created it meanwhile
+            client = self._clients.get(key)
+            if client is not None and not client.is_closed():
+                self.hits += 1
+                return client
+
+            self.misses += 1
+            client = AsyncArk(
+                base_url=api_base,
+                api_key=api_key,
+                http_client=httpx.AsyncClient(
+                    limits=self._limits,
+                    http2=self._http2,
+                    follow_redirects=True,
+                ),
+            )
+            self._clients[key] = client
+            logger.info(
+                f"Created pooled AsyncArk client for {api_base} (http2={self._http2})"
+            )
+            return client
+
+    async def aclose(self) -> None:
+        """Close every pooled client, call it on application shutdown."""
+        async with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close AsyncArk client: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "clients": len(self._clients),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Global instance, shared by every ArkLlm of the process
+ark_client_registry = ArkClientRegistry()
+
+
 class ArkLlmClient:
+    def __init__(self, registry: Optional[ArkClientRegistry] = None):
+        self.registry = registry or ark_client_registry
+
     async def aresponse(
         self, **kwargs
     ) -> Union[ArkTypeResponse, AsyncStream[ResponseStreamEvent]]:
@@ -639,15 +813,15 @@ class ArkLlmClient:
         api_base = kwargs.pop("api_base", DEFAULT_VIDEO_MODEL_API_BASE)
         api_key = kwargs.pop("api_key", settings.model.api_key)
 
-        # 2. Call openai responses
-        client = AsyncArk(
-            base_url=api_base,
-            api_key=api_key,
-        )
+        # 2. Call openai responses with a pooled client
+        client = await self.registry.get(api_base, api_key)
 
         raw_response = await client.responses.create(**kwargs)
         return raw_response
 
+    async def aclose(self) -> None:
+        await self.registry.aclose()
+
 
 class ArkLlm(Gemini):
     model: str
@@ -688,9 +862,11 @@ class ArkLlm(Gemini):
         self._maybe_append_user_content(llm_request)
         # logger.debug(_build_request_log(llm_request))
 
+        inline_media: _InlineMedia = []
         instructions, input_param, tools, text_format, generation_params = (
-            _get_responses_inputs(llm_request)
+            _get_responses_inputs(llm_request, inline_media)
         )
+        await _resolve_inline_media(inline_media)
 
         if "functions" in self._additional_args:
             # LiteLLM does not support both tools and functions together.
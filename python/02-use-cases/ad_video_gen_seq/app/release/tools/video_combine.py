@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import json
+import shutil
+import time
 import urllib.parse
 import os
 import random
@@ -22,6 +26,7 @@ from typing import Optional
 
 import aiohttp
 from moviepy import CompositeVideoClip, VideoFileClip
+from moviepy.config import FFMPEG_BINARY
 from veadk.config import veadk_environments  # noqa
 from veadk.utils.logger import get_logger
 
@@ -29,11 +34,266 @@ from app.utils import url_shortener
 
 logger = get_logger(__name__)
 
+MAX_FILE_SIZE = 512 * 1024 * 1024  # 512MB 上限
+DOWNLOAD_CONCURRENCY = int(os.getenv("VIDEO_COMBINE_DOWNLOAD_CONCURRENCY", "8"))
+# moviepy 自带的 ffmpeg 不含 ffprobe，优先使用同目录或 PATH 中的 ffprobe
+FFPROBE_BINARY = (
+    os.getenv("FFPROBE_BINARY")
+    or shutil.which("ffprobe", path=os.path.dirname(FFMPEG_BINARY) or None)
+    or shutil.which("ffprobe")
+)
+
+# 决定能否直接拷贝码流的流参数
+VIDEO_SIGNATURE_KEYS = (
+    "codec_name",
+    "profile",
+    "level",
+    "pix_fmt",
+    "width",
+    "height",
+    "sample_aspect_ratio",
+    "r_frame_rate",
+    "time_base",
+)
+AUDIO_SIGNATURE_KEYS = ("codec_name", "sample_rate", "channel_layout", "channels")
+
 
 def resolve_short_url(code: str) -> str:
     return url_shortener.code2url(code)
 
 
+async def _download_video(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    idx: int,
+    total: int,
+    url: str,
+    temp_dir: str,
+) -> Optional[str]:
+    async with semaphore:
+        try:
+            # 下载视频
+            logger.info(f"Downloading video {idx + 1}/{total} from {url}")
+
+            async with session.get(url, allow_redirects=True) as response:
+                response.raise_for_status()
+                # 预检查内容大小，防止极端大文件下载
+                content_length = response.headers.get("content-length")
+                if content_length is not None:
+                    try:
+                        if int(content_length) > MAX_FILE_SIZE:
+                            logger.error(
+                                f"Video size {int(content_length)} exceeds limit {MAX_FILE_SIZE}."
+                            )
+                            return None
+                    except ValueError:
+                        # 如果 content-length 无法解析，继续按流式大小校验
+                        pass
+
+                # 从content-type提取文件扩展名
+                content_type = response.headers.get("content-type", "")
+                file_extension = ".mp4"  # 默认扩展名
+                if "video" in content_type:
+                    if "mp4" in content_type:
+                        file_extension = ".mp4"
+                    elif "webm" in content_type:
+                        file_extension = ".webm"
+                    elif "ogg" in content_type:
+                        file_extension = ".ogg"
+                    elif "mov" in content_type:
+                        file_extension = ".mov"
+
+                # 按序号命名，保证拼接顺序与输入一致
+                temp_file_path = os.path.join(
+                    temp_dir,
+                    f"video_{idx:03d}_{random.randint(100000, 999999)}{file_extension}",
+                )
+
+                # 按流式传输进行大小限制（兜底）
+                total_size = 0
+                with open(temp_file_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        if chunk:
+                            total_size += len(chunk)
+                            if total_size > MAX_FILE_SIZE:
+                                logger.error(
+                                    "Video size exceeds 512MB. Download stopped."
+                                )
+                                return None
+                            f.write(chunk)
+
+            if os.path.exists(temp_file_path) and os.path.getsize(temp_file_path) > 0:
+                logger.info(
+                    f"Successfully downloaded video {idx + 1} to {temp_file_path}, size: {total_size / 1024 / 1024:.2f} MB"
+                )
+                return temp_file_path
+            logger.error(
+                f"Failed to download video {idx + 1}: file is empty or doesn't exist"
+            )
+            return None
+
+        except Exception as e:
+            logger.error(f"Error downloading video {idx + 1} from {url}: {e}")
+            return None
+
+
+async def _run_ffmpeg(*args: str) -> tuple[int, str]:
+    process = await asyncio.create_subprocess_exec(
+        FFMPEG_BINARY,
+        "-hide_banner",
+        *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    return process.returncode, stderr.decode("utf-8", errors="ignore")
+
+
+async def _run_ffprobe(*args: str) -> Optional[dict]:
+    if not FFPROBE_BINARY:
+        return None
+    process = await asyncio.create_subprocess_exec(
+        FFPROBE_BINARY,
+        "-v",
+        "error",
+        "-of",
+        "json",
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        return None
+    try:
+        return json.loads(stdout)
+    except ValueError:
+        return None
+
+
+async def _probe_stream_signature(file_path: str) -> Optional[tuple]:
+    """
+    通过 ffprobe 读取视频/音频流的编码参数，参数完全一致的片段才能直接 stream copy 拼接；
+    无法探测（例如缺少 ffprobe）时返回 None，走重新编码
+    """
+    info = await _run_ffprobe("-show_streams", file_path)
+    if not info:
+        return None
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        return None
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    return (
+        tuple(video.get(key) for key in VIDEO_SIGNATURE_KEYS),
+        tuple(audio.get(key) for key in AUDIO_SIGNATURE_KEYS) if audio else None,
+    )
+
+
+async def _probe_duration(file_path: str) -> Optional[float]:
+    info = await _run_ffprobe("-show_format", file_path)
+    try:
+        return float(info["format"]["duration"])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+async def _verify_concat(files: List[str], output_file_path: str) -> bool:
+    """
+    校验 stream copy 的结果：ffprobe 可读且时长与各片段之和一致，
+    避免 ffmpeg 返回 0 但输出无法播放
+    """
+    durations = await asyncio.gather(
+        *[_probe_duration(path) for path in [output_file_path, *files]]
+    )
+    if any(duration is None for duration in durations):
+        return False
+    expected = sum(durations[1:])
+    return abs(durations[0] - expected) <= max(0.5, 0.02 * expected)
+
+
+async def _concat_stream_copy(files: List[str], output_file_path: str) -> bool:
+    """
+    使用 FFmpeg concat demuxer 直接拷贝码流拼接，不重新编码
+    """
+    list_file_path = os.path.join(os.path.dirname(output_file_path), "concat.txt")
+    with open(list_file_path, "w", encoding="utf-8") as f:
+        for file_path in files:
+            escaped = file_path.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    returncode, stderr = await _run_ffmpeg(
+        "-y",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        list_file_path,
+        "-c",
+        "copy",
+        "-movflags",
+        "+faststart",
+        output_file_path,
+    )
+    if returncode != 0:
+        logger.warning(f"Stream copy concat failed: {stderr[-500:]}")
+        return False
+    if not await _verify_concat(files, output_file_path):
+        logger.warning("Stream copy concat output failed verification")
+        return False
+    return True
+
+
+def _concat_reencode(files: List[str], output_file_path: str) -> None:
+    """
+    编码参数不一致时，单次重新编码拼接
+    """
+    video_clips = []
+    start_times = []
+    clip_start_time = 0.0
+
+    try:
+        for file_path in files:
+            start_times.append(clip_start_time)
+
+            clip = VideoFileClip(file_path)
+            video_clips.append(clip)
+
+            clip_start_time += clip.duration
+
+        clips = []
+        for video_clip, start_time in zip(video_clips, start_times):
+            positioned_clip = video_clip.with_start(start_time).with_position("center")
+            clips.append(positioned_clip)
+        final_clip = CompositeVideoClip(clips)
+
+        logger.info(f"Saving merged video to {output_file_path}")
+        final_clip.write_videofile(
+            output_file_path,
+            codec="libx264",
+            audio_codec="aac",
+            threads=os.cpu_count() or 4,
+        )
+    finally:
+        for clip in video_clips:
+            try:
+                if hasattr(clip, "reader") and clip.reader:
+                    clip.reader.close()
+                if hasattr(clip, "audio_reader") and clip.audio_reader:
+                    clip.audio_reader.close_proc()
+                    clip.audio_reader.close()
+                clip.close()
+            except Exception as e:
+                logger.error(f"Error closing video clip: {e}")
+        if "final_clip" in locals():
+            try:
+                if hasattr(final_clip, "close"):
+                    final_clip.close()
+            except Exception as e:
+                logger.error(f"Error closing final clip: {e}")
+
+
 async def video_combine(video_codes: List[str]) -> Optional[str]:
     """
     合并多个视频URL为一个视频文件
@@ -68,84 +328,22 @@ async def video_combine(video_codes: List[str]) -> Optional[str]:
             continue
         resolved_urls.append(resolved_url)
 
-    # 下载视频文件
-    downloaded_files = []
-
+    # 并发下载视频文件，结果顺序与输入一致
+    download_start = time.perf_counter()
+    semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
     async with aiohttp.ClientSession() as session:
-        for idx, code in enumerate(resolved_urls):
-            try:
-                # 下载视频
-                logger.info(
-                    f"Downloading video {idx + 1}/{len(resolved_urls)} from {code}"
+        downloaded_files = await asyncio.gather(
+            *[
+                _download_video(
+                    session, semaphore, idx, len(resolved_urls), url, temp_dir
                 )
+                for idx, url in enumerate(resolved_urls)
+            ]
+        )
+    download_elapsed = time.perf_counter() - download_start
 
-                async with session.get(code, allow_redirects=True) as response:
-                    response.raise_for_status()
-                    # 预检查内容大小，防止极端大文件下载
-                    content_length = response.headers.get("content-length")
-                    max_file_size = 512 * 1024 * 1024  # 512MB 上限
-                    if content_length is not None:
-                        try:
-                            if int(content_length) > max_file_size:
-                                logger.error(
-                                    f"Video size {int(content_length)} exceeds limit {max_file_size}."
-                                )
-                                return None
-                        except Exception:
-                            # 如果 content-length 无法解析，继续按流式大小校验
-                            pass
-
-                    # 从content-type提取文件扩展名
-                    content_type = response.headers.get("content-type", "")
-                    file_extension = ".mp4"  # 默认扩展名
-                    if "video" in content_type:
-                        if "mp4" in content_type:
-                            file_extension = ".mp4"
-                        elif "webm" in content_type:
-                            file_extension = ".webm"
-                        elif "ogg" in content_type:
-                            file_extension = ".ogg"
-                        elif "mov" in content_type:
-                            file_extension = ".mov"
-
-                    # 生成简单的随机文件名
-                    temp_file_path = os.path.join(
-                        temp_dir,
-                        f"video_{random.randint(100000, 999999)}{file_extension}",
-                    )
-
-                    # 按流式传输进行大小限制（兜底）
-                    max_file_size = 512 * 1024 * 1024  # 512MB
-                    total_size = 0
-
-                    with open(temp_file_path, "wb") as f:
-                        async for chunk in response.content.iter_chunked(8192):
-                            if chunk:
-                                total_size += len(chunk)
-                                if total_size > max_file_size:
-                                    logger.error(
-                                        "Video size exceeds 10GB. Download stopped."
-                                    )
-                                    return None
-                                f.write(chunk)
-
-                if (
-                    os.path.exists(temp_file_path)
-                    and os.path.getsize(temp_file_path) > 0
-                ):
-                    downloaded_files.append(temp_file_path)
-                    logger.info(
-                        f"Successfully downloaded video {idx + 1} to {temp_file_path}, size: {total_size / 1024 / 1024:.2f} MB"
-                    )
-                else:
-                    logger.error(
-                        f"Failed to download video {idx + 1}: file is empty or doesn't exist"
-                    )
-                    return None
-
-            except Exception as e:
-                logger.error(f"Error downloading video {idx + 1} from {code}: {e}")
-                return None
+    if any(file_path is None for file_path in downloaded_files):
+        return None
 
     if not downloaded_files:
         logger.error("No videos were successfully downloaded")
@@ -154,53 +352,32 @@ async def video_combine(video_codes: List[str]) -> Optional[str]:
     try:
         # 合并视频
         logger.info(f"Starting to merge {len(downloaded_files)} videos")
-
-        # 加载所有视频片段
-        video_clips = []
-        start_times = []
-        clip_start_time = 0.0
-
-        try:
-            for file_path in downloaded_files:
-                start_times.append(clip_start_time)
-
-                clip = VideoFileClip(file_path)
-                video_clips.append(clip)
-
-                clip_start_time += clip.duration
-
-            clips = []
-            for video_clip, start_time in zip(video_clips, start_times):
-                positioned_clip = video_clip.with_start(start_time).with_position(
-                    "center"
-                )
-                clips.append(positioned_clip)
-            final_clip = CompositeVideoClip(clips)
-
-            output_file_name = f"merged_video_{uuid.uuid4()}.mp4"
-            output_file_path = os.path.join(temp_dir, output_file_name)
-
-            logger.info(f"Saving merged video to {output_file_path}")
-            final_clip.write_videofile(
-                output_file_path, codec="libx264", audio_codec="aac", threads=4
+        output_file_name = f"merged_video_{uuid.uuid4()}.mp4"
+        output_file_path = os.path.join(temp_dir, output_file_name)
+
+        probe_start = time.perf_counter()
+        signatures = await asyncio.gather(
+            *[_probe_stream_signature(file_path) for file_path in downloaded_files]
+        )
+        probe_elapsed = time.perf_counter() - probe_start
+
+        # 编码参数一致时直接拷贝码流，否则单次重新编码
+        concat_start = time.perf_counter()
+        mode = "stream_copy"
+        can_copy = signatures[0] is not None and len(set(signatures)) == 1
+        if not can_copy or not await _concat_stream_copy(
+            downloaded_files, output_file_path
+        ):
+            mode = "reencode"
+            await asyncio.to_thread(
+                _concat_reencode, downloaded_files, output_file_path
             )
-        finally:
-            for clip in video_clips:
-                try:
-                    if hasattr(clip, "reader") and clip.reader:
-                        clip.reader.close()
-                    if hasattr(clip, "audio_reader") and clip.audio_reader:
-                        clip.audio_reader.close_proc()
-                        clip.audio_reader.close()
-                    clip.close()
-                except Exception as e:
-                    logger.error(f"Error closing video clip: {e}")
-            if "final_clip" in locals():
-                try:
-                    if hasattr(final_clip, "close"):
-                        final_clip.close()
-                except Exception as e:
-                    logger.error(f"Error closing final clip: {e}")
+        concat_elapsed = time.perf_counter() - concat_start
+
+        logger.info(
+            f"video_combine timing: download={download_elapsed:.2f}s, "
+            f"probe={probe_elapsed:.2f}s, concat({mode})={concat_elapsed:.2f}s"
+        )
 
         if os.path.exists(output_file_path) and os.path.getsize(output_file_path) > 0:
             logger.info(f"Successfully merged video to local path: {output_file_path}")
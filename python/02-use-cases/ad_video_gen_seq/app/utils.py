@@ -12,9 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import hashlib
+import mimetypes
 import os
-from datetime import datetime
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
 from typing import Optional
+from urllib.parse import parse_qs, urlparse
 import threading
 import re
 
@@ -34,6 +42,107 @@ def callback_for_debug(callback_context: CallbackContext) -> Optional[LlmRespons
 
 
 # --- URL Shortener Singleton ---
+URL_SHORTENER_MAX_ENTRIES = int(os.getenv("URL_SHORTENER_MAX_ENTRIES", "10000"))
+URL_SHORTENER_TTL = float(os.getenv("URL_SHORTENER_TTL", str(7 * 24 * 3600)))
+# sqlite 文件路径，设置后短ID在进程重启后依然可还原
+URL_SHORTENER_DB_PATH = os.getenv("URL_SHORTENER_DB_PATH", "")
+
+# 签名URL中的过期参数：TOS (X-Tos-*) 与 S3 兼容 (X-Amz-*) 风格
+_SIGNED_DATE_PARAMS = ("X-Tos-Date", "X-Amz-Date")
+_SIGNED_EXPIRES_PARAMS = ("X-Tos-Expires", "X-Amz-Expires")
+
+
+def _signed_url_expires_at(url: str) -> Optional[float]:
+    """
+    解析签名URL的过期时间戳，非签名URL返回None
+    """
+    try:
+        query = parse_qs(urlparse(url).query)
+        for date_key, expires_key in zip(_SIGNED_DATE_PARAMS, _SIGNED_EXPIRES_PARAMS):
+            if date_key in query and expires_key in query:
+                signed_at = datetime.strptime(
+                    query[date_key][0], "%Y%m%dT%H%M%SZ"
+                ).replace(tzinfo=timezone.utc)
+                return signed_at.timestamp() + int(query[expires_key][0])
+        if "Expires" in query:
+            return float(query["Expires"][0])
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+class UrlStoreBackend(ABC):
+    """
+    短ID映射的持久化后端接口，可替换为 Redis 等实现
+    """
+
+    @abstractmethod
+    def next_id(self) -> int: ...
+
+    @abstractmethod
+    def get_url(self, short_id: str) -> Optional[tuple[str, float]]: ...
+
+    @abstractmethod
+    def get_code(self, original_url: str) -> Optional[tuple[str, float]]: ...
+
+    @abstractmethod
+    def put(self, short_id: str, original_url: str, expires_at: float): ...
+
+
+class SqliteUrlStore(UrlStoreBackend):
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS short_urls "
+            "(short_id TEXT PRIMARY KEY, url TEXT, expires_at REAL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_short_urls_url ON short_urls (url)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)"
+        )
+        self._db.execute("INSERT OR IGNORE INTO counters VALUES ('short_id', 0)")
+        self._db.commit()
+
+    def next_id(self) -> int:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE counters SET value = value + 1 WHERE name = 'short_id'"
+            )
+            return self._db.execute(
+                "SELECT value FROM counters WHERE name = 'short_id'"
+            ).fetchone()[0]
+
+    def get_url(self, short_id: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, expires_at FROM short_urls WHERE short_id = ?",
+                (short_id,),
+            ).fetchone()
+
+    def get_code(self, original_url: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT short_id, expires_at FROM short_urls "
+                "WHERE url = ? ORDER BY expires_at DESC LIMIT 1",
+                (original_url,),
+            ).fetchone()
+
+    def put(self, short_id: str, original_url: str, expires_at: float):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO short_urls VALUES (?, ?, ?)",
+                (short_id, original_url, expires_at),
+            )
+            # 顺带清理已过期的映射
+            self._db.execute(
+                "DELETE FROM short_urls WHERE expires_at < ?", (time.time(),)
+            )
+
+
 class UrlShortener:
     _instance = None
     _lock = threading.Lock()
@@ -43,6 +152,11 @@ class UrlShortener:
     BASE = len(CHAR_SET)
 
     PREFIX = "⌥"
+    # Pattern matches ⌥<code> where code is 5 characters
+    PATTERN = re.compile(r"⌥[0-9a-zA-Z]{5}")
+
+    # 签名URL已过期或即将过期时，映射至少保留的秒数
+    MIN_TTL = 60
 
     def __new__(cls):
         if not cls._instance:
@@ -55,8 +169,21 @@ class UrlShortener:
     def _initialize(self):
         self._id_lock = threading.Lock()
         self._current_id = 0
-        self._short_to_long = {}  # key: short_url, value: original_url
-        self._long_to_short = {}  # key: original_url, value: short_url
+        # key: short_id, value: (original_url, expires_at)，按最近使用排序
+        self._short_to_long: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._long_to_short = {}  # key: original_url, value: short_id
+        self.max_entries = URL_SHORTENER_MAX_ENTRIES
+        self.ttl = URL_SHORTENER_TTL
+        self.backend: Optional[UrlStoreBackend] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if URL_SHORTENER_DB_PATH:
+            try:
+                self.backend = SqliteUrlStore(URL_SHORTENER_DB_PATH)
+            except Exception as e:
+                logger.warning(f"UrlShortener persistence disabled: {e}")
 
     def _encode(self, num: int) -> str:
         if num == 0:
@@ -71,29 +198,69 @@ class UrlShortener:
         # Pad to 5 characters
         return result.rjust(5, "0")
 
+    def _expires_at(self, original_url: str) -> float:
+        now = time.time()
+        expires_at = now + self.ttl
+        signed_expires_at = _signed_url_expires_at(original_url)
+        if signed_expires_at is not None:
+            expires_at = min(expires_at, max(signed_expires_at, now + self.MIN_TTL))
+        return expires_at
+
+    def _remember(self, short_id: str, original_url: str, expires_at: float):
+        # Caller must hold _id_lock
+        self._short_to_long[short_id] = (original_url, expires_at)
+        self._short_to_long.move_to_end(short_id)
+        self._long_to_short[original_url] = short_id
+        while len(self._short_to_long) > self.max_entries:
+            evicted_id, (evicted_url, _) = self._short_to_long.popitem(last=False)
+            if self._long_to_short.get(evicted_url) == evicted_id:
+                del self._long_to_short[evicted_url]
+            self.evictions += 1
+
+    def _forget(self, short_id: str):
+        # Caller must hold _id_lock
+        original_url, _ = self._short_to_long.pop(short_id)
+        if self._long_to_short.get(original_url) == short_id:
+            del self._long_to_short[original_url]
+        self.expirations += 1
+
     def url2code(self, original_url: str) -> str:
         """
         输入一个url字符串，换出来一个短ID
         """
         try:
-            # 1. Check if already exists (Deduplication)
+            now = time.time()
             with self._id_lock:
-                if original_url in self._long_to_short:
-                    return self._long_to_short[original_url]
+                # 1. Check if already exists (Deduplication)
+                short_id = self._long_to_short.get(original_url)
+                if short_id is not None:
+                    if self._short_to_long[short_id][1] > now:
+                        self._short_to_long.move_to_end(short_id)
+                        return short_id
+                    self._forget(short_id)
+
+                if self.backend is not None:
+                    row = self.backend.get_code(original_url)
+                    if row and row[1] > now:
+                        self._remember(row[0], original_url, row[1])
+                        return row[0]
 
                 # 2. Increment ID and Encode
-                self._current_id += 1
-                current_id = self._current_id
-                short_code = self._encode(current_id)
+                if self.backend is not None:
+                    current_id = self.backend.next_id()
+                else:
+                    self._current_id += 1
+                    current_id = self._current_id
 
-            # 3. Construct short ID
-            short_id = f"{self.PREFIX}{short_code}"
+                # 3. Construct short ID
+                short_id = f"{self.PREFIX}{self._encode(current_id)}"
 
-            # 4. Store mappings
-            with self._id_lock:
-                # Double check in case another thread inserted it
-                self._short_to_long[short_id] = original_url
-                self._long_to_short[original_url] = short_id
+                # 4. Store mappings
+                expires_at = self._expires_at(original_url)
+                self._remember(short_id, original_url, expires_at)
+
+            if self.backend is not None:
+                self.backend.put(short_id, original_url, expires_at)
 
             return short_id
         except Exception:
@@ -103,61 +270,75 @@ class UrlShortener:
         """
         输入这个短ID，换出原始的url
         """
-        return self._short_to_long.get(short_id, short_id)
+        now = time.time()
+        with self._id_lock:
+            entry = self._short_to_long.get(short_id)
+            if entry is not None:
+                if entry[1] > now:
+                    self._short_to_long.move_to_end(short_id)
+                    self.hits += 1
+                    return entry[0]
+                self._forget(short_id)
+
+            if self.backend is not None:
+                try:
+                    row = self.backend.get_url(short_id)
+                except Exception as e:
+                    logger.warning(f"UrlShortener backend lookup failed: {e}")
+                    row = None
+                if row and row[1] > now:
+                    self._remember(short_id, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return short_id
 
     def replace_in_text(self, text: str) -> str:
         """
         给你一个长字符串，提取短ID并无缝替换回原始URL
         """
-        # Pattern matches ⌥<code> where code is 5 characters
-        pattern = r"⌥([0-9a-zA-Z]{5})"
+        resolved = {}
 
         def replace_match(match):
-            full_short_id = match.group(0)
-            original_url = self.code2url(full_short_id)
-            return original_url if original_url != full_short_id else full_short_id
+            short_id = match.group(0)
+            if short_id not in resolved:
+                resolved[short_id] = self.code2url(short_id)
+            return resolved[short_id]
 
-        return re.sub(pattern, replace_match, text)
+        return self.PATTERN.sub(replace_match, text)
 
     def extract_ids_to_urls(self, text: str) -> list[str]:
         """
         从字符串中提取所有短ID并转换为URL列表
         """
-        # Pattern matches ⌥<code> where code is 5 characters
-        pattern = r"⌥([0-9a-zA-Z]{5})"
-        matches = re.findall(pattern, text)
-
         urls = []
-        for code in matches:
-            short_id = f"⌥{code}"
+        for match in self.PATTERN.finditer(text):
+            short_id = match.group(0)
             original_url = self.code2url(short_id)
             if original_url != short_id:
                 urls.append(original_url)
 
         return urls
 
+    def stats(self) -> dict:
+        with self._id_lock:
+            return {
+                "size": len(self._short_to_long),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "persistent": self.backend is not None,
+            }
+
 
 # Global instance
 url_shortener = UrlShortener()
 
 
-def upload_file_to_tos(
-    file_path: str,
-    object_key: Optional[str] = None,
-    region: str = "cn-beijing",
-    expires: int = 604800,  # 7-day validity
-) -> Optional[str]:
-    bucket_name = os.getenv("DATABASE_TOS_BUCKET")
-
-    # Check if file exists
-    if not os.path.exists(file_path):
-        logger.info(f"Error: File does not exist: {file_path}")
-        return None
-
-    if not os.path.isfile(file_path):
-        logger.info(f"Error: Path is not a file: {file_path}")
-        return None
-
+def _create_tos_client(region: str = "cn-beijing") -> Optional[tos.TosClientV2]:
     # Retrieve STS from IAM Role
     access_key = os.getenv("VOLCENGINE_ACCESS_KEY")
     secret_key = os.getenv("VOLCENGINE_SECRET_KEY")
@@ -176,6 +357,33 @@ def upload_file_to_tos(
         )
         return None
 
+    endpoint = f"tos-{region}.volces.com"
+    return tos.TosClientV2(
+        ak=access_key,
+        sk=secret_key,
+        security_token=session_token,
+        endpoint=endpoint,
+        region=region,
+    )
+
+
+def upload_file_to_tos(
+    file_path: str,
+    object_key: Optional[str] = None,
+    region: str = "cn-beijing",
+    expires: int = 604800,  # 7-day validity
+) -> Optional[str]:
+    bucket_name = os.getenv("DATABASE_TOS_BUCKET")
+
+    # Check if file exists
+    if not os.path.exists(file_path):
+        logger.info(f"Error: File does not exist: {file_path}")
+        return None
+
+    if not os.path.isfile(file_path):
+        logger.info(f"Error: Path is not a file: {file_path}")
+        return None
+
     # Auto-generate object_key (using filename)
     if not object_key:
         # Combine timestamp and original filename to avoid overwriting
@@ -188,14 +396,9 @@ def upload_file_to_tos(
     client = None
     try:
         # Initialize TOS client
-        endpoint = f"tos-{region}.volces.com"
-        client = tos.TosClientV2(
-            ak=access_key,
-            sk=secret_key,
-            security_token=session_token,
-            endpoint=endpoint,
-            region=region,
-        )
+        client = _create_tos_client(region)
+        if client is None:
+            return None
 
         logger.info(f"Starting file upload: {file_path}")
         logger.info(f"Target Bucket: {bucket_name}")
@@ -253,3 +456,120 @@ def upload_file_to_tos(
         # Close client
         if client:
             client.close()
+
+
+def upload_bytes_to_tos(
+    data: bytes,
+    object_key: str,
+    region: str = "cn-beijing",
+    expires: int = 604800,  # 7-day validity
+) -> Optional[str]:
+    """
+    上传内存中的字节到TOS并返回签名URL，无需落盘临时文件
+    """
+    bucket_name = os.getenv("DATABASE_TOS_BUCKET")
+    if not bucket_name:
+        return None
+
+    client = None
+    try:
+        client = _create_tos_client(region)
+        if client is None:
+            return None
+
+        client.put_object(bucket=bucket_name, key=object_key, content=data)
+        signed_url_output = client.pre_signed_url(
+            http_method=HttpMethodType.Http_Method_Get,
+            bucket=bucket_name,
+            key=object_key,
+            expires=expires,
+        )
+        logger.info(f"Bytes uploaded successfully: {object_key} ({len(data)} bytes)")
+        return signed_url_output.signed_url
+    except Exception as e:
+        logger.info(f"Bytes upload failed: {e}")
+        return None
+    finally:
+        if client:
+            client.close()
+
+
+# --- Content-addressed media upload cache ---
+class MediaUploadCache:
+    """
+    按内容SHA-256缓存已上传的媒体，同一张图片/视频只上传一次，
+    签名URL在过期前复用
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        expires: int = 604800,  # 7-day validity
+        refresh_margin: int = 3600,  # re-sign 1 hour before expiry
+        failure_ttl: int = 60,  # skip re-uploading failed content for 1 minute
+    ):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        # digest -> retry_at，上传失败或未配置TOS时短时间内不再重复尝试
+        self._failures: dict[str, float] = {}
+        self.max_entries = max_entries
+        self.expires = expires
+        self.refresh_margin = refresh_margin
+        self.failure_ttl = failure_ttl
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def _lookup(self, digest: str, size: int, now: float) -> Optional[str]:
+        entry = self._entries.get(digest)
+        if entry and entry[1] - self.refresh_margin > now:
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            self.bytes_saved += size
+            return entry[0]
+        return None
+
+    def get_or_upload(self, data: bytes, mime_type: str) -> Optional[str]:
+        """
+        返回内容对应的签名URL，未命中时上传；上传失败返回None
+        同步上传会阻塞，异步代码中请使用 aget_or_upload
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        now = time.time()
+        with self._lock:
+            signed_url = self._lookup(digest, len(data), now)
+            if signed_url:
+                return signed_url
+            if self._failures.get(digest, 0) > now:
+                return None
+            self.misses += 1
+
+        ext = mimetypes.guess_extension(mime_type or "") or ""
+        # Content-addressed key, re-uploading the same bytes is idempotent
+        signed_url = upload_bytes_to_tos(
+            data, object_key=f"upload/media/{digest}{ext}", expires=self.expires
+        )
+        if not signed_url:
+            with self._lock:
+                self._failures[digest] = time.time() + self.failure_ttl
+                while len(self._failures) > self.max_entries:
+                    self._failures.pop(next(iter(self._failures)))
+            return None
+
+        with self._lock:
+            self._failures.pop(digest, None)
+            self._entries[digest] = (signed_url, now + self.expires)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return signed_url
+
+    async def aget_or_upload(self, data: bytes, mime_type: str) -> Optional[str]:
+        """
+        get_or_upload 的异步版本，哈希与上传都在线程池中执行，不阻塞事件循环
+        """
+        return await asyncio.to_thread(self.get_or_upload, data, mime_type)
+
+
+# Global instance
+media_upload_cache = MediaUploadCache()
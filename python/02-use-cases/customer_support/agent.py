@@ -16,6 +16,7 @@ import datetime
 import logging
 import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 from veadk.configs.database_configs import NormalTOSConfig
 
@@ -41,6 +42,8 @@ from veadk import Agent, Runner
 from veadk.integrations.ve_identity import AuthRequestProcessor
 from veadk.knowledgebase import KnowledgeBase
 from veadk.memory import LongTermMemory, ShortTermMemory
+from knowledge_sync import KnowledgeSync
+from memory_writer import MemoryWriter
 from prompts.prompt import (
     AFTER_SALE_PROMPT_CN,
     AFTER_SALE_PROMPT_EN,
@@ -120,26 +123,28 @@ else:
     raise ValueError("DATABASE_VIKING_COLLECTION environment variable is not set")
 
 
-should_init_knowledge = False
-try:
+def knowledge_initialized() -> bool:
     test_knowledge = knowledge.search(knowledge_probe, top_k=1)
-    should_init_knowledge = not (
-        len(test_knowledge) >= 0
+    return (
+        len(test_knowledge) > 0
         and test_knowledge[0].content != ""
-        and str(test_knowledge[0].content).__contains__(knowledge_probe)
-    )
-except Exception:
-    should_init_knowledge = True
-
-if should_init_knowledge:
-    tos_bucket_name = os.getenv("DATABASE_TOS_BUCKET")
-    if not tos_bucket_name:
-        raise ValueError("DATABASE_TOS_BUCKET environment variable is not set")
-    knowledge.add_from_directory(
-        str(Path(__file__).resolve().parent) + f"/{knowledge_directory}",
-        tos_bucket_name=tos_bucket_name,
+        and knowledge_probe in str(test_knowledge[0].content)
     )
 
+
+tos_bucket_name = os.getenv("DATABASE_TOS_BUCKET")
+if not tos_bucket_name:
+    raise ValueError("DATABASE_TOS_BUCKET environment variable is not set")
+# 按清单增量导入预置知识，只上传新增或变更的文件，在后台执行不阻塞启动
+knowledge_sync = KnowledgeSync.from_directory(
+    knowledge,
+    str(Path(__file__).resolve().parent) + f"/{knowledge_directory}",
+    tos_bucket_name=tos_bucket_name,
+    probe=knowledge_initialized,
+    index=knowledge_collection_name,
+)
+knowledge_sync.start()
+
 # 3. 配置长期记忆: 如果配置了Mem0，就使用Mem0，否则使用Viking，都不配置，默认创建一个Viking记忆库
 use_mem0 = os.getenv("DATABASE_MEM0_BASE_URL") and os.getenv("DATABASE_MEM0_API_KEY")
 if use_mem0:
@@ -176,9 +181,12 @@ def before_agent_execution(callback_context: CallbackContext):
 
 
 # 这里仅做记忆保存的演示，实际根据需求选择会话保存到长期记忆中
+# 根智能体与子智能体共用同一个写入器：只写入新增事件，同一轮调用合并为一次后台写入
+memory_writer = MemoryWriter(long_term_memory, root_agent_name="customer_support_agent")
+
+
 async def after_agent_execution(callback_context: CallbackContext):
-    session = callback_context._invocation_context.session
-    await long_term_memory.add_session_to_memory(session)
+    await memory_writer.after_agent_callback(callback_context)
 
 
 after_sale_agent = Agent(
@@ -239,5 +247,20 @@ agent_server_app = AgentkitAgentServerApp(
     agent=root_agent, short_term_memory=short_term_memory
 )
 
+# 服务退出前写完等待中的记忆，避免子智能体的延迟写入与后台写入丢失
+_server_lifespan = agent_server_app.app.router.lifespan_context
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    async with _server_lifespan(app):
+        try:
+            yield
+        finally:
+            await memory_writer.drain()
+
+
+agent_server_app.app.router.lifespan_context = _lifespan
+
 if __name__ == "__main__":
     agent_server_app.run(host="0.0.0.0", port=8000)
@@ -0,0 +1,171 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CRM 维修记录仓储压测脚本，测量大数据量下查询/创建/更新/删除的吞吐与延迟
+
+用法:
+    python crm_benchmark.py --records 100000 --customers 10000 --threads 8
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from tools.crm_mock import ServiceRecordRepository
+
+
+def make_fields(i: int) -> dict:
+    return {
+        "serial_number": f"SN{i:08d}",
+        "service_date": "2024-01-15 10:00:00",
+        "service_type": "screen_repair",
+        "description": "benchmark record",
+        "technician": "bench",
+        "status": "scheduled",
+        "estimated_duration": 60,
+        "actual_duration": None,
+        "notes": None,
+    }
+
+
+def run_phase(name, total, threads, op):
+    """
+    多线程并发执行 op(i)，返回QPS与延迟分位数
+    """
+    latencies = [[] for _ in range(threads)]
+
+    def worker(idx):
+        for i in range(idx, total, threads):
+            start = time.perf_counter()
+            op(i)
+            latencies[idx].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    merged = sorted(latency for chunk in latencies for latency in chunk)
+    return {
+        "phase": name,
+        "qps": len(merged) / elapsed if elapsed else 0.0,
+        "p50_us": statistics.median(merged) * 1e6 if merged else 0.0,
+        "p99_us": merged[int(len(merged) * 0.99) - 1] * 1e6 if merged else 0.0,
+    }
+
+
+def benchmark(records: int, customers: int, operations: int, threads: int):
+    repo = ServiceRecordRepository()
+    customer_ids = [f"CUST{i:06d}" for i in range(customers)]
+    rng = random.Random(0)
+
+    # 单线程写入初始数据，保证记录ID与客户的对应关系可以推算
+    results = [
+        run_phase(
+            f"seed x{records}",
+            records,
+            1,
+            lambda i: repo.create(customer_ids[i % customers], make_fields(i)),
+        )
+    ]
+    record_ids = [f"SRV{i:03d}" for i in range(1, records + 1)]
+    owners = {rid: customer_ids[i % customers] for i, rid in enumerate(record_ids)}
+    samples = [rng.choice(record_ids) for _ in range(operations)]
+
+    results.append(
+        run_phase(
+            "get",
+            operations,
+            threads,
+            lambda i: repo.get(owners[samples[i]], samples[i]),
+        )
+    )
+    results.append(
+        run_phase(
+            "list_by_customer",
+            operations,
+            threads,
+            lambda i: repo.list_by_customer(customer_ids[i % customers]),
+        )
+    )
+    results.append(
+        run_phase(
+            "create",
+            operations,
+            threads,
+            lambda i: repo.create(customer_ids[i % customers], make_fields(i)),
+        )
+    )
+    results.append(
+        run_phase(
+            "update",
+            operations,
+            threads,
+            lambda i: repo.update(
+                owners[samples[i]], samples[i], {"status": "completed"}
+            ),
+        )
+    )
+    # 删除使用不重复的记录，保证每次都命中
+    victims = rng.sample(record_ids, min(operations, records))
+    results.append(
+        run_phase(
+            "delete",
+            len(victims),
+            threads,
+            lambda i: repo.delete(owners[victims[i]], victims[i]),
+        )
+    )
+
+    expected = records + operations - len(victims)
+    assert len(repo) == expected, f"expected {expected} records, got {len(repo)}"
+    return results
+
+
+def print_results(label: str, results: list[dict]):
+    print(f"\n== {label} ==")
+    print(f"{'phase':<20}{'qps':>12}{'p50(us)':>10}{'p99(us)':>10}")
+    for r in results:
+        print(
+            f"{r['phase']:<20}{r['qps']:>12.0f}{r['p50_us']:>10.1f}{r['p99_us']:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRM service record benchmark")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    results = benchmark(args.records, args.customers, args.operations, args.threads)
+    print_results(
+        f"records={args.records} customers={args.customers} threads={args.threads}",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.sessions import Session
+from veadk.memory import LongTermMemory
+
+logger = logging.getLogger(__name__)
+
+# 子智能体结束后等待多久再写入，期间同一会话的写入请求会被合并
+MEMORY_FLUSH_DEBOUNCE = float(os.getenv("MEMORY_FLUSH_DEBOUNCE", "2"))
+# 最多记录多少个会话的写入水位
+MEMORY_WRITER_MAX_SESSIONS = int(os.getenv("MEMORY_WRITER_MAX_SESSIONS", "10000"))
+
+
+class MemoryWriter:
+    """
+    会话写入长期记忆的去重与合并
+
+    每个会话记录已写入事件的时间戳水位，只把水位之后的新事件写入记忆库；
+    子智能体结束时延迟写入，根智能体结束（即本轮调用结束）时立即在后台写入，
+    同一轮调用中多个智能体的写入请求合并为一次，不阻塞响应。
+    """
+
+    def __init__(
+        self,
+        long_term_memory: LongTermMemory,
+        root_agent_name: str,
+        debounce: float = MEMORY_FLUSH_DEBOUNCE,
+        max_sessions: int = MEMORY_WRITER_MAX_SESSIONS,
+    ):
+        self.long_term_memory = long_term_memory
+        self.root_agent_name = root_agent_name
+        self.debounce = debounce
+        self.max_sessions = max_sessions
+
+        # session_id -> 已写入的最后一个事件的时间戳
+        self._watermarks: OrderedDict[str, float] = OrderedDict()
+        # session_id -> (尚在等待的写入任务, 会话)
+        self._pending: dict[str, tuple[asyncio.Task, Session]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        # 持有后台任务的引用，避免执行中被回收
+        self._tasks: set[asyncio.Task] = set()
+        self.stats = {
+            "flushes": 0,
+            "flushes_skipped": 0,
+            "events_written": 0,
+            "bytes_written": 0,
+            "failures": 0,
+        }
+
+    async def after_agent_callback(self, callback_context: CallbackContext):
+        """挂载到根智能体与各子智能体的 after_agent_callback"""
+        session = callback_context._invocation_context.session
+        delay = 0 if callback_context.agent_name == self.root_agent_name else None
+        self.schedule(session, delay)
+
+    def schedule(self, session: Session, delay: Optional[float] = None):
+        """
+        安排一次会话写入；已有尚未开始的写入时用新的请求替换它
+        """
+        delay = self.debounce if delay is None else delay
+        previous = self._pending.pop(session.id, None)
+        if previous is not None:
+            previous[0].cancel()
+            self.stats["flushes_skipped"] += 1
+        task = asyncio.create_task(self._delayed_flush(session, delay))
+        self._pending[session.id] = (task, session)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _delayed_flush(self, session: Session, delay: float):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # 开始写入后不再允许被替换或取消
+        self._pending.pop(session.id, None)
+        await self.flush(session)
+
+    async def flush(self, session: Session):
+        """把水位之后的新事件写入长期记忆"""
+        lock = self._locks.setdefault(session.id, asyncio.Lock())
+        async with lock:
+            watermark = self._watermarks.get(session.id, 0.0)
+            new_events = [e for e in session.events if e.timestamp > watermark]
+            texts = [
+                part.text
+                for event in new_events
+                if event.content and event.content.parts
+                for part in event.content.parts
+                if part.text
+            ]
+            if not texts:
+                self.stats["flushes_skipped"] += 1
+                return
+
+            try:
+                await self.long_term_memory.add_session_to_memory(
+                    session.model_copy(update={"events": new_events})
+                )
+            except Exception as e:
+                # 水位不前移，下次写入时重试这些事件
+                self.stats["failures"] += 1
+                logger.error(f"Failed to save session {session.id} to memory: {e}")
+                return
+
+            self._watermarks[session.id] = max(e.timestamp for e in new_events)
+            self._watermarks.move_to_end(session.id)
+            while len(self._watermarks) > self.max_sessions:
+                evicted, _ = self._watermarks.popitem(last=False)
+                self._locks.pop(evicted, None)
+
+            self.stats["flushes"] += 1
+            self.stats["events_written"] += len(new_events)
+            self.stats["bytes_written"] += sum(len(t.encode("utf-8")) for t in texts)
+            logger.info(
+                f"Saved {len(new_events)} new events of session {session.id} to memory, stats={self.stats}"
+            )
+
+    async def drain(self):
+        """立即执行所有等待中的写入并等待后台写入完成，用于进程退出前"""
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for task, _ in pending:
+            task.cancel()
+        running = [task for task in self._tasks if not task.done()]
+        await asyncio.gather(
+            *(self.flush(session) for _, session in pending),
+            *running,
+            return_exceptions=True,
+        )
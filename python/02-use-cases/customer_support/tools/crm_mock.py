@@ -13,7 +13,8 @@
 # limitations under the License.
 
 import os
-from typing import Optional
+import threading
+from typing import Iterable, Optional
 
 from pydantic import BaseModel
 
@@ -81,6 +82,78 @@ mock_service_records = [
 ]
 
 
+class ServiceRecordRepository:
+    """
+    维修记录的内存仓储
+
+    按记录ID与客户ID建立字典索引，查询、更新与删除均为 O(1)；记录ID单调递增，
+    删除后不会被复用；所有读写在同一把锁内进行，多个会话并发调用工具时保持一致。
+    """
+
+    def __init__(self, records: Iterable[dict] = ()):
+        self._records: dict[str, dict] = {}
+        # customer_id -> {record_id: record}，保持创建顺序
+        self._by_customer: dict[str, dict[str, dict]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for record in records:
+            self._insert(dict(record))
+            self._next_id = max(self._next_id, int(record["record_id"][3:]) + 1)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _insert(self, record: dict):
+        self._records[record["record_id"]] = record
+        self._by_customer.setdefault(record["customer_id"], {})[record["record_id"]] = (
+            record
+        )
+
+    def create(self, customer_id: str, fields: dict) -> dict:
+        with self._lock:
+            record = {
+                "record_id": f"SRV{self._next_id:03d}",
+                "customer_id": customer_id,
+                **fields,
+            }
+            self._next_id += 1
+            self._insert(record)
+            return dict(record)
+
+    def get(self, customer_id: str, record_id: str) -> Optional[dict]:
+        with self._lock:
+            record = self._by_customer.get(customer_id, {}).get(record_id)
+            return dict(record) if record else None
+
+    def list_by_customer(self, customer_id: str) -> list[dict]:
+        with self._lock:
+            return [
+                dict(record)
+                for record in self._by_customer.get(customer_id, {}).values()
+            ]
+
+    def update(self, customer_id: str, record_id: str, changes: dict) -> Optional[dict]:
+        """只更新值不为空的字段，记录不存在或不属于该客户时返回None"""
+        with self._lock:
+            record = self._by_customer.get(customer_id, {}).get(record_id)
+            if record is None:
+                return None
+            record.update({k: v for k, v in changes.items() if v})
+            return dict(record)
+
+    def delete(self, customer_id: str, record_id: str) -> bool:
+        with self._lock:
+            customer_records = self._by_customer.get(customer_id, {})
+            if record_id not in customer_records:
+                return False
+            del customer_records[record_id]
+            del self._records[record_id]
+            return True
+
+
+service_records = ServiceRecordRepository(mock_service_records)
+
+
 def get_customer_info(customer_id: str) -> dict:
     """
     查询客户信息
@@ -173,7 +246,7 @@ def get_service_records(customer_id: str) -> list:
     """
     if customer_id != "CUST001":
         return []
-    return mock_service_records
+    return service_records.list_by_customer(customer_id)
 
 
 def create_service_record(
@@ -187,21 +260,20 @@ def create_service_record(
     if customer_id != "CUST001":
         return {"error": "Customer not found"}
 
-    r = {
-        "record_id": f"SRV00{len(mock_service_records) + 1}",
-        "serial_number": service_record.serial_number,
-        "customer_id": customer_id,
-        "service_date": service_record.service_date,
-        "service_type": service_record.service_type,
-        "description": service_record.description,
-        "technician": service_record.technician,
-        "status": "scheduled",
-        "estimated_duration": service_record.estimated_duration,
-        "actual_duration": None,
-        "notes": None,
-    }
-    mock_service_records.append(r)
-    return r
+    return service_records.create(
+        customer_id,
+        {
+            "serial_number": service_record.serial_number,
+            "service_date": service_record.service_date,
+            "service_type": service_record.service_type,
+            "description": service_record.description,
+            "technician": service_record.technician,
+            "status": "scheduled",
+            "estimated_duration": service_record.estimated_duration,
+            "actual_duration": None,
+            "notes": None,
+        },
+    )
 
 
 def update_service_record(
@@ -215,16 +287,12 @@ def update_service_record(
     """
     if customer_id != "CUST001":
         return {"error": "Customer not found"}
-    for r in mock_service_records:
-        if r["record_id"] == service_id:
-            r["service_date"] = service_record.service_date or r["service_date"]
-            r["status"] = service_record.status or r["status"]
-            r["actual_duration"] = (
-                service_record.actual_duration or r["actual_duration"]
-            )
-            r["notes"] = service_record.notes or r["notes"]
-            return r
-    return {"error": "Service record not found"}
+    r = service_records.update(
+        customer_id, service_id, service_record.model_dump(exclude_none=True)
+    )
+    if r is None:
+        return {"error": "Service record not found"}
+    return r
 
 
 def delete_service_record(customer_id: str, service_id: str) -> dict:
@@ -235,8 +303,6 @@ def delete_service_record(customer_id: str, service_id: str) -> dict:
     """
     if customer_id != "CUST001":
         return {"error": "Customer not found"}
-    for r in mock_service_records:
-        if r["record_id"] == service_id:
-            mock_service_records.remove(r)
-            return {"service_id": service_id, "status": "deleted"}
+    if service_records.delete(customer_id, service_id):
+        return {"service_id": service_id, "status": "deleted"}
     return {"error": "Service record not found"}
@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 from rich.console import Console
@@ -11,7 +12,7 @@ from .utils import get_text_embedding as get_embedding
 console = Console()
 
 
-def catalog_discovery(query_intent: str) -> str:
+async def catalog_discovery(query_intent: str) -> str:
     """Search metadata using vector similarity based on the user's intent keywords."""
     console.print(f"[catalog_discovery] Inputs: query_intent={query_intent!r}")
 
@@ -23,19 +24,21 @@ def catalog_discovery(query_intent: str) -> str:
             }
         )
 
-    tbl, error_msg = lancedb_manager.get_metadata_table()
+    tbl, error_msg = await asyncio.to_thread(lancedb_manager.get_metadata_table)
     if error_msg:
         return json.dumps({"error": error_msg})
 
     try:
         # 调用方舟获取query condition的向量
-        query_vector, emb_err = get_embedding(query_intent)
+        query_vector, emb_err = await get_embedding(query_intent)
         if emb_err:
             return json.dumps({"error": emb_err})
 
         # 调用Lance进行检索
-        results_df = (
-            tbl.search(query_vector, vector_column_name="vector").limit(10).to_pandas()
+        results_df = await asyncio.to_thread(
+            lambda: tbl.search(query_vector, vector_column_name="vector")
+            .limit(10)
+            .to_pandas()
         )
         records = results_df.to_dict("records")
 
@@ -4,6 +4,7 @@ from rich.console import Console
 
 # Import the LanceDBManager singleton
 from .lancedb_manager import lancedb_manager
+from .result_encoder import encode_result
 
 console = Console()
 
@@ -27,14 +28,12 @@ def duckdb_sql_execution(sql: str, user_question: str = "") -> str:
 
     view_name = "imdb_top_1000"
 
-    # Register Arrow/Pandas to DuckDB
+    # Register the Lance dataset to DuckDB once, refreshed on table version change
     conn = lancedb_manager.get_duckdb_connection()
     try:
-        arrow_tbl = tbl.to_arrow()
-        conn.register(view_name, arrow_tbl)
-    except Exception:
-        df = tbl.to_pandas()
-        conn.register(view_name, df)
+        lancedb_manager.register_duckdb_view(view_name, tbl)
+    except Exception as e:
+        return json.dumps({"error": f"DuckDB 注册视图失败: {e}"}, ensure_ascii=False)
 
     # Execute SQL
     try:
@@ -42,23 +41,12 @@ def duckdb_sql_execution(sql: str, user_question: str = "") -> str:
     except Exception as e:
         return json.dumps({"error": f"DuckDB 执行失败: {e}"}, ensure_ascii=False)
 
-    # 构造 records（对象数组），并提供结构化响应
-    header = [str(c) for c in out_df.columns]
-    records_obj = out_df.to_dict(orient="records")
-
-    records = out_df.values.tolist()
+    # 按行数/字节预算构造紧凑的结构化响应
+    result = encode_result(out_df, meta={"table": view_name})
     try:
-        console.print(f"[sql] Returned rows: {len(records)} from table='{view_name}'")
+        console.print(
+            f"[sql] Returned rows: {len(out_df)} from table='{view_name}', response bytes: {len(result)}"
+        )
     except Exception:
         pass
-    result = {
-        "status": "ok",
-        "data": [header] + records,
-        "records": records_obj,
-        "meta": {
-            "row_count": len(records),
-            "table": view_name,
-        },
-    }
-    console.print(f"[duckdb_sql_execution] Result: {result}")
-    return json.dumps(result, ensure_ascii=False)
+    return result
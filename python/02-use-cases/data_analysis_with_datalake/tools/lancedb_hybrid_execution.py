@@ -1,3 +1,4 @@
+import asyncio
 import json
 from typing import Optional
 
@@ -6,6 +7,7 @@ import pandas as pd
 
 # Import the LanceDBManager singleton
 from .lancedb_manager import lancedb_manager
+from .result_encoder import encode_result
 
 # Import utility functions
 from .utils import get_multimodal_text_vector as _get_text_vector
@@ -13,7 +15,7 @@ from .utils import get_multimodal_text_vector as _get_text_vector
 console = Console()
 
 
-def lancedb_hybrid_execution(
+async def lancedb_hybrid_execution(
     query_text: str, filters: str = "", select: Optional[list] = None, limit: int = 10
 ) -> str:
     console.print(
@@ -21,7 +23,7 @@ def lancedb_hybrid_execution(
     )
 
     # open table
-    tbl, err = lancedb_manager.open_table()
+    tbl, err = await asyncio.to_thread(lancedb_manager.open_table)
     if err:
         return json.dumps({"error": err}, ensure_ascii=False)
 
@@ -31,42 +33,27 @@ def lancedb_hybrid_execution(
         select = ["Series_Title", "poster_precision_link"]
 
     # embed
-    vec, v_err = _get_text_vector(query_text)
+    vec, v_err = await _get_text_vector(query_text)
     if v_err:
         return json.dumps({"error": v_err}, ensure_ascii=False)
 
     # build search
-    try:
+    def _search() -> pd.DataFrame:
         search_job = tbl.search(vec, vector_column_name=vector_col)
         if filters:
             # 直接使用模型生成的filter string
             filter_string = str(filters) if not isinstance(filters, str) else filters
             console.print(f"[hybrid] Applying filter: {filter_string}")
             search_job = search_job.where(filter_string)
-        df: pd.DataFrame = search_job.limit(limit).to_pandas()
+        return search_job.limit(limit).to_pandas()
+
+    try:
+        df: pd.DataFrame = await asyncio.to_thread(_search)
         present = [c for c in select if c in df.columns]
         if present:
             df = df[present]
         console.print(f"[hybrid] Returned rows: {len(df)}")
-        header = [str(c).lower() for c in df.columns]
-        try:
-            df_norm = df.copy()
-            df_norm.columns = header
-            records_obj = df_norm.to_dict(orient="records")
-        except Exception:
-            records_obj = [
-                {header[i]: row[i] for i in range(len(header))}
-                for row in df.values.tolist()
-            ]
-        records = df.values.tolist()
-        return json.dumps(
-            {
-                "status": "ok",
-                "data": [header] + records,
-                "records": records_obj,
-                "meta": {"row_count": len(records)},
-            },
-            ensure_ascii=False,
-        )
+        df.columns = [str(c).lower() for c in df.columns]
+        return encode_result(df)
     except Exception as e:
         return json.dumps({"error": f"混合检索失败: {e}"}, ensure_ascii=False)
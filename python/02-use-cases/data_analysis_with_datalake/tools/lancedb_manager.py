@@ -1,4 +1,6 @@
 import os
+import threading
+import time
 from typing import Optional, Tuple
 from rich.console import Console
 import lancedb
@@ -28,6 +30,13 @@ class LanceDBManager:
         self._metadata_table = None
         self._duckdb_conn = None
 
+        # Registered DuckDB views: view_name -> {"version": int, "checked_at": float}
+        self._duckdb_views = {}
+        self._duckdb_views_lock = threading.Lock()
+        self.view_refresh_interval = float(
+            os.getenv("DUCKDB_VIEW_REFRESH_INTERVAL", "60")
+        )
+
     def _split_db_and_table(self, uri: str) -> Tuple[Optional[str], Optional[str]]:
         """输入形如 s3://bucket/path/.../table_name，返回 (db_root_uri, table_name)。"""
         if not uri:
@@ -137,6 +146,44 @@ class LanceDBManager:
             self._duckdb_conn = duckdb.connect()
         return self._duckdb_conn
 
+    def register_duckdb_view(self, view_name: str, tbl) -> None:
+        """Register a Lance table as a lazily scanned DuckDB view.
+
+        The Lance dataset is registered as an Arrow dataset, so DuckDB pushes
+        column projection and filters down to the scan instead of materializing
+        the whole table. It is re-registered only when the table version changes.
+        """
+        conn = self.get_duckdb_connection()
+        with self._duckdb_views_lock:
+            now = time.monotonic()
+            registered = self._duckdb_views.get(view_name)
+            if (
+                registered
+                and now - registered["checked_at"] < self.view_refresh_interval
+            ):
+                return
+
+            try:
+                # Pick up commits made by other writers since the table was opened
+                tbl.checkout_latest()
+            except Exception:
+                pass
+            version = getattr(tbl, "version", None)
+            if registered and version is not None and registered["version"] == version:
+                registered["checked_at"] = now
+                return
+
+            try:
+                conn.register(view_name, tbl.to_lance())
+            except Exception as e:
+                # Remote tables have no local Lance dataset, fall back to a full Arrow copy
+                console.print(f"[duckdb] Lazy scan unavailable, materializing: {e}")
+                conn.register(view_name, tbl.to_arrow())
+            console.print(
+                f"[duckdb] Registered view '{view_name}' at version {version}"
+            )
+            self._duckdb_views[view_name] = {"version": version, "checked_at": now}
+
 
 # Create a singleton instance to be used by other modules
 lancedb_manager = LanceDBManager()
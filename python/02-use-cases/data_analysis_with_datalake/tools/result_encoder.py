@@ -0,0 +1,104 @@
+import json
+import os
+import uuid
+from typing import Any, Optional
+
+import pandas as pd
+from rich.console import Console
+
+console = Console()
+
+# Budgets for tool responses returned to the LLM
+RESULT_MAX_ROWS = int(os.getenv("RESULT_MAX_ROWS", "200"))
+RESULT_MAX_BYTES = int(os.getenv("RESULT_MAX_BYTES", str(32 * 1024)))
+RESULT_MAX_CELL_CHARS = int(os.getenv("RESULT_MAX_CELL_CHARS", "1000"))
+RESULT_MAX_LIST_ITEMS = int(os.getenv("RESULT_MAX_LIST_ITEMS", "16"))
+# Directory for the full result when truncated; spilling is disabled when empty
+RESULT_SPILL_DIR = os.getenv("RESULT_SPILL_DIR", "")
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert a cell to a compact JSON value, eliding embeddings and long text."""
+    if hasattr(value, "tolist"):
+        # numpy scalars and arrays
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        if len(value) > RESULT_MAX_LIST_ITEMS:
+            return f"<list len={len(value)}>"
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, str) and len(value) > RESULT_MAX_CELL_CHARS:
+        return value[:RESULT_MAX_CELL_CHARS] + "…"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    return str(value)
+
+
+def _spill(df: pd.DataFrame) -> Optional[str]:
+    """Write the full result to RESULT_SPILL_DIR and return its path."""
+    if not RESULT_SPILL_DIR:
+        return None
+    try:
+        os.makedirs(RESULT_SPILL_DIR, exist_ok=True)
+        path = os.path.join(RESULT_SPILL_DIR, f"result_{uuid.uuid4().hex}.parquet")
+        df.to_parquet(path, index=False)
+        return path
+    except Exception as e:
+        console.print(f"[red][result] Spill failed: {e}[/red]")
+        return None
+
+
+def encode_result(
+    df: pd.DataFrame,
+    meta: Optional[dict] = None,
+    max_rows: int = RESULT_MAX_ROWS,
+    max_bytes: int = RESULT_MAX_BYTES,
+) -> str:
+    """Serialize a result DataFrame into a size-bounded JSON tool response.
+
+    The header is sent once in ``columns`` followed by positional ``rows``.
+    Rows are encoded one at a time and encoding stops once the row or byte
+    budget is reached, so a wide ``SELECT *`` never produces a multi-megabyte
+    response. ``meta`` reports truncation and, when enabled, the path of the
+    spilled full result.
+    """
+    columns = [str(c) for c in df.columns]
+    total_rows = len(df)
+
+    rows = []
+    size = len(json.dumps(columns, ensure_ascii=False))
+    truncated_reason = None
+    for idx, row in enumerate(df.itertuples(index=False, name=None)):
+        if idx >= max_rows:
+            truncated_reason = "max_rows"
+            break
+        encoded = [_to_jsonable(v) for v in row]
+        row_size = len(json.dumps(encoded, ensure_ascii=False, default=str)) + 1
+        if size + row_size > max_bytes and rows:
+            truncated_reason = "max_bytes"
+            break
+        size += row_size
+        rows.append(encoded)
+
+    result_meta = dict(meta or {})
+    result_meta.update(
+        {
+            "row_count": total_rows,
+            "returned_rows": len(rows),
+            "truncated": truncated_reason is not None,
+        }
+    )
+    if truncated_reason:
+        result_meta["truncated_reason"] = truncated_reason
+        spill_path = _spill(df)
+        if spill_path:
+            result_meta["spill_path"] = spill_path
+
+    return json.dumps(
+        {"status": "ok", "columns": columns, "rows": rows, "meta": result_meta},
+        ensure_ascii=False,
+        default=str,
+    )
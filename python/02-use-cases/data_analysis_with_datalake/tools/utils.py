@@ -1,5 +1,12 @@
+import asyncio
+import hashlib
+import json
 import os
-from typing import Optional, Tuple
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Set, Tuple
 
 from rich.console import Console
 from volcenginesdkarkruntime import Ark
@@ -16,10 +23,165 @@ ARK_MULTIMODAL_EMBEDDING_MODEL = os.getenv(
     "ARK_MODEL_ID", "doubao-embedding-vision-250615"
 )
 
+# Embedding cache configuration
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+EMBEDDING_BATCH_WINDOW = float(os.getenv("EMBEDDING_BATCH_WINDOW", "0.01"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
 # Cached clients
 _ark_client: Optional[Ark] = None
 
 
+class EmbeddingCache:
+    """LRU + TTL cache of embeddings keyed by (model, text).
+
+    When ``persist_path`` is set, entries are also written to a sqlite file so
+    repeated intents are reused across sessions and restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = EMBEDDING_CACHE_SIZE,
+        ttl: float = EMBEDDING_CACHE_TTL,
+        persist_path: str = EMBEDDING_CACHE_PATH,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[list, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            try:
+                self._db = sqlite3.connect(persist_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(key TEXT PRIMARY KEY, vector TEXT, created_at REAL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                console.print(f"[red]Embedding cache persistence disabled: {e}[/red]")
+                self._db = None
+
+    @staticmethod
+    def _key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[list]:
+        key = self._key(model, text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] < self.ttl:
+                    vector = json.loads(row[0])
+                    self._store(key, vector, row[1])
+                    self.hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector: list) -> None:
+        key = self._key(model, text)
+        now = time.time()
+        with self._lock:
+            self._store(key, vector, now)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                        (key, json.dumps(vector), now),
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    console.print(f"[red]Failed to persist embedding: {e}[/red]")
+
+    def _store(self, key: str, vector: list, created_at: float) -> None:
+        self._entries[key] = (vector, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent single-text embedding requests into one batched call.
+
+    Each caller waits on its own future. The first request of a window
+    schedules a flush ``window`` seconds later with ``loop.call_later``; the
+    flush sends every pending text in one ``embeddings.create(input=[...])``
+    request in a worker thread and resolves each caller's future. A window
+    that reaches ``max_batch`` texts is flushed immediately.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[list]],
+        window: float = EMBEDDING_BATCH_WINDOW,
+        max_batch: int = EMBEDDING_BATCH_SIZE,
+    ):
+        self._embed_batch = embed_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Keep references to running flushes so they are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+        self.calls = 0
+
+    async def embed(self, text: str) -> Tuple[Optional[list], Optional[str]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.calls += 1
+        try:
+            vectors = dict(
+                zip(texts, await asyncio.to_thread(self._embed_batch, texts))
+            )
+            error = None
+        except Exception as e:
+            vectors = {}
+            error = f"Failed to get text embedding: {e}"
+        for text, future in batch:
+            if future.done():
+                continue
+            vector = vectors.get(text)
+            if vector is None:
+                future.set_result((None, error or "Ark 返回为空"))
+            else:
+                future.set_result((vector, None))
+
+
 def get_ark_client() -> Tuple[Optional[Ark], Optional[str]]:
     """Initialize and cache Ark client from volcenginesdkarkruntime."""
     global _ark_client
@@ -35,27 +197,48 @@ def get_ark_client() -> Tuple[Optional[Ark], Optional[str]]:
         return None, f"Failed to init Ark client: {e}"
 
 
-def get_text_embedding(text: str) -> Tuple[Optional[list], Optional[str]]:
-    """Get text embedding using Ark client."""
+def _embed_texts(texts: List[str]) -> List[list]:
     client, error_msg = get_ark_client()
     if error_msg:
-        return None, error_msg
-    try:
-        resp = client.embeddings.create(model=ARK_TEXT_EMBEDDING_MODEL, input=[text])
-        return resp.data[0].embedding, None
-    except Exception as e:
-        error_msg = f"Failed to get text embedding: {e}"
+        raise RuntimeError(error_msg)
+    resp = client.embeddings.create(model=ARK_TEXT_EMBEDDING_MODEL, input=texts)
+    # Results carry their input index, keep them aligned with ``texts``
+    data = sorted(resp.data, key=lambda item: getattr(item, "index", 0))
+    return [item.embedding for item in data]
+
+
+embedding_cache = EmbeddingCache()
+_text_embedding_batcher = EmbeddingBatcher(_embed_texts)
+
+
+async def get_text_embedding(text: str) -> Tuple[Optional[list], Optional[str]]:
+    """Get text embedding using Ark client, cached and micro-batched."""
+    cached = embedding_cache.get(ARK_TEXT_EMBEDDING_MODEL, text)
+    if cached is not None:
+        return cached, None
+
+    vector, error_msg = await _text_embedding_batcher.embed(text)
+    if error_msg:
         console.print(f"[red]{error_msg}[/red]")
         return None, error_msg
+    embedding_cache.put(ARK_TEXT_EMBEDDING_MODEL, text, vector)
+    return vector, None
+
 
+async def get_multimodal_text_vector(
+    text: str,
+) -> Tuple[Optional[list], Optional[str]]:
+    """Get multimodal text vector using Ark client, cached by (model, text)."""
+    cached = embedding_cache.get(ARK_MULTIMODAL_EMBEDDING_MODEL, text)
+    if cached is not None:
+        return cached, None
 
-def get_multimodal_text_vector(text: str) -> Tuple[Optional[list], Optional[str]]:
-    """Get multimodal text vector using Ark client."""
     client, error_msg = get_ark_client()
     if error_msg:
         return None, "MODEL_AGENT_API_KEY 未设置"
     try:
-        resp = client.multimodal_embeddings.create(
+        resp = await asyncio.to_thread(
+            client.multimodal_embeddings.create,
             model=ARK_MULTIMODAL_EMBEDDING_MODEL,
             input=[{"type": "text", "text": text}],
         )
@@ -63,6 +246,7 @@ def get_multimodal_text_vector(text: str) -> Tuple[Optional[list], Optional[str]
         if data is None:
             return None, "Ark 返回为空"
         vec = data[0].embedding if hasattr(data, "__getitem__") else data.embedding
+        embedding_cache.put(ARK_MULTIMODAL_EMBEDDING_MODEL, text, vec)
         return vec, None
     except Exception as e:
         return None, f"Ark 向量化失败: {e}"
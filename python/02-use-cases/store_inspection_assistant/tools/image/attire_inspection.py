@@ -13,23 +13,16 @@
 # limitations under the License.
 import logging
 
-from tools.model_auth import get_ark_api_key, get_base_url
+from tools.image.inspection_engine import REASONING_PARAMS, inspection_engine
 from prompts.prompt import (
     attire_inspection_wearing_detection_tool_prompt_cn,
     attire_inspection_wearing_detection_tool_prompt_en,
 )
-from volcenginesdkarkruntime import Ark
 import os
 
 
 logger = logging.getLogger(__name__)
 
-client = Ark(
-    api_key=get_ark_api_key(),
-    base_url=get_base_url(),
-    timeout=1800,
-)
-
 attire_inspection_wearing_detection_tool_prompt = ""
 provider = os.getenv("CLOUD_PROVIDER")
 if provider and provider.lower() == "byteplus":
@@ -41,8 +34,14 @@ else:
         attire_inspection_wearing_detection_tool_prompt_cn
     )
 
+inspection_engine.register(
+    "attire_wearing",
+    attire_inspection_wearing_detection_tool_prompt,
+    **REASONING_PARAMS,
+)
 
-def wearing_detection_tool(image_url: str) -> str:
+
+async def wearing_detection_tool(image_url: str) -> str:
     """
     Worker wearing detection tool, input is image url, return worker wearing detection result
     Args:
@@ -52,22 +51,4 @@ def wearing_detection_tool(image_url: str) -> str:
     """
 
     logger.debug(f"Running wearing_detection_tool with image_url: {image_url}")
-    prompt = attire_inspection_wearing_detection_tool_prompt
-    response = client.chat.completions.create(
-        model="seed-1-6-250915",
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": image_url, "detail": "high"},
-                    },
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-        thinking={"typed": "enabled"},
-        reasoning_effort="high",
-    )
-    return response.choices[0].message.content
+    return await inspection_engine.run("attire_wearing", image_url)
@@ -0,0 +1,36 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+
+# Imported for their check registrations
+from tools.image import attire_inspection, shelf_inspection, sink_inspection  # noqa: F401
+from tools.image.inspection_engine import inspection_engine
+
+logger = logging.getLogger(__name__)
+
+
+async def combined_inspection_tool(image_url: str, check_types: list[str]) -> dict:
+    """
+    Combined inspection tool, run several inspection categories on the same image concurrently
+    Args:
+        image_url (str): image url
+        check_types (list[str]): inspection categories, any of "sink_debris" (sink debris), "shelf_display" (shelf display), "attire_wearing" (worker attire)
+    Returns:
+        dict: detection result per inspection category
+    """
+
+    logger.debug(
+        f"Running combined_inspection_tool with image_url: {image_url}, check_types: {check_types}"
+    )
+    return await inspection_engine.run_many(image_url, check_types)
@@ -11,14 +11,20 @@ where the four numbers represent: x1 y1 x2 y2 (top-left and bottom-right coordin
 
 import logging
 import re
-import requests
 import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from PIL import Image
-from tools.tos_upload import upload_file_to_tos
+from tools.image.image_store import encode_image, image_result_store, source_image_cache
+from tools.tos_upload import upload_bytes_to_tos
 
 logger = logging.getLogger(__name__)
 
+# Parallel TOS uploads per batch crop call
+CROP_UPLOAD_WORKERS = 4
+
+BBOX_PATTERN = re.compile(r"<bbox>(\d+),?\s*(\d+),?\s*(\d+),?\s*(\d+)</bbox>")
+
 
 def parse_bbox(bbox_string):
     """
@@ -53,36 +59,34 @@ def parse_bbox(bbox_string):
     return x1, y1, x2, y2
 
 
-def crop_image_by_bbox(image_url: str, bbox_coords: str) -> tuple[str, str]:
+def parse_bboxes(bbox_string):
     """
-    Crop image by bbox coordinates
+    Parse every bbox in a string
 
     Args:
-        image_url: URL of input image
-        bbox_coords: String in format "<bbox>X X X X</bbox>"
+        bbox_string: String containing one or more "<bbox>x1 y1 x2 y2</bbox>"
 
     Returns:
-        str: Output path of cropped image
+        list: [(x1, y1, x2, y2), ...] coordinates
     """
-    # If bbox_coords is a string, parse it first
-    if isinstance(bbox_coords, str):
-        x1, y1, x2, y2 = parse_bbox(bbox_coords)
-    else:
-        x1, y1, x2, y2 = bbox_coords
-    # Download image from URL
-    response = requests.get(image_url)
-    image_path = "temp_image.png"
-
-    with open(image_path, "wb") as f:
-        f.write(response.content)
-
-    logger.debug(f"Cropping image: {image_path}, bbox: ({x1}, {y1}, {x2}, {y2})")
-    # Open image
-    with Image.open(image_path) as img:
-        # Check if coordinates are within image bounds
-        w, h = img.size
-
-        # Check if coordinates are within image bounds
+    bboxes = []
+    for match in BBOX_PATTERN.findall(bbox_string):
+        x1, y1, x2, y2 = map(int, match)
+        bboxes.append((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+    if not bboxes:
+        raise ValueError(f"Cannot parse bbox format: {bbox_string}")
+    return bboxes
+
+
+def _crop_regions(
+    image_url: str, bboxes: list[tuple], allow_local: bool = False
+) -> list[tuple[str, str]]:
+    # Decoded once and shared by all crops of this image
+    img = source_image_cache.get(image_url, allow_local=allow_local)
+    w, h = img.size
+
+    crops = []
+    for x1, y1, x2, y2 in bboxes:
         x1 = int(x1 * w / 1000)
         y1 = int(y1 * h / 1000)
         x2 = int(x2 * w / 1000)
@@ -91,29 +95,55 @@ def crop_image_by_bbox(image_url: str, bbox_coords: str) -> tuple[str, str]:
         if x1 >= x2 or y1 >= y2:
             raise ValueError(f"Invalid crop area: ({x1}, {y1}, {x2}, {y2})")
 
-        # Crop image
-        cropped_img = img.crop((x1, y1, x2, y2))
+        data = encode_image(img.crop((x1, y1, x2, y2)))
+        # Unique name per crop, concurrent sessions never share an intermediate image
+        name = image_result_store.put(f"crop_{uuid.uuid4().hex[:8]}.png", data)
+        logger.debug(
+            f"Cropped {image_url} area ({x1}, {y1}, {x2}, {y2}) into {name}, {len(data)} bytes"
+        )
+        crops.append((name, data))
 
-        # Generate output path
-        # if output_path is None:
-        input_path = Path(image_path)
-        output_path = (
-            input_path.parent / f"{input_path.stem}_cropped{input_path.suffix}"
+    with ThreadPoolExecutor(
+        max_workers=min(CROP_UPLOAD_WORKERS, len(crops))
+    ) as executor:
+        urls = list(
+            executor.map(lambda crop: upload_bytes_to_tos(crop[1], crop[0]), crops)
         )
-        # Save cropped image
-        cropped_img.save(output_path)
 
-        print("Image cropping completed!")
-        print(f"Input image: {image_path}")
-        print(f"Crop area: ({x1}, {y1}, {x2}, {y2})")
-        print(f"Output image: {output_path}")
-        print(f"Crop size: {x2 - x1} x {y2 - y1}")
+    results = [(name, url) for (name, _), url in zip(crops, urls)]
+    logger.info(f"Cropped {len(results)} regions from {image_url}: {results}")
+    return results
+
+
+def crop_image_by_bboxes(image_url: str, bbox_coords: str) -> list[tuple[str, str]]:
+    """
+    Crop several regions of one image in a single call and upload the crops in parallel
+
+    Args:
+        image_url: URL of input image
+        bbox_coords: String containing one or more "<bbox>X X X X</bbox>"
+
+    Returns:
+        list: [(name, url), ...] in bbox order, name can be passed to the other image tools
+    """
+    return _crop_regions(image_url, parse_bboxes(bbox_coords))
 
-        # Upload cropped image to TOS
-        cropped_url = upload_file_to_tos(output_path)
-        logger.info(f"cropped image tos url {cropped_url}")
 
-        return str(output_path), cropped_url
+def crop_image_by_bbox(image_url: str, bbox_coords: str) -> tuple[str, str]:
+    """
+    Crop image by bbox coordinates
+
+    Args:
+        image_url: URL of input image
+        bbox_coords: String in format "<bbox>X X X X</bbox>"
+
+    Returns:
+        tuple: (name, url) of cropped image, name can be passed to the other image tools
+    """
+    # If bbox_coords is a string, parse it first
+    if isinstance(bbox_coords, str):
+        bbox_coords = parse_bbox(bbox_coords)
+    return _crop_regions(image_url, [bbox_coords])[0]
 
 
 def main():
@@ -133,8 +163,13 @@ def main():
 
     try:
         # Execute cropping
-        output_path = crop_image_by_bbox(image_path, bbox_string)
-        print(f"\nImage cropping completed successfully! Output file: {output_path}")
+        for name, url in _crop_regions(
+            image_path, parse_bboxes(bbox_string), allow_local=True
+        ):
+            output_path = Path(image_path).with_name(name)
+            output_path.write_bytes(image_result_store.get(name))
+            print(f"Output file: {output_path}, url: {url}")
+        print("\nImage cropping completed successfully!")
 
     except Exception as e:
         print(f"Error: {e}")
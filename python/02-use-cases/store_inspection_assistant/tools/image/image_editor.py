@@ -12,31 +12,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import logging
-from tools.tos_upload import upload_file_to_tos
+import re
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageDraw
+from tools.image.image_store import encode_image, image_result_store, read_image_bytes
+from tools.tos_upload import upload_bytes_to_tos
 
 logger = logging.getLogger(__name__)
 
+BBOX_PATTERN = re.compile(r"<bbox>(\d+)\s+(\d+)\s+(\d+)\s+(\d+)</bbox>")
+
 
 def draw_bboxes_on_image(
-    cropped_image_path: str, detection_result: str, output_path: str
+    cropped_image_path: str,
+    detection_result: str,
+    output_path: Optional[str],
+    allow_local: bool = False,
 ) -> tuple[str, str]:
     """
     Draw bounding boxes on cropped image based on detection result
     Args:
-        cropped_image_path: Path to cropped image
+        cropped_image_path: Name returned by the cropping tool, or a local image path with allow_local
         detection_result: String containing multiple bbox coordinates
-        output_path: Path to save output image. If None, will generate automatically
+        output_path: Also save the output image to this path. If None, it is kept in memory only
+        allow_local: Read cropped_image_path from the local file system, only for scripts
     Returns:
-        str: Path to output image with bounding boxes drawn
+        tuple: (name, url) of the image with bounding boxes drawn
     """
-    import re
-    from PIL import Image, ImageDraw
-    from pathlib import Path
-
     # Parse all bbox coordinates
-    bbox_pattern = r"<bbox>(\d+)\s+(\d+)\s+(\d+)\s+(\d+)</bbox>"
-    bboxes = re.findall(bbox_pattern, detection_result)
+    bboxes = BBOX_PATTERN.findall(detection_result)
 
     if not bboxes:
         logger.warning(
@@ -44,8 +52,10 @@ def draw_bboxes_on_image(
         )
         return cropped_image_path
 
-    # Open image
-    with Image.open(cropped_image_path) as img:
+    with Image.open(
+        io.BytesIO(read_image_bytes(cropped_image_path, allow_local))
+    ) as img:
+        img.load()
         # Create drawing object
         draw = ImageDraw.Draw(img)
 
@@ -69,31 +79,21 @@ def draw_bboxes_on_image(
                 x1, x2 = x2, x1
             if y1 > y2:
                 y1, y2 = y2, y1
-            print(x1, y1, x2, y2)
             # Draw rectangle box
             draw.rectangle([x1, y1, x2, y2], outline=box_color, width=box_width)
 
-            # # Add small label at top-left corner of box
-            # label_y = max(0, y1 - 20)  # Ensure label doesn't go above image top
-            # draw.rectangle([x1, label_y, x1 + 40, label_y + 15], fill=box_color)
-            # draw.text([x1 + 2, label_y + 2], "Text", fill="white")
+        data = encode_image(img)
 
-        # Generate output path if not provided
-        if output_path is None:
-            input_path = Path(cropped_image_path)
-            output_path = (
-                input_path.parent / f"{input_path.stem}_with_boxes{input_path.suffix}"
-            )
+    name = image_result_store.put(
+        f"{Path(cropped_image_path).stem}_with_boxes.png", data
+    )
+    if output_path is not None:
+        Path(output_path).write_bytes(data)
 
-        # Save image with bounding boxes drawn
-        img.save(output_path)
-
-        logger.info(
-            f"Drawn {len(bboxes)} bounding boxes on image, saved to: {output_path}"
-        )
+    logger.info(f"Drawn {len(bboxes)} bounding boxes on image, stored as: {name}")
 
-        # Upload to tos and return url
-        box_marked_url = upload_file_to_tos(output_path)
-        logger.info(f"Box marked image tos url {box_marked_url}")
+    # Upload to tos and return url
+    box_marked_url = upload_bytes_to_tos(data, name)
+    logger.info(f"Box marked image tos url {box_marked_url}")
 
-        return str(output_path), box_marked_url
+    return name, box_marked_url
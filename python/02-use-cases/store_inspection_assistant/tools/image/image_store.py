@@ -0,0 +1,184 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-memory image helpers shared by the cropping and annotation tools
+
+- SourceImageCache: bounded LRU of decoded source images keyed by URL, so several
+  crops of one photo download and decode it only once
+- ImageResultStore: bounded LRU of encoded intermediate images (crops, annotated
+  crops) keyed by a unique file-like name that agents pass to later tools instead
+  of a temp file path
+"""
+
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SOURCE_CACHE_SIZE = int(os.getenv("IMAGE_SOURCE_CACHE_SIZE", "8"))
+IMAGE_SOURCE_CACHE_MAX_MB = int(os.getenv("IMAGE_SOURCE_CACHE_MAX_MB", "256"))
+IMAGE_RESULT_STORE_SIZE = int(os.getenv("IMAGE_RESULT_STORE_SIZE", "64"))
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "30"))
+
+# Shared keep-alive connection pool for image downloads
+_http = requests.Session()
+
+
+def _image_nbytes(img: Image.Image) -> int:
+    w, h = img.size
+    return w * h * len(img.getbands())
+
+
+def encode_image(img: Image.Image, fmt: str = "PNG") -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class SourceImageCache:
+    """
+    LRU cache of decoded source images, bounded by entry count and decoded size
+    """
+
+    def __init__(
+        self,
+        max_entries: int = IMAGE_SOURCE_CACHE_SIZE,
+        max_bytes: int = IMAGE_SOURCE_CACHE_MAX_MB * 1024 * 1024,
+        timeout: float = IMAGE_FETCH_TIMEOUT,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._entries: OrderedDict[str, Image.Image] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        # One lock per URL being fetched, concurrent requests for it wait instead of downloading again
+        self._fetch_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, url: str) -> Optional[Image.Image]:
+        with self._lock:
+            img = self._entries.get(url)
+            if img is not None:
+                self._entries.move_to_end(url)
+            return img
+
+    def _store(self, url: str, img: Image.Image):
+        with self._lock:
+            if url in self._entries:
+                return
+            self._entries[url] = img
+            self._nbytes += _image_nbytes(img)
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._nbytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= _image_nbytes(evicted)
+
+    def _fetch(self, url: str, allow_local: bool) -> Image.Image:
+        if url.startswith(("http://", "https://")):
+            response = _http.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.content
+        elif allow_local:
+            # Local file, only for the command line entry
+            with open(url, "rb") as f:
+                data = f.read()
+        else:
+            raise ValueError(f"Only http(s) image URLs are supported: {url}")
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img
+
+    def get(self, url: str, allow_local: bool = False) -> Image.Image:
+        """
+        Return the decoded image of url; callers must not modify it in place.
+        Local paths are read only with allow_local, tool arguments must be URLs
+        """
+        img = self._lookup(url)
+        if img is not None:
+            self.hits += 1
+            return img
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(url, threading.Lock())
+        with fetch_lock:
+            img = self._lookup(url)
+            if img is not None:
+                self.hits += 1
+                return img
+            self.misses += 1
+            try:
+                img = self._fetch(url, allow_local)
+                self._store(url, img)
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(url, None)
+            logger.debug(f"Fetched source image {url}, size {img.size}")
+            return img
+
+
+class ImageResultStore:
+    """
+    LRU store of encoded intermediate images keyed by file-like names
+    """
+
+    def __init__(self, max_entries: int = IMAGE_RESULT_STORE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, name: str, data: bytes) -> str:
+        with self._lock:
+            self._entries[name] = data
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return name
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(name)
+            if data is not None:
+                self._entries.move_to_end(name)
+            return data
+
+
+source_image_cache = SourceImageCache()
+image_result_store = ImageResultStore()
+
+
+def read_image_bytes(image_path: str, allow_local: bool = False) -> bytes:
+    """
+    Read an image produced by the tools.
+    Local paths are read only with allow_local, tool arguments must be stored names
+    """
+    data = image_result_store.get(image_path)
+    if data is not None:
+        return data
+    if allow_local:
+        # Local file, only for the command line entry
+        with open(image_path, "rb") as f:
+            return f.read()
+    raise ValueError(
+        f"Intermediate image {image_path} has expired or does not exist, crop the image again"
+    )
@@ -0,0 +1,394 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Async engine shared by the image inspection tools
+
+- One AsyncArk client and one concurrency limit for every check
+- Results cached by (image hash, check type, prompt version), concurrent requests
+  for the same key share one model call
+- Optionally merge several checks on the same image into one JSON output call
+- Per-check latency and token metrics, see InspectionEngine.stats()
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+
+from tools.model_auth import get_ark_api_key, get_base_url
+from volcenginesdkarkruntime import AsyncArk
+
+logger = logging.getLogger(__name__)
+
+INSPECTION_MODEL = os.getenv("INSPECTION_MODEL", "seed-1-6-250915")
+INSPECTION_TIMEOUT = float(os.getenv("INSPECTION_TIMEOUT", "1800"))
+INSPECTION_CONCURRENCY = int(os.getenv("INSPECTION_CONCURRENCY", "4"))
+INSPECTION_CACHE_SIZE = int(os.getenv("INSPECTION_CACHE_SIZE", "256"))
+INSPECTION_CACHE_TTL = float(os.getenv("INSPECTION_CACHE_TTL", "3600"))
+# Images are downloaded and hashed for the cache key, larger ones are not cached
+INSPECTION_FETCH_TIMEOUT = float(os.getenv("INSPECTION_FETCH_TIMEOUT", "30"))
+INSPECTION_MAX_IMAGE_MB = int(os.getenv("INSPECTION_MAX_IMAGE_MB", "32"))
+INSPECTION_MERGE_CHECKS = os.getenv("INSPECTION_MERGE_CHECKS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Deep reasoning used by the category checks
+REASONING_PARAMS = {"thinking": {"typed": "enabled"}, "reasoning_effort": "high"}
+
+MERGED_PROMPT = """Perform each of the following independent inspections on the same image.
+Reply with a single JSON object. Its keys are the inspection names below, and each value is the complete result text of that inspection, written exactly as that inspection asks.
+
+"""
+
+
+def image_content(image_url: str, prompt: str) -> list[dict]:
+    return [
+        {"type": "image_url", "image_url": {"url": image_url, "detail": "high"}},
+        {"type": "text", "text": prompt},
+    ]
+
+
+class InspectionCheck:
+    """
+    One inspection category: prompt plus extra chat completion parameters
+    """
+
+    def __init__(self, name: str, prompt: str, params: dict):
+        self.name = name
+        self.prompt = prompt
+        self.params = params
+        # Editing the prompt or parameters invalidates cached results
+        self.version = hashlib.sha256(
+            json.dumps([prompt, params], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+
+
+class InspectionEngine:
+    """
+    Runs registered inspection checks against images
+    """
+
+    def __init__(
+        self,
+        model: str = INSPECTION_MODEL,
+        concurrency: int = INSPECTION_CONCURRENCY,
+        cache_size: int = INSPECTION_CACHE_SIZE,
+        cache_ttl: float = INSPECTION_CACHE_TTL,
+        timeout: float = INSPECTION_TIMEOUT,
+    ):
+        self.model = model
+        self.concurrency = concurrency
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self.checks: dict[str, InspectionCheck] = {}
+        self.metrics: dict[str, dict] = {}
+
+        self._client: Optional[AsyncArk] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # (image hash, check type, prompt version) -> (result, expires_at)
+        self._cache: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+
+    def register(self, name: str, prompt: str, **params) -> InspectionCheck:
+        check = InspectionCheck(name, prompt, params)
+        self.checks[name] = check
+        return check
+
+    def _get_client(self) -> AsyncArk:
+        loop = asyncio.get_running_loop()
+        # The client and semaphore are bound to the event loop, rebuild them when it changes
+        if self._client is None or self._loop is not loop:
+            self._client = AsyncArk(
+                api_key=get_ark_api_key(),
+                base_url=get_base_url(),
+                timeout=self.timeout,
+            )
+            self._http = httpx.AsyncClient(
+                timeout=INSPECTION_FETCH_TIMEOUT, follow_redirects=True
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+            self._inflight.clear()
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+        if self._http is not None:
+            await self._http.aclose()
+        self._client = self._http = None
+        self._loop = None
+
+    def _metric(self, name: str) -> dict:
+        return self.metrics.setdefault(
+            name,
+            {
+                "calls": 0,
+                "merged_calls": 0,
+                "cache_hits": 0,
+                "failures": 0,
+                "latency_seconds": 0.0,
+                "max_latency_seconds": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            },
+        )
+
+    def _record(self, names: list[str], latency: float, usage, merged: bool):
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        for i, name in enumerate(names):
+            metric = self._metric(name)
+            metric["calls"] += 1
+            metric["merged_calls"] += int(merged)
+            metric["latency_seconds"] += latency
+            metric["max_latency_seconds"] = max(metric["max_latency_seconds"], latency)
+            # A merged call's tokens are split evenly between its checks
+            metric["prompt_tokens"] += prompt_tokens // len(names) + int(
+                i < prompt_tokens % len(names)
+            )
+            metric["completion_tokens"] += completion_tokens // len(names) + int(
+                i < completion_tokens % len(names)
+            )
+        logger.info(
+            f"Inspection {','.join(names)} finished: latency={latency:.2f}s, "
+            f"prompt_tokens={prompt_tokens}, completion_tokens={completion_tokens}"
+        )
+
+    async def _complete(
+        self, names: list[str], content: list[dict], merged: bool = False, **params
+    ) -> str:
+        client = self._get_client()
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": content}],
+                    **params,
+                )
+            except Exception:
+                for name in names:
+                    self._metric(name)["failures"] += 1
+                raise
+            self._record(
+                names,
+                time.perf_counter() - start,
+                getattr(response, "usage", None),
+                merged,
+            )
+        return response.choices[0].message.content
+
+    async def chat(self, name: str, content: list[dict], **params) -> str:
+        """
+        Uncached call for checks whose input is not a single image
+        """
+        return await self._complete([name], content, **params)
+
+    def _cache_get(self, key: Optional[tuple]) -> Optional[str]:
+        if key is None:
+            return None
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        result, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return result
+
+    def _cache_put(self, key: Optional[tuple], result: str):
+        if key is None:
+            return
+        self._cache[key] = (result, time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _image_digest(self, image_url: str) -> Optional[str]:
+        """
+        SHA-256 of the image content, so a fixed URL whose image changes is not served
+        a stale verdict; None when the image cannot be read, the result is then not cached
+        """
+        if image_url.startswith("data:"):
+            return hashlib.sha256(image_url.encode("utf-8")).hexdigest()
+        if not image_url.startswith(("http://", "https://")):
+            return None
+        self._get_client()
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            async with self._http.stream("GET", image_url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > INSPECTION_MAX_IMAGE_MB * 1024 * 1024:
+                        return None
+                    sha256.update(chunk)
+        except Exception as e:
+            logger.warning(f"Failed to fetch {image_url} for the cache key: {e}")
+            return None
+        return sha256.hexdigest()
+
+    def _key(self, digest: Optional[str], name: str) -> Optional[tuple]:
+        if digest is None:
+            return None
+        return (digest, name, self.checks[name].version)
+
+    async def _run_single(self, key: Optional[tuple], image_url: str, name: str) -> str:
+        check = self.checks[name]
+        result = await self._complete(
+            [name], image_content(image_url, check.prompt), **check.params
+        )
+        self._cache_put(key, result)
+        return result
+
+    async def run(self, name: str, image_url: str) -> str:
+        """
+        Run one check on an image
+        """
+        digest = await self._image_digest(image_url)
+        return await self._run_keyed(name, image_url, self._key(digest, name))
+
+    async def _run_keyed(self, name: str, image_url: str, key: Optional[tuple]) -> str:
+        if key is None:
+            return await self._run_single(None, image_url, name)
+        result = self._cache_get(key)
+        if result is not None:
+            self._metric(name)["cache_hits"] += 1
+            return result
+
+        self._get_client()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_single(key, image_url, name))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: a cancelled caller does not cancel the call other callers wait on
+        return await asyncio.shield(task)
+
+    async def _run_merged(
+        self, image_url: str, names: list[str], digest: Optional[str]
+    ) -> dict[str, str]:
+        prompt = MERGED_PROMPT + "\n\n".join(
+            f"## {name}\n{self.checks[name].prompt}" for name in names
+        )
+        params = dict(self.checks[names[0]].params)
+        params["response_format"] = {"type": "json_object"}
+        try:
+            text = await self._complete(
+                names, image_content(image_url, prompt), merged=True, **params
+            )
+            parsed = json.loads(text)
+        except Exception as e:
+            logger.warning(f"Merged inspection {names} failed, run separately: {e}")
+            return {}
+
+        results = {}
+        for name in names:
+            value = parsed.get(name) if isinstance(parsed, dict) else None
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False)
+            self._cache_put(self._key(digest, name), value)
+            results[name] = value
+        return results
+
+    async def run_many(
+        self, image_url: str, names: list[str], merge: Optional[bool] = None
+    ) -> dict[str, str]:
+        """
+        Run several checks on one image concurrently
+
+        With merge, checks sharing the same parameters are sent as one JSON output call;
+        checks missing from the merged reply fall back to separate calls.
+        Failed checks map to an error description.
+        """
+        merge = INSPECTION_MERGE_CHECKS if merge is None else merge
+        names = list(dict.fromkeys(names))
+        unknown = [name for name in names if name not in self.checks]
+        if unknown:
+            raise ValueError(
+                f"Unknown inspection checks {unknown}, available: {list(self.checks)}"
+            )
+
+        digest = await self._image_digest(image_url)
+        results = {}
+        pending = []
+        for name in names:
+            cached = self._cache_get(self._key(digest, name))
+            if cached is not None:
+                self._metric(name)["cache_hits"] += 1
+                results[name] = cached
+            else:
+                pending.append(name)
+
+        if merge and len(pending) > 1:
+            groups: dict[str, list[str]] = {}
+            for name in pending:
+                params = json.dumps(self.checks[name].params, sort_keys=True)
+                groups.setdefault(params, []).append(name)
+            merged = await asyncio.gather(
+                *(
+                    self._run_merged(image_url, group, digest)
+                    for group in groups.values()
+                    if len(group) > 1
+                )
+            )
+            for group_results in merged:
+                results.update(group_results)
+            pending = [name for name in pending if name not in results]
+
+        outputs = await asyncio.gather(
+            *(
+                self._run_keyed(name, image_url, self._key(digest, name))
+                for name in pending
+            ),
+            return_exceptions=True,
+        )
+        for name, output in zip(pending, outputs):
+            if isinstance(output, Exception):
+                logger.error(f"Inspection {name} failed: {output}")
+                output = f"Inspection {name} failed: {output}"
+            results[name] = output
+        return {name: results[name] for name in names}
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            name: {
+                **metric,
+                "avg_latency_seconds": (
+                    metric["latency_seconds"] / metric["calls"]
+                    if metric["calls"]
+                    else 0.0
+                ),
+            }
+            for name, metric in self.metrics.items()
+        }
+
+
+inspection_engine = InspectionEngine()
@@ -12,25 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import logging
-from tools.model_auth import get_ark_api_key, get_base_url
+from tools.image.inspection_engine import REASONING_PARAMS, inspection_engine
 from prompts.prompt import (
     shelf_display_detection_tool_prompt_cn,
     shelf_display_detection_tool_prompt_en,
     shelf_inspection_wearing_detection_tool_prompt_cn,
     shelf_inspection_wearing_detection_tool_prompt_en,
 )
-from volcenginesdkarkruntime import Ark
 import os
 
 
 logger = logging.getLogger(__name__)
 
-client = Ark(
-    api_key=get_ark_api_key(),
-    base_url=get_base_url(),
-    timeout=1800,
-)
-
 shelf_display_detection_tool_prompt = ""
 shelf_inspection_wearing_detection_tool_prompt = ""
 provider = os.getenv("CLOUD_PROVIDER")
@@ -45,8 +38,15 @@ else:
         shelf_inspection_wearing_detection_tool_prompt_cn
     )
 
+inspection_engine.register(
+    "shelf_display", shelf_display_detection_tool_prompt, **REASONING_PARAMS
+)
+inspection_engine.register(
+    "shelf_wearing", shelf_inspection_wearing_detection_tool_prompt, **REASONING_PARAMS
+)
 
-def shelf_display_detection_tool(image_url: str) -> str:
+
+async def shelf_display_detection_tool(image_url: str) -> str:
     """
     Shelf display detection tool, input shelf image URL, return shelf display detection result
     Args:
@@ -56,28 +56,10 @@ def shelf_display_detection_tool(image_url: str) -> str:
     """
 
     logger.debug(f"Running shelf_display_detection_tool with image_url: {image_url}")
-    prompt = shelf_display_detection_tool_prompt
-    response = client.chat.completions.create(
-        model="seed-1-6-250915",
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": image_url, "detail": "high"},
-                    },
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-        thinking={"typed": "enabled"},
-        reasoning_effort="high",
-    )
-    return response.choices[0].message.content
+    return await inspection_engine.run("shelf_display", image_url)
 
 
-def wearing_detection_tool(image_url: str) -> str:
+async def wearing_detection_tool(image_url: str) -> str:
     """
     Worker attire detection tool, input worker image URL, return worker attire detection result
     Args:
@@ -87,22 +69,4 @@ def wearing_detection_tool(image_url: str) -> str:
     """
 
     logger.debug(f"Running wearing_detection_tool with image_url: {image_url}")
-    prompt = shelf_inspection_wearing_detection_tool_prompt
-    response = client.chat.completions.create(
-        model="seed-1-6-250915",
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": image_url, "detail": "high"},
-                    },
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-        thinking={"typed": "enabled"},
-        reasoning_effort="high",
-    )
-    return response.choices[0].message.content
+    return await inspection_engine.run("shelf_wearing", image_url)
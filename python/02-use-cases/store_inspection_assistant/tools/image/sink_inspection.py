@@ -12,23 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import logging
-from tools.model_auth import get_ark_api_key, get_base_url
+from tools.image.inspection_engine import REASONING_PARAMS, inspection_engine
 from prompts.prompt import (
     sink_debris_detection_tool_prompt_en,
     sink_debris_detection_tool_prompt_cn,
 )
-from volcenginesdkarkruntime import Ark
 import os
 
 logger = logging.getLogger(__name__)
 
 
-client = Ark(
-    api_key=get_ark_api_key(),
-    base_url=get_base_url(),
-    timeout=1800,
-)
-
 sink_debris_detection_tool_prompt = ""
 provider = os.getenv("CLOUD_PROVIDER")
 if provider and provider.lower() == "byteplus":
@@ -36,8 +29,12 @@ if provider and provider.lower() == "byteplus":
 else:
     sink_debris_detection_tool_prompt = sink_debris_detection_tool_prompt_cn
 
+inspection_engine.register(
+    "sink_debris", sink_debris_detection_tool_prompt, **REASONING_PARAMS
+)
+
 
-def sink_debris_detection_tool(image_url: str) -> str:
+async def sink_debris_detection_tool(image_url: str) -> str:
     """
     Sink debris detection tool: Enter the URL of a sink image and it will return the sink debris detection results.
     Args:
@@ -47,22 +44,4 @@ def sink_debris_detection_tool(image_url: str) -> str:
     """
 
     logger.debug(f"Running sink_debris_detection_tool with image_url: {image_url}")
-    prompt = sink_debris_detection_tool_prompt
-    response = client.chat.completions.create(
-        model="seed-1-6-250915",
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": image_url, "detail": "high"},
-                    },
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-        thinking={"typed": "enabled"},
-        reasoning_effort="high",
-    )
-    return response.choices[0].message.content
+    return await inspection_engine.run("sink_debris", image_url)
@@ -20,7 +20,7 @@ Implemented using the tos library directly
 import logging
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import tos
 from tos import HttpMethodType
@@ -37,42 +37,9 @@ if provider and provider.lower() == "byteplus":
     sld = "bytepluses"
 
 
-def upload_file_to_tos(
-    file_path: str,
-    bucket_name: Optional[str] = None,
-    object_key: Optional[str] = None,
-    region: Optional[str] = None,
-    ak: Optional[str] = None,
-    sk: Optional[str] = None,
-    session_token: Optional[str] = None,
-    expires: int = 604800,  # 7-day validity
-) -> Optional[str]:
-    """
-    Upload a file to TOS object storage and return a signed accessible URL
-
-    Args:
-        file_path: Local file path
-        bucket_name: TOS bucket name, defaults to "aaa-bbb-ccc-ddd"
-        object_key: Object storage key name; if empty, uses the filename
-        region: TOS region, defaults to cn-beijing
-        ak: Access Key; if empty, reads from environment variables
-        sk: Secret Key; if empty, reads from environment variables
-        expires: Signed URL validity period (seconds), defaults to 7 days (604800 seconds)
-
-    Returns:
-        str: Signed TOS URL that can be accessed directly
-        None: Returns None if upload fails
-
-    Environment variables required:
-        VOLCENGINE_ACCESS_KEY: Volcano Engine access key
-        VOLCENGINE_SECRET_KEY: Volcano Engine secret key
-
-    Usage example:
-        >>> url = upload_file_to_tos("./video.mp4")
-        >>> print(url)
-        https://bucket.tos-cn-beijing.volces.com/video.mp4?X-Tos-Signature=...
-    """
-
+def _resolve_bucket_and_region(
+    bucket_name: Optional[str], region: Optional[str]
+) -> tuple[str, str]:
     if bucket_name is None:
         bucket_name = os.getenv("DATABASE_TOS_BUCKET")
         if bucket_name is None:
@@ -91,15 +58,22 @@ def upload_file_to_tos(
             )
         else:
             logger.info(f"Using region from env: {region}")
+    return bucket_name, region
 
-    # Check if file exists
-    if not os.path.exists(file_path):
-        logger.info(f"Error: File does not exist: {file_path}")
-        return None
 
-    if not os.path.isfile(file_path):
-        logger.info(f"Error: Path is not a file: {file_path}")
-        return None
+def _upload_to_tos(
+    put: Callable[[tos.TosClientV2, str, str], Any],
+    filename: str,
+    bucket_name: Optional[str],
+    object_key: Optional[str],
+    region: Optional[str],
+    expires: int,
+) -> Optional[str]:
+    """
+    Shared upload flow: resolve target and credentials, call ``put(client, bucket, key)``
+    and return a signed URL of the uploaded object
+    """
+    bucket_name, region = _resolve_bucket_and_region(bucket_name, region)
 
     # Retrieve STS from IAM Role
     access_key = os.getenv("VOLCENGINE_ACCESS_KEY")
@@ -123,7 +97,6 @@ def upload_file_to_tos(
     if not object_key:
         # Combine timestamp and original filename to avoid overwriting
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.basename(file_path)
         object_key = f"upload/{timestamp}_{filename}"
 
     # Create TOS client
@@ -139,7 +112,7 @@ def upload_file_to_tos(
             region=region,
         )
 
-        logger.info(f"Starting file upload: {file_path}")
+        logger.info(f"Starting file upload: {filename}")
         logger.info(f"Target Bucket: {bucket_name}")
         logger.info(f"Object Key: {object_key}")
 
@@ -154,9 +127,7 @@ def upload_file_to_tos(
                 raise e
 
         # Upload file
-        result = client.put_object_from_file(
-            bucket=bucket_name, key=object_key, file_path=file_path
-        )
+        result = put(client, bucket_name, object_key)
 
         logger.info("File uploaded successfully!")
         logger.info(f"ETag: {result.etag}")
@@ -196,6 +167,94 @@ def upload_file_to_tos(
             client.close()
 
 
+def upload_file_to_tos(
+    file_path: str,
+    bucket_name: Optional[str] = None,
+    object_key: Optional[str] = None,
+    region: Optional[str] = None,
+    ak: Optional[str] = None,
+    sk: Optional[str] = None,
+    session_token: Optional[str] = None,
+    expires: int = 604800,  # 7-day validity
+) -> Optional[str]:
+    """
+    Upload a file to TOS object storage and return a signed accessible URL
+
+    Args:
+        file_path: Local file path
+        bucket_name: TOS bucket name, defaults to "aaa-bbb-ccc-ddd"
+        object_key: Object storage key name; if empty, uses the filename
+        region: TOS region, defaults to cn-beijing
+        ak: Access Key; if empty, reads from environment variables
+        sk: Secret Key; if empty, reads from environment variables
+        expires: Signed URL validity period (seconds), defaults to 7 days (604800 seconds)
+
+    Returns:
+        str: Signed TOS URL that can be accessed directly
+        None: Returns None if upload fails
+
+    Environment variables required:
+        VOLCENGINE_ACCESS_KEY: Volcano Engine access key
+        VOLCENGINE_SECRET_KEY: Volcano Engine secret key
+
+    Usage example:
+        >>> url = upload_file_to_tos("./video.mp4")
+        >>> print(url)
+        https://bucket.tos-cn-beijing.volces.com/video.mp4?X-Tos-Signature=...
+    """
+    # Check if file exists
+    if not os.path.exists(file_path):
+        logger.info(f"Error: File does not exist: {file_path}")
+        return None
+
+    if not os.path.isfile(file_path):
+        logger.info(f"Error: Path is not a file: {file_path}")
+        return None
+
+    return _upload_to_tos(
+        lambda client, bucket, key: client.put_object_from_file(
+            bucket=bucket, key=key, file_path=file_path
+        ),
+        os.path.basename(file_path),
+        bucket_name=bucket_name,
+        object_key=object_key,
+        region=region,
+        expires=expires,
+    )
+
+
+def upload_bytes_to_tos(
+    data: bytes,
+    filename: str,
+    bucket_name: Optional[str] = None,
+    object_key: Optional[str] = None,
+    region: Optional[str] = None,
+    expires: int = 604800,  # 7-day validity
+) -> Optional[str]:
+    """
+    Upload in-memory content to TOS object storage and return a signed accessible URL
+
+    Args:
+        data: Content to upload
+        filename: Name used to build the object key when object_key is empty
+        bucket_name / object_key / region / expires: Same as upload_file_to_tos
+
+    Returns:
+        str: Signed TOS URL that can be accessed directly
+        None: Returns None if upload fails
+    """
+    return _upload_to_tos(
+        lambda client, bucket, key: client.put_object(
+            bucket=bucket, key=key, content=data
+        ),
+        filename,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        region=region,
+        expires=expires,
+    )
+
+
 # Example usage
 # if __name__ == "__main__":
 #     logger.info("=" * 60)
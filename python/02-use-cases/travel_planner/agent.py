@@ -33,6 +33,8 @@ sys.path.append(str(Path(__file__).resolve().parent))
 # 上层目录
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from knowledge_sync import KnowledgeSync
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -55,18 +57,14 @@ if tos_bucket_name == "" or tos_region == "":
     raise ValueError(
         "DATABASE_TOS_BUCKET or DATABASE_TOS_REGION environment variable is not set"
     )
-# 从预构建目录加载知识库
-try:
-    success = knowledge.add_from_directory(
-        str(Path(__file__).resolve().parent) + "/knowledgebase_docs",
-        tos_bucket_name=tos_bucket_name,
-    )
-    if success:
-        logger.info("Knowledgebase loaded successfully.")
-    else:
-        logger.info("Failed to load knowledgebase.")
-except Exception as e:
-    logger.error(f"Failed to load knowledgebase: {e}")
+# 从预构建目录按清单增量加载知识库，只上传新增或变更的文件，在后台执行不阻塞启动
+knowledge_sync = KnowledgeSync.from_directory(
+    knowledge,
+    str(Path(__file__).resolve().parent) + "/knowledgebase_docs",
+    tos_bucket_name=tos_bucket_name,
+    index=knowledge_collection_name,
+)
+knowledge_sync.start()
 
 # 3. 配置长期记忆: 如果配置了Mem0，就使用Mem0，否则使用Viking，都不配置，默认创建一个Viking记忆库
 use_mem0 = os.getenv("DATABASE_MEM0_BASE_URL") and os.getenv("DATABASE_MEM0_API_KEY")
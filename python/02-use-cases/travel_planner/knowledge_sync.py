@@ -0,0 +1,262 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from veadk.knowledgebase import KnowledgeBase
+
+logger = logging.getLogger(__name__)
+
+# 清单文件目录；多副本部署时指向共享存储，副本之间即可共用导入进度
+KNOWLEDGE_MANIFEST_DIR = os.getenv(
+    "KNOWLEDGE_MANIFEST_DIR", str(Path.home() / ".cache" / "knowledge_manifest")
+)
+# list_docs 单次最多返回 100 条
+LIST_DOCS_PAGE_SIZE = 100
+
+
+def file_digest(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class KnowledgeSync:
+    """
+    基于清单的知识库增量导入
+
+    清单按知识库 index 记录每个文件的内容哈希与导入耗时，启动时只上传新增或变更的文件，
+    删除已移除文件对应的文档；导入在后台线程执行，不阻塞模块导入与服务启动。
+    没有清单时（冷启动或新副本）以知识库中已有的同名文档为基线，导入前先删除同名文档，避免重复。
+    """
+
+    def __init__(
+        self,
+        knowledge: KnowledgeBase,
+        files: list[str],
+        tos_bucket_name: Optional[str] = None,
+        manifest_dir: str = KNOWLEDGE_MANIFEST_DIR,
+        probe: Optional[Callable[[], bool]] = None,
+        index: Optional[str] = None,
+    ):
+        """
+        :param knowledge: 目标知识库
+        :param files: 需要导入的文件列表，文件名即知识库中的文档名
+        :param tos_bucket_name: 上传文件使用的 TOS 桶
+        :param manifest_dir: 清单文件目录
+        :param probe: 没有清单且无法列出知识库文档时调用，返回 True 表示知识库已导入过当前文件，直接记录清单而不重复上传
+        :param index: 清单对应的知识库名称，默认取 knowledge.index
+        """
+        self.knowledge = knowledge
+        self.files = {Path(f).name: str(f) for f in files}
+        self.tos_bucket_name = tos_bucket_name
+        self.index = index or knowledge.index
+        self.manifest_path = Path(manifest_dir) / f"{self.index}.json"
+        self.probe = probe
+        self.report: Optional[dict] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_directory(cls, knowledge: KnowledgeBase, directory: str, **kwargs):
+        files = sorted(str(p) for p in Path(directory).rglob("*") if p.is_file())
+        return cls(knowledge, files, **kwargs)
+
+    def load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f).get("files", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignore unreadable manifest {self.manifest_path}: {e}")
+            return {}
+
+    def save_manifest(self, entries: dict):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换，避免进程中断留下半个清单
+        tmp_path = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"index": self.index, "files": entries},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        os.replace(tmp_path, self.manifest_path)
+
+    def _add_file(self, path: str):
+        success = self.knowledge.add_from_files(
+            files=[path], tos_bucket_name=self.tos_bucket_name
+        )
+        if success is False:
+            raise RuntimeError(f"Knowledgebase rejected {path}")
+
+    def _list_docs(self) -> dict[str, list[str]]:
+        """分页列出知识库中的文档，返回 文档名 -> 文档ID列表"""
+        docs: dict[str, list[str]] = {}
+        offset = 0
+        while True:
+            page = self.knowledge.list_docs(offset=offset, limit=LIST_DOCS_PAGE_SIZE)
+            for doc in page:
+                if not isinstance(doc, dict) or not doc.get("doc_id"):
+                    raise ValueError(f"Unexpected document entry: {doc}")
+                docs.setdefault(doc.get("doc_name"), []).append(doc["doc_id"])
+            if len(page) < LIST_DOCS_PAGE_SIZE:
+                return docs
+            offset += len(page)
+
+    def _delete_docs(
+        self, names: list[str], docs: Optional[dict[str, list[str]]] = None
+    ) -> set[str]:
+        """
+        按文档名删除知识库中的文档（含重复导入的副本），返回已确认删除（或本不存在）的文档名
+
+        :param docs: 已列出的 文档名 -> 文档ID列表，不传时重新列出
+        """
+        if not names:
+            return set()
+        if docs is None:
+            try:
+                docs = self._list_docs()
+            except Exception as e:
+                logger.warning(
+                    f"Failed to list documents, retry deleting {names} later: {e}"
+                )
+                return set()
+
+        deleted = set()
+        for name in names:
+            try:
+                for doc_id in docs.get(name, []):
+                    if self.knowledge.delete_doc_by_id(doc_id) is False:
+                        raise RuntimeError(f"Knowledgebase rejected deleting {doc_id}")
+            except Exception as e:
+                logger.warning(f"Failed to delete document {name}, retry later: {e}")
+                continue
+            deleted.add(name)
+        return deleted
+
+    def sync(self) -> dict:
+        """对比清单与本地文件，只导入有变化的部分，返回本次导入的统计"""
+        start = time.perf_counter()
+        manifest = self.load_manifest()
+        digests = {name: file_digest(path) for name, path in self.files.items()}
+
+        docs = None
+        adopted = []
+        if not manifest:
+            # 没有清单（冷启动、新副本或首次启用清单），知识库中已有同名文档的文件直接记入清单
+            try:
+                docs = self._list_docs()
+                adopted = [name for name in digests if name in docs]
+            except Exception as e:
+                logger.warning(f"Failed to list documents for reconciliation: {e}")
+                try:
+                    if self.probe is not None and self.probe():
+                        adopted = list(digests)
+                except Exception as e:
+                    logger.warning(f"Knowledgebase probe failed: {e}")
+            if adopted:
+                logger.info(f"Adopt {len(adopted)} files already in knowledgebase")
+                manifest = {
+                    name: {"sha256": digests[name], "seconds": 0.0} for name in adopted
+                }
+                self.save_manifest(manifest)
+
+        added = [name for name in digests if name not in manifest]
+        changed = [
+            name
+            for name in digests
+            if name in manifest and manifest[name]["sha256"] != digests[name]
+        ]
+        removed = [name for name in manifest if name not in digests]
+        unchanged = [
+            name for name in digests if name not in added and name not in changed
+        ]
+
+        # 变更与移除的文件先删除旧文档，新增的文件先删除同名文档（例如上次导入后未及时记录清单），
+        # 避免检索到过期或重复的内容
+        deleted = self._delete_docs(changed + removed + added, docs)
+        # 旧文档未删除成功的条目保留在清单中并标记，下次同步重试
+        entries = {
+            name: {k: v for k, v in manifest[name].items() if k != "pending_delete"}
+            for name in unchanged
+        }
+        for name in changed + removed:
+            if name not in deleted:
+                entries[name] = {**manifest[name], "pending_delete": True}
+
+        failed = []
+        for name in [name for name in added + changed if name in deleted]:
+            file_start = time.perf_counter()
+            try:
+                self._add_file(self.files[name])
+            except Exception as e:
+                failed.append(name)
+                logger.error(f"Failed to add {name} to knowledgebase: {e}")
+                continue
+            entries[name] = {
+                "sha256": digests[name],
+                "seconds": round(time.perf_counter() - file_start, 3),
+            }
+            # 每个文件完成后即落盘，中断后不会重复导入已完成的文件
+            self.save_manifest(entries)
+        if changed or removed:
+            self.save_manifest(entries)
+
+        self.report = {
+            "added": len(added),
+            "changed": len(changed),
+            "removed": len(removed),
+            "unchanged": len(unchanged),
+            "adopted": len(adopted),
+            "failed": len(failed),
+            "pending_delete": len(changed) + len(removed) + len(added) - len(deleted),
+            "elapsed_seconds": round(time.perf_counter() - start, 3),
+            # 按上次导入各文件的耗时估算本次跳过节省的时间
+            "saved_seconds": round(
+                sum(manifest[name].get("seconds", 0.0) for name in unchanged), 3
+            ),
+        }
+        logger.info(f"Knowledgebase {self.index} synced: {self.report}")
+        return self.report
+
+    def _run(self):
+        try:
+            self.sync()
+        except Exception as e:
+            logger.error(f"Knowledgebase sync failed: {e}", exc_info=True)
+
+    def start(self) -> threading.Thread:
+        """在后台线程执行导入，立即返回"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="knowledge-sync", daemon=True
+            )
+            self._thread.start()
+        return self._thread
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[dict]:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.report